@@ -0,0 +1 @@
+"""Benchmarks for mac_cleanup_py hot paths."""
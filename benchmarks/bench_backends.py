@@ -0,0 +1,63 @@
+"""
+Benchmark of the dry run scanning backends.
+
+Compares :class:`mac_cleanup.scanner.Scanner` (threads) with :class:`mac_cleanup.scanner.ProcessScanner`
+(processes) on generated trees of growing size to find the crossover point.
+
+Usage: ``python -m benchmarks.bench_backends [max_depth] [dirs] [files_per_dir]``
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from benchmarks.bench_get_size import generate_tree
+from mac_cleanup.scanner import ProcessScanner, Scanner
+
+
+def measure(scanner_factory: Callable[[], Scanner | ProcessScanner], path: Path, repeat: int = 3) -> tuple[float, int]:
+    """Returns best time out of `repeat` scans (pool startup included) and counted size."""
+
+    best = float("inf")
+    size = 0
+
+    for _ in range(repeat):
+        start = perf_counter()
+        size = sum(resolved.result.size for _, resolved in scanner_factory().scan([path]))
+        best = min(best, perf_counter() - start)
+
+    return best, size
+
+
+def main(max_depth: int = 4, dirs: int = 8, files_per_dir: int = 40) -> None:
+    crossover = None
+
+    for depth in range(1, max_depth + 1):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+
+            files = generate_tree(root, dirs=dirs, files_per_dir=files_per_dir, depth=depth)
+
+            thread_time, thread_size = measure(Scanner, root)
+            process_time, process_size = measure(ProcessScanner, root)
+
+            assert thread_size == process_size, f"Totals differ: {thread_size} != {process_size}"
+
+            if crossover is None and process_time < thread_time:
+                crossover = files
+
+            print(  # noqa: T201
+                f"{files:>8} files: threads {thread_time:.3f}s | processes {process_time:.3f}s | "
+                f"x{thread_time / process_time:.2f}"
+            )
+
+    if crossover is None:
+        print("Threads are faster on every tree")  # noqa: T201
+    else:
+        print(f"Processes are faster from {crossover} files")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
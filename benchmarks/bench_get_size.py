@@ -0,0 +1,123 @@
+"""
+Benchmark of the dry run size engine.
+
+Compares :func:`mac_cleanup.scanner.get_size` with the previous ``Path.glob`` implementation
+on a generated tree.
+
+Usage: ``python -m benchmarks.bench_get_size [dirs] [files_per_dir] [depth]``
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from mac_cleanup.scanner import get_size
+
+
+def legacy_get_size(path_: Path) -> float:
+    """Previous implementation with two ``Path.glob`` passes and a stat per yielded path."""
+
+    path_posix = path_.as_posix()
+    globs = ["*", "[", "]"]
+    glob_constructor: list[str] = list()
+
+    if any(glob in path_posix for glob in globs):
+        first_wildcard_position = min(path_posix.index(glob) for glob in globs if glob in path_posix)
+        path_ = Path(path_posix[:first_wildcard_position])
+        glob_constructor.append(path_posix[first_wildcard_position:])
+        is_file = False
+    else:
+        is_file = path_.is_file()
+
+    if is_file:
+        try:
+            return path_.stat(follow_symlinks=False).st_size
+        except (PermissionError, FileNotFoundError):
+            return 0
+
+    glob_constructor.append("**/*")
+
+    glob_list = glob_constructor if len(glob_constructor) == 1 else [glob_constructor[0], "/".join(glob_constructor)]
+
+    temp_size: float = 0
+
+    for glob in glob_list:
+        for file in path_.glob(glob):
+            try:
+                temp_size += file.stat(follow_symlinks=False).st_size
+            except (PermissionError, FileNotFoundError):
+                continue
+
+    return temp_size
+
+
+def generate_tree(root: Path, dirs: int, files_per_dir: int, depth: int) -> int:
+    """
+    Generates tree with nested directories.
+
+    :param root: Root of the tree
+    :param dirs: Directories on each level
+    :param files_per_dir: Files in each directory
+    :param depth: Depth of the tree
+    :return: Number of created files
+    """
+
+    created = 0
+    level = [root]
+
+    for _ in range(depth):
+        next_level: list[Path] = list()
+
+        for parent in level:
+            for dir_num in range(dirs):
+                (child := parent / f"dir_{dir_num}").mkdir()
+                next_level.append(child)
+
+                for file_num in range(files_per_dir):
+                    (child / f"file_{file_num}.bin").write_bytes(b"0" * (file_num % 7 + 1))
+                    created += 1
+
+        level = next_level
+
+    return created
+
+
+def measure(func: Callable[[Path], float], path: Path, repeat: int = 3) -> tuple[float, float]:
+    """Returns best time out of `repeat` runs and counted size."""
+
+    best = float("inf")
+    size: float = 0
+
+    for _ in range(repeat):
+        start = perf_counter()
+        size = func(path)
+        best = min(best, perf_counter() - start)
+
+    return best, size
+
+
+def main(dirs: int = 10, files_per_dir: int = 50, depth: int = 3) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+
+        files = generate_tree(root, dirs=dirs, files_per_dir=files_per_dir, depth=depth)
+
+        print(f"Generated tree: {files} files, depth {depth}")  # noqa: T201
+
+        for target in (root, root / "*"):
+            legacy_time, legacy_size = measure(legacy_get_size, target)
+            new_time, new_size = measure(lambda path: get_size(path).size, target)
+
+            assert legacy_size == new_size, f"Totals differ: {legacy_size} != {new_size}"
+
+            print(  # noqa: T201
+                f"{os.path.relpath(target, root):>4}: "
+                f"legacy {legacy_time:.3f}s | scandir {new_time:.3f}s | x{legacy_time / new_time:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
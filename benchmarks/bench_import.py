@@ -0,0 +1,47 @@
+"""
+Benchmark of cold start of the package.
+
+Measures time of ``import mac_cleanup`` and of parsing ``--help`` in a new interpreter, so only lazy imports
+of the entry point are counted (heavy dependencies are loaded on the code paths using them).
+
+Usage: ``python -m benchmarks.bench_import [repeats]``
+"""
+
+import sys
+from subprocess import DEVNULL, run
+from time import perf_counter
+
+# Code measured in a new interpreter by name
+CASES: dict[str, str] = {
+    "import": "import mac_cleanup",
+    "help": "import sys\nimport mac_cleanup\nsys.argv = ['mac-cleanup', '--help']\nmac_cleanup.main()",
+}
+
+
+def measure(code: str) -> float:
+    """Returns time of the code in a new interpreter (including interpreter start)."""
+
+    start = perf_counter()
+
+    run([sys.executable, "-c", code], stdout=DEVNULL, check=False)
+
+    return perf_counter() - start
+
+
+def main(repeats: int = 10) -> None:
+    print(f"Repeats: {repeats}")  # noqa: T201
+
+    # Interpreter w/o the package is a baseline
+    baseline = min(measure("pass") for _ in range(repeats))
+
+    print(f"interpreter: {baseline * 1e3:.1f} ms")  # noqa: T201
+
+    for name, code in CASES.items():
+        # Best of the runs (the first one may wait for the disk)
+        best = min(measure(code) for _ in range(repeats))
+
+        print(f"{name}: {best * 1e3:.1f} ms | {(best - baseline) * 1e3:.1f} ms over interpreter")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
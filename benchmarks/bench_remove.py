@@ -0,0 +1,77 @@
+"""
+Benchmark of the cleanup deletion engine.
+
+Compares :func:`mac_cleanup.remover.remove` with the previous ``rm -rf`` subprocess per target
+on generated targets.
+
+Usage: ``python -m benchmarks.bench_remove [targets] [files_per_target]``
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from mac_cleanup.remover import remove
+from mac_cleanup.utils import cmd
+
+
+def legacy_remove(path_: Path) -> None:
+    """Previous implementation with a shell and ``rm`` per target."""
+
+    cmd("rm -rf '{path}'".format(path=path_.as_posix()))
+
+
+def generate_targets(root: Path, targets: int, files_per_target: int) -> list[Path]:
+    """
+    Generates targets with files in nested directories.
+
+    :param root: Root of the targets
+    :param targets: Number of targets
+    :param files_per_target: Files in each target
+    :return: Paths of the targets
+    """
+
+    paths: list[Path] = list()
+
+    for target_num in range(targets):
+        (target := root / f"target_{target_num}" / "nested").mkdir(parents=True)
+
+        for file_num in range(files_per_target):
+            (target / f"file_{file_num}.bin").write_bytes(b"0" * (file_num % 7 + 1))
+
+        paths.append(target.parent)
+
+    return paths
+
+
+def measure(func: Callable[[Path], object], targets: int, files_per_target: int) -> float:
+    """Returns time of removing generated targets."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = generate_targets(Path(tmp_dir), targets=targets, files_per_target=files_per_target)
+
+        start = perf_counter()
+
+        for path in paths:
+            func(path)
+
+        elapsed = perf_counter() - start
+
+        assert not any(path.exists() for path in paths), "Targets weren't removed"
+
+    return elapsed
+
+
+def main(targets: int = 200, files_per_target: int = 50) -> None:
+    print(f"Targets: {targets}, files per target: {files_per_target}")  # noqa: T201
+
+    legacy_time = measure(legacy_remove, targets, files_per_target)
+    native_time = measure(remove, targets, files_per_target)
+
+    print(f"rm -rf {legacy_time:.3f}s | native {native_time:.3f}s | x{legacy_time / native_time:.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""
+Benchmark of the parallel deletion engine.
+
+Compares serial removal with :class:`mac_cleanup.remover.ParallelRemover` on a generated tree
+(10^6 files by default, generation takes a while).
+
+Usage: ``python -m benchmarks.bench_remove_parallel [files] [files_per_dir] [workers]``
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from mac_cleanup.remover import ParallelRemover, RemoveResult, remove_entry
+
+
+def generate_tree(root: Path, files: int, files_per_dir: int, fanout: int = 32) -> None:
+    """
+    Generates tree with empty files in directories nested by two levels.
+
+    :param root: Root of the tree
+    :param files: Total number of files
+    :param files_per_dir: Files in each leaf directory
+    :param fanout: Directories on the first level
+    """
+
+    flags = os.O_CREAT | os.O_WRONLY
+
+    for dir_num in range(-(-files // files_per_dir)):
+        (leaf := root / f"dir_{dir_num % fanout}" / f"leaf_{dir_num}").mkdir(parents=True)
+
+        for file_num in range(min(files_per_dir, files - dir_num * files_per_dir)):
+            os.close(os.open(leaf / f"file_{file_num}", flags))
+
+
+def measure(files: int, files_per_dir: int, workers: int) -> tuple[float, RemoveResult]:
+    """Returns time of removing generated tree with specified number of workers."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir) / "tree"
+
+        generate_tree(root, files=files, files_per_dir=files_per_dir)
+
+        start = perf_counter()
+
+        if workers > 1:
+            result = ParallelRemover(max_workers=workers).remove_tree(root.as_posix())
+        else:
+            remove_entry(root.as_posix(), result := RemoveResult())
+
+        elapsed = perf_counter() - start
+
+        assert not root.exists(), "Tree wasn't removed"
+
+    return elapsed, result
+
+
+def main(files: int = 1_000_000, files_per_dir: int = 1000, workers: int = 8) -> None:
+    print(f"Files: {files}, files per directory: {files_per_dir}")  # noqa: T201
+
+    serial_time, serial_result = measure(files, files_per_dir, workers=1)
+    parallel_time, parallel_result = measure(files, files_per_dir, workers=workers)
+
+    assert serial_result.files == parallel_result.files == files, "Not all files were removed"
+
+    print(  # noqa: T201
+        f"serial {serial_time:.3f}s | parallel ({workers} workers) {parallel_time:.3f}s | "
+        f"x{serial_time / parallel_time:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""
+Benchmark of command spawn latency in registration phase.
+
+Compares ``Popen`` with shell per probe (previous :func:`mac_cleanup.utils.cmd`), the runner forced to use
+shell, and the runner with shell-free fast paths on probes issued by default modules.
+
+Usage: ``python -m benchmarks.bench_spawn [rounds]``
+"""
+
+import sys
+from subprocess import DEVNULL, PIPE, Popen
+from time import perf_counter
+from typing import Callable
+
+from mac_cleanup.runner import CommandRunner
+
+# Probes of default modules (executables are missing on most machines)
+PROBES: list[str] = [
+    *(
+        f"type '{name}'"
+        for name in ["xcrun", "composer", "brew", "gem", "docker", "npm", "pnpm", "yarn", "bun", "pod", "go", "poetry"]
+    ),
+    "uname -s",
+    "ps aux | grep '[T]elegram'",
+]
+
+
+def legacy_cmd(command: str) -> str:
+    """Previous implementation with a shell per command."""
+
+    # Stderr isn't captured
+    stdout, _ = Popen(command, shell=True, stdout=PIPE, stderr=DEVNULL).communicate()
+
+    return stdout.decode("utf-8", errors="replace").strip()
+
+
+def measure(func: Callable[[str], object], rounds: int) -> float:
+    """Returns mean time of the probe."""
+
+    start = perf_counter()
+
+    for _ in range(rounds):
+        for probe in PROBES:
+            func(probe)
+
+    return (perf_counter() - start) / (rounds * len(PROBES))
+
+
+def main(rounds: int = 20) -> None:
+    runner = CommandRunner()
+
+    print(f"Probes: {len(PROBES)}, rounds: {rounds}")  # noqa: T201
+
+    results = {
+        "Popen shell": measure(legacy_cmd, rounds),
+        "runner shell": measure(lambda probe: runner.run(["/bin/sh", "-c", probe]), rounds),
+        "runner fast path": measure(runner.run, rounds),
+    }
+
+    for name, latency in results.items():
+        print(  # noqa: T201
+            f"{name}: {latency * 1000:.2f} ms per probe | {latency * len(PROBES) * 1000:.1f} ms per registration"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,104 @@
+"""
+Benchmark of runtime type checking overhead on hot helpers.
+
+Compares time per call of helpers and module constructors decorated with
+:func:`mac_cleanup.typecheck.typechecked` with runtime type checking enabled and disabled. Decorators are
+applied on import, so each mode is measured in a new interpreter.
+
+Usage: ``python -m benchmarks.bench_typecheck [calls] [repeats]``
+"""
+
+import sys
+from json import dumps, loads
+from os import environ
+from subprocess import run
+from time import perf_counter
+from typing import Callable
+
+# Argument passed to the interpreter measuring one of the modes
+CHILD_FLAG: str = "--child"
+
+
+def measure(func: Callable[[], object], calls: int) -> float:
+    """Returns mean time of the call."""
+
+    start = perf_counter()
+
+    for _ in range(calls):
+        func()
+
+    return (perf_counter() - start) / calls
+
+
+def measure_helpers(calls: int) -> dict[str, float]:
+    """Measures helpers in the current interpreter :return: Mean time of the call by helper name."""
+
+    from mac_cleanup import Collector, Command, Path
+    from mac_cleanup.utils import bytes_to_human, check_deletable, check_exists, expanduser
+
+    results = {
+        "expanduser": measure(lambda: expanduser("~/Library/Caches"), calls),
+        "check_exists": measure(lambda: check_exists("~/Library/Caches"), calls),
+        "check_deletable": measure(lambda: check_deletable("/tmp"), calls),
+        "bytes_to_human": measure(lambda: bytes_to_human(123456789), calls),
+        "Path()": measure(lambda: Path("~/Library/Caches/*"), calls),
+        "Command()": measure(lambda: Command("echo"), calls),
+    }
+
+    with Collector() as collector:
+        module = Command("echo")
+
+        results["Collector.add"] = measure(lambda: collector.add(module), calls)
+
+        # Don't add measured modules to the execute list
+        collector.get_temp_modules_list.clear()  # pyright: ignore [reportOptionalMemberAccess]
+
+    return results
+
+
+def run_mode(enabled: bool, calls: int) -> dict[str, float]:
+    """Measures helpers in a new interpreter with runtime type checking enabled or disabled."""
+
+    from mac_cleanup.typecheck import TYPECHECK_ENV
+
+    result = run(
+        [sys.executable, "-m", "benchmarks.bench_typecheck", CHILD_FLAG, str(calls)],
+        capture_output=True,
+        check=True,
+        env={**environ, TYPECHECK_ENV: "1" if enabled else "0"},
+        text=True,
+    )
+
+    return loads(result.stdout)
+
+
+def best_of(runs: list[dict[str, float]]) -> dict[str, float]:
+    """Returns best time of the call by helper name over the runs."""
+
+    return {name: min(run_[name] for run_ in runs) for name in runs[0]}
+
+
+def main(calls: int = 100_000, repeats: int = 5) -> None:
+    print(f"Calls: {calls}, repeats: {repeats}")  # noqa: T201
+
+    runs: dict[bool, list[dict[str, float]]] = {True: list(), False: list()}
+
+    # Modes are interleaved, so both of them share the noise of the machine
+    for _ in range(repeats):
+        for enabled, mode_runs in runs.items():
+            mode_runs.append(run_mode(enabled=enabled, calls=calls))
+
+    checked, unchecked = best_of(runs[True]), best_of(runs[False])
+
+    for name in checked:
+        print(  # noqa: T201
+            f"{name}: {checked[name] * 1e6:.2f} us checked | {unchecked[name] * 1e6:.2f} us unchecked | "
+            f"{(checked[name] - unchecked[name]) * 1e6:.2f} us overhead per call"
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == [CHILD_FLAG]:
+        print(dumps(measure_helpers(*map(int, sys.argv[2:]))))  # noqa: T201
+    else:
+        main(*map(int, sys.argv[1:]))
@@ -1,6 +1,6 @@
+from typing import TYPE_CHECKING, Any, Final
+
 from mac_cleanup.parser import args  # isort: skip_file
-from mac_cleanup.core import ProxyCollector as Collector
-from mac_cleanup.core_modules import Command, Path
 from mac_cleanup.main import EntryPoint
 
 try:
@@ -8,7 +8,36 @@ try:
 except ImportError:  # pragma: no cover
     __version__ = "source"
 
+# Entry point is light, heavy modules are imported after arguments are parsed
 main = EntryPoint().start
 
+if TYPE_CHECKING:
+    from mac_cleanup.core import ProxyCollector as Collector
+    from mac_cleanup.core_modules import Command, Path
+
+# Public classes loaded on the first access (CLI starts w/o loading core with its dependencies)
+_LAZY_ATTRS: Final[dict[str, tuple[str, str]]] = {
+    "Collector": ("mac_cleanup.core", "ProxyCollector"),
+    "Command": ("mac_cleanup.core_modules", "Command"),
+    "Path": ("mac_cleanup.core_modules", "Path"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Imports public classes on the first access."""
+
+    from importlib import import_module
+
+    if (lazy_attr := _LAZY_ATTRS.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attr_name = lazy_attr
+
+    # Cache the class in the package, so it's imported once
+    globals()[name] = value = getattr(import_module(module_name), attr_name)
+
+    return value
+
+
 __title__ = "mac-cleanup-py"
 __all__ = ["Collector", "Path", "Command", "args", "main"]
@@ -2,7 +2,7 @@
 
 from inspect import getmembers, isfunction
 from pathlib import Path
-from typing import Callable, Final, Optional, TypedDict, final
+from typing import Callable, Final, NotRequired, Optional, TypedDict, final
 
 from mac_cleanup import default_modules
 from mac_cleanup.console import console
@@ -15,6 +15,9 @@ class ConfigFile(TypedDict):
     enabled: list[str]
     custom_path: Optional[str]
 
+    # Additional paths, which are never deleted
+    protected: NotRequired[list[str]]
+
 
 @final
 class Config:
@@ -31,6 +34,12 @@ class Config:
         # Set modules in the class
         self.__modules: dict[str, Callable[..., None]] = dict()
 
+        # Files of custom modules not loaded yet (they override loaded modules with the same names)
+        self.__custom_files: dict[str, Path] = dict()
+
+        # Indexed files not loaded yet in order of the index (they may have modules missed by the index)
+        self.__pending_files: dict[Path, None] = dict()
+
         # Load default modules
         self.__load_default()
 
@@ -47,7 +56,7 @@ class Config:
             self.__config_data = ConfigFile(enabled=list(), custom_path=None)
 
             # Launch configuration
-            self.__configure(all_modules=list(self.__modules.keys()), enabled_modules=list())
+            self.__configure(all_modules=self.__list_modules(), enabled_modules=list())
 
         # Get custom modules path
         self.__custom_modules_path: Optional[str] = self.__config_data.get("custom_path")
@@ -55,14 +64,24 @@ class Config:
         # Load custom modules
         self.__load_custom()
 
+        # Protect paths from config
+        self.__load_protected()
+
     def __call__(self, *, configuration_prompted: bool):
-        """Checks config and launches additional configuration if needed."""
+        """
+        Checks config and launches additional configuration if needed.
+
+        Modules are registered in background with stream flag, so units are streamed by the collector.
+        """
+
+        from mac_cleanup.core import _Collector
+        from mac_cleanup.parser import args
 
         # Configure and exit on prompt
         if configuration_prompted:
             # Configure modules
             self.__configure(
-                all_modules=list(self.__modules.keys()), enabled_modules=self.__config_data.get("enabled", list[str]())
+                all_modules=self.__list_modules(), enabled_modules=self.__config_data.get("enabled", list[str]())
             )
 
             # Exit
@@ -74,22 +93,30 @@ class Config:
             console.print("[danger]Modules not configured, opening configuration screen...[/danger]")
 
             # Configure modules
-            self.__configure(all_modules=list(self.__modules.keys()), enabled_modules=list())
+            self.__configure(all_modules=self.__list_modules(), enabled_modules=list())
 
         # Create list with faulty modules
         remove_list: list[str] = list()
 
-        # Invoke modules
+        # Modules to be registered in config order
+        enabled_modules: list[Callable[..., None]] = list()
+
         for module_name in self.__config_data["enabled"]:
-            module = self.__modules.get(module_name)
+            module = self.__get_module(module_name)
 
             # Add faulty module to remove list - if modules wasn't found
             if not module:
                 remove_list.append(module_name)
                 continue
 
-            # Call module
-            module()
+            enabled_modules.append(module)
+
+        # Invoke modules
+        collector = _Collector()
+        collector._register_all(enabled_modules)  # noqa
+
+        if not args.stream:
+            collector._wait_registered()  # noqa
 
         # Pop faulty modules from module list
         for faulty_module in remove_list:
@@ -206,45 +233,100 @@ class Config:
 
         self.__modules.update(dict(getmembers(object=default_modules, predicate=isfunction)))
 
+    def __load_protected(self) -> None:
+        """Adds protected paths from config to the policy."""
+
+        from mac_cleanup.policy import get_policy
+
+        if isinstance(protected := self.__config_data.get("protected"), list):
+            get_policy().protect(*protected)
+
     def __load_custom(self) -> None:
-        """Loads custom modules and."""
+        """Indexes custom modules, so only files of the enabled ones are loaded."""
 
         # Empty dict if no custom path
         if not self.__custom_modules_path:
             return
 
+        from mac_cleanup.module_index import get_module_index
+
+        # Files are indexed w/o executing them
+        index = get_module_index().build(Path(self.__custom_modules_path).expanduser())
+
+        for file_path, module_names in index.items():
+            # Files, which can't be indexed, are loaded right away
+            if module_names is None:
+                self.__load_custom_file(file_path)
+                continue
+
+            self.__pending_files[file_path] = None
+
+            # Duplicates will be overwritten
+            for module_name in module_names:
+                self.__custom_files[module_name] = file_path
+
+    def __load_custom_file(self, file_path: Path) -> None:
+        """Executes file of custom modules and adds its modules."""
+
         from importlib.machinery import SourceFileLoader
         from importlib.util import module_from_spec, spec_from_loader
-        from pathlib import Path
 
-        tmp_modules: dict[str, Callable[..., None]] = dict()
+        self.__pending_files.pop(file_path, None)
 
-        # Imports all modules from the given path
-        for module in Path(self.__custom_modules_path).expanduser().rglob("*.py"):
-            # Get filename
-            filename = module.name.split(".py")[0]
+        # Get filename
+        filename = file_path.name.split(".py")[0]
 
-            # Set module loader
-            loader = SourceFileLoader(fullname=filename, path=module.as_posix())
+        # Set module loader
+        loader = SourceFileLoader(fullname=filename, path=file_path.as_posix())
 
-            # Get module spec
-            spec = spec_from_loader(loader.name, loader)
+        # Get module spec
+        spec = spec_from_loader(loader.name, loader)
 
-            # Check next file if spec is empty
-            if spec is None:
-                continue  # pragma: no cover # TODO: add test later
+        # Skip file if spec is empty
+        if spec is None:
+            return  # pragma: no cover # TODO: add test later
 
-            # Get all modules from file
-            modules = module_from_spec(spec)
+        # Get all modules from file
+        modules = module_from_spec(spec)
 
-            # Execute module
-            loader.exec_module(modules)
+        # Execute module
+        loader.exec_module(modules)
 
-            # Add modules to the list
-            # Duplicates will be overwritten
-            tmp_modules.update(dict(getmembers(object=modules, predicate=isfunction)))
+        loaded_modules = dict(getmembers(object=modules, predicate=isfunction))
+
+        # Indexed modules of the file are taken from it
+        for module_name in [module_name for module_name, path_ in self.__custom_files.items() if path_ == file_path]:
+            self.__custom_files.pop(module_name)
+
+        # Modules missed by the index (e.g. lambdas and imported functions) don't override indexed ones of other files
+        for module_name, module in loaded_modules.items():
+            if module_name not in self.__custom_files:
+                self.__modules[module_name] = module
+
+    def __load_pending(self) -> None:
+        """Loads all indexed files not loaded yet."""
+
+        for file_path in list(self.__pending_files):
+            self.__load_custom_file(file_path)
 
-        self.__modules.update(tmp_modules)
+    def __get_module(self, module_name: str) -> Optional[Callable[..., None]]:
+        """Gets module by its name (file of custom module is loaded on the first access)"""
+
+        if (file_path := self.__custom_files.get(module_name)) is not None:
+            self.__load_custom_file(file_path)
+
+        # Module isn't considered missing until all files are loaded (index only sees functions defined with def)
+        if module_name not in self.__modules:
+            self.__load_pending()
+
+        return self.__modules.get(module_name)
+
+    def __list_modules(self) -> list[str]:
+        """Lists names of all modules (all files are loaded, so modules missed by the index are listed too)"""
+
+        self.__load_pending()
+
+        return list(self.__modules)
 
     @property
     def get_modules(self) -> dict[str, Callable[..., None]]:
@@ -252,6 +334,12 @@ class Config:
 
         return self.__modules
 
+    @property
+    def get_custom_files(self) -> dict[str, Path]:
+        """Getter for private attr custom files (files of custom modules not loaded yet)"""
+
+        return self.__custom_files
+
     @property
     def get_config_data(self) -> ConfigFile:
         """Getter for private attr config data."""
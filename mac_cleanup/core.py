@@ -4,12 +4,31 @@ from functools import partial
 from itertools import chain
 from pathlib import Path as Path_
 from types import TracebackType
-from typing import Any, Final, Generator, Optional, Type, TypeGuard, TypeVar, final
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Final,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    Type,
+    TypeGuard,
+    TypeVar,
+    final,
+)
 
 import attr
-from beartype import beartype  # pyright: ignore [reportUnknownVariableType]
 
 from mac_cleanup.core_modules import BaseModule, Path
+from mac_cleanup.scanner import ScanResult
+from mac_cleanup.typecheck import typechecked
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+    from mac_cleanup.scanner import ResolvedTarget
 
 T = TypeVar("T")
 
@@ -35,11 +54,22 @@ class _Collector:
 
     _shared_instance: dict[str, Any] = dict()
 
-    # Init temp stuff
-    __temp_message: str
-    __temp_modules_list: list[BaseModule]
+    # Max number of modules registered at the same time (most of them wait for probes)
+    _MAX_REGISTERING: Final[int] = 8
+
+    # Number of dry run paths being scanned at once per worker
+    _MAX_IN_FLIGHT_PER_WORKER: Final[int] = 2
+
+    # Time budgets (in seconds) of the dry run for each path and for the whole scan
+    _TARGET_SCAN_BUDGET: Final[float] = 60.0
+    _TOTAL_SCAN_BUDGET: Final[float] = 300.0
+
+    # Time (in seconds) given to scans after total budget before their partial results are taken
+    _SCAN_GRACE_PERIOD: Final[float] = 1.0
 
     def __init__(self):
+        from threading import local
+
         # Borg implementation
         self.__dict__ = self._shared_instance
 
@@ -47,22 +77,30 @@ class _Collector:
         if not hasattr(self, "_execute_list"):
             self._execute_list: Final[list[Unit]] = list()
 
+        # Temp stuff of the current thread (modules are registered concurrently)
+        if not hasattr(self, "_local"):
+            self._local: Final = local()
+
+        # Modules being registered in background
+        if not hasattr(self, "_registering"):
+            self._registering: Optional[Iterator[None]] = None
+
     @property
     def get_temp_message(self) -> Optional[str]:
         """Getter of private potentially empty attr temp_message."""
 
-        return getattr(self, "_Collector__temp_message", None)
+        return getattr(self._local, "message", None)
 
     @property
     def get_temp_modules_list(self) -> Optional[list[BaseModule]]:
         """Getter of private potentially empty attr temp_modules_list."""
 
-        return getattr(self, "_Collector__temp_modules_list", None)
+        return getattr(self._local, "modules", None)
 
     def __enter__(self) -> "_Collector":
         # Set temp stuff
-        self.__temp_message = "Working..."
-        self.__temp_modules_list = list()
+        self._local.message = "Working..."
+        self._local.modules = list()
 
         # Return self
         return self
@@ -77,15 +115,108 @@ class _Collector:
         if exc_type:
             raise exc_type(exc_value)
 
-        # Add Unit to list if modules list exists
-        if self.__temp_modules_list:
-            self._execute_list.append(Unit(message=self.__temp_message, modules=self.__temp_modules_list))
+        # Add Unit to list (of the registered module if any) if modules list exists
+        if self._local.modules:
+            getattr(self._local, "units", self._execute_list).append(
+                Unit(message=self._local.message, modules=self._local.modules)
+            )
 
         # Unset temp stuff
-        del self.__temp_message
-        del self.__temp_modules_list
+        del self._local.message
+        del self._local.modules
+
+    def _register(self, module_: Callable[[], None]) -> list[Unit]:
+        """
+        Calls module in the current thread and collects its units w/o adding them to the execute list.
+
+        :param module_: Module adding units to the collector
+        :return: Units of the module in their order
+        """
+
+        units: list[Unit] = list()
+
+        self._local.units = units
+
+        try:
+            module_()
+        finally:
+            del self._local.units
+
+        return units
+
+    def _register_all(self, modules: list[Callable[[], None]]) -> None:
+        """
+        Starts registration of the modules at the same time in background.
+
+        Units are added to the execute list in order of the modules by :meth:`_iter_units` or
+        :meth:`_wait_registered`
+
+        :param modules: Modules adding units to the collector
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self._MAX_REGISTERING, len(modules)) or 1, thread_name_prefix="mac_cleanup_register"
+        )
+
+        registered = [executor.submit(self._register, module_) for module_ in modules]
+
+        self._registering = self.__add_registered(executor, registered)
+
+    def __add_registered(self, executor: "Executor", registered: list["Future[list[Unit]]"]) -> Iterator[None]:
+        """Adds units of the registered modules in their order (one module per step)."""
+
+        try:
+            # Raises the first error in order of the modules
+            for future in registered:
+                self._execute_list.extend(future.result())
+
+                yield
+        # Modules waiting for their turn aren't called after an error
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __advance(self, size: int) -> bool:
+        """
+        Waits for units of the modules being registered.
+
+        :param size: Number of units already taken from the execute list
+        :return: False if there are no more units
+        """
+
+        while len(self._execute_list) <= size:
+            if self._registering is None:
+                return False
 
-    @beartype
+            try:
+                next(self._registering)
+            except StopIteration:
+                self._registering = None
+            # Registration can't be continued after an error
+            except BaseException:
+                self._registering = None
+                raise
+
+        return True
+
+    def _iter_units(self) -> Iterator[Unit]:
+        """Yields units in their order as soon as their modules are registered."""
+
+        index = 0
+
+        while self.__advance(index):
+            yield self._execute_list[index]
+
+            index += 1
+
+    def _wait_registered(self) -> None:
+        """Waits for registration of all modules."""
+
+        while self.__advance(len(self._execute_list)):
+            continue
+
+    @typechecked
     def message(self, message_: str) -> None:
         """
         Add message to instance of :class:`Unit`
@@ -93,9 +224,9 @@ class _Collector:
         :param message_: Message to be printed in progress bar
         """
 
-        self.__temp_message = message_
+        self._local.message = message_
 
-    @beartype
+    @typechecked
     def add(self, module_: BaseModule) -> None:
         """
         Add module to the list of modules to instance of :class:`Unit`
@@ -104,133 +235,122 @@ class _Collector:
         :class: `BaseModule`
         """
 
-        self.__temp_modules_list.append(module_)
+        self._local.modules.append(module_)
 
     @staticmethod
-    def _get_size(path_: Path_) -> float:
-        """
-        Counts size of directory.
+    def __filter_modules(module_: BaseModule, filter_type: Type[T]) -> TypeGuard[T]:
+        """Filter instances of specified class based on :class:`BaseModule`"""
+
+        return isinstance(module_, filter_type)
 
-        :param path_: Path to the directory
-        :return: Size of specified directory
+    def __stream_paths(self, modules_by_path: dict[Path_, list[Path]]) -> Generator[Path_, None, None]:
         """
+        Yields paths of the units as soon as their modules are registered.
 
-        # Get path posix
-        path_posix = path_.as_posix()
+        :param modules_by_path: Receives modules of all paths
+        :return: Yields paths w/o duplicate ones and ones nested in the already yielded paths
+        """
 
-        # Set list of globs
-        globs = ["*", "[", "]"]
+        from mac_cleanup.scanner import _TargetTrie  # noqa
 
-        # Set glob list
-        glob_constructor: list[str] = list()
+        trie = _TargetTrie()
 
-        # Check if there is glob in path
-        if any(glob in path_posix for glob in globs):
-            # Set glob index list
-            globs_index_list: list[int] = list()
+        for unit in self._iter_units():
+            for path_module in filter(partial(self.__filter_modules, filter_type=Path), unit.modules):
+                path_ = path_module.get_path
 
-            # Find glob indexes
-            for glob in globs:
-                try:
-                    globs_index_list.append(path_posix.index(glob))
-                except ValueError:
+                if path_ in modules_by_path:
+                    modules_by_path[path_].append(path_module)
                     continue
 
-            # Find first glob
-            first_wildcard_position = min(globs_index_list)
+                modules_by_path[path_] = [path_module]
 
-            # Remove glob from path
-            path_ = Path_(path_posix[:first_wildcard_position])
+                # Empty path (cwd) isn't a real target and can't cover others
+                if path_.parts and trie.covers(path_.parts):
+                    continue
 
-            # Update glob
-            glob_constructor.append(path_posix[first_wildcard_position:])
+                trie.insert(path_.parts)
 
-            # Set is_file flag to False (globs can't be files)
-            is_file = False
-        else:
-            # Check if path is a file
-            is_file = path_.is_file()
+                yield path_
 
-        # Return size if path is a file
-        if is_file:
-            # Except SIP, symlinks, and not non-existent path
-            try:
-                return path_.stat(follow_symlinks=False).st_size
-            except (PermissionError, FileNotFoundError):
-                return 0
+    def _extract_paths(self) -> Generator[tuple[Path_, ScanResult], None, None]:
+        """
+        Extracts all paths from the collector :return: Yields paths with size.
 
-        # Add recursive glob
-        glob_constructor.append("**/*")
+        Paths of modules being registered are scanned as soon as their units are registered.
+        """
+
+        from mac_cleanup.parser import args
+        from mac_cleanup.policy import get_policy
+        from mac_cleanup.progress import ProgressBar
+        from mac_cleanup.scanner import ProcessScanner, Scanner, TraversalPlan, collapse_targets
 
-        temp_size: float = 0
+        # Group modules by their paths
+        modules_by_path: dict[Path_, list[Path]] = dict()
 
-        glob_list: list[str] = list()
+        # Paths are scanned w/o plan while modules are being registered
+        streamed = self._registering is not None
 
-        # Construct glob_list
-        if len(glob_constructor) == 1:
-            # Add recursive glob on no glob in path
-            glob_list.extend(glob_constructor)
+        if streamed:
+            paths: Iterable[Path_] = self.__stream_paths(modules_by_path)
+            plan: Optional[TraversalPlan] = None
+            total: Optional[int] = None
         else:
-            # Add specified glob
-            glob_list.append(glob_constructor[0])
-            # Add recursive glob
-            glob_list.append("/".join(glob_constructor))
-
-        # Find every file and count size
-        for glob in glob_list:
-            for file in path_.glob(glob):
-                try:
-                    temp_size += file.stat(follow_symlinks=False).st_size
-                # Except SIP, symlinks, and not non-existent path
-                except (PermissionError, FileNotFoundError):
-                    continue
-        return temp_size
+            # Extract all modules
+            all_modules = list(chain.from_iterable([unit.modules for unit in self._execute_list]))
 
-    @staticmethod
-    def __filter_modules(module_: BaseModule, filter_type: Type[T]) -> TypeGuard[T]:
-        """Filter instances of specified class based on :class:`BaseModule`"""
+            # Filter modules based on Path
+            path_modules: list[Path] = list(filter(partial(self.__filter_modules, filter_type=Path), all_modules))
 
-        return isinstance(module_, filter_type)
+            for path_module in path_modules:
+                modules_by_path.setdefault(path_module.get_path, list()).append(path_module)
 
-    def _extract_paths(self) -> Generator[tuple[Path_, float], None, None]:
-        """Extracts all paths from the collector :return: Yields paths with size."""
+            # Extracts paths from path_modules list w/o duplicate and nested ones
+            paths = collapse_targets(modules_by_path)
+            total = len(paths)
 
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+            # Plan traversal, so shared parent directories are listed once
+            plan = TraversalPlan(paths)
 
-        from mac_cleanup.progress import ProgressBar
+        # Select scanning backend
+        scanner_class = ProcessScanner if args.processes else Scanner
 
-        # Extract all modules
-        all_modules = list(chain.from_iterable([unit.modules for unit in self._execute_list]))
+        # Policy checks batches of matches at once
+        scanner = scanner_class(
+            predicate=get_policy(),
+            max_in_flight_per_worker=self._MAX_IN_FLIGHT_PER_WORKER,
+            target_budget=self._TARGET_SCAN_BUDGET,
+            total_budget=self._TOTAL_SCAN_BUDGET,
+            grace_period=self._SCAN_GRACE_PERIOD,
+        )
 
-        # Filter modules based on Path
-        path_modules: list[Path] = list(filter(partial(self.__filter_modules, filter_type=Path), all_modules))
+        # Results of the streamed paths (modules of the same path may be registered after its scan)
+        streamed_results: dict[Path_, ResolvedTarget] = dict()
 
-        # Extracts paths from path_modules list
-        path_list: list[Path_] = [path.get_path for path in path_modules]
+        # Wait for task completion and add ProgressBar
+        for path_, resolved in ProgressBar.wrap_iter(
+            scanner.scan(paths, plan=plan), description="Collecting dry run", total=total
+        ):
+            if streamed:
+                streamed_results[path_] = resolved
+                continue
 
-        # Get thread executor
-        executor = ThreadPoolExecutor()
+            yield self.__resolve(path_, resolved, modules_by_path[path_])
 
-        try:
-            # Add tasks to executor
-            tasks = [executor.submit(self._get_size, path) for path in path_list]
-
-            # Store paths and their corresponding futures
-            path_future_zip = list(zip(path_list, tasks, strict=True))
-
-            # Wait for task completion and add ProgressBar
-            for future in ProgressBar.wrap_iter(
-                as_completed(tasks), description="Collecting dry run", total=len(path_list)
-            ):
-                path = next(p for p, f in path_future_zip if f == future)
-                size = future.result(timeout=10)
-                yield path, size
-        except KeyboardInterrupt:
-            # Shutdown executor without waiting for tasks
-            executor.shutdown(wait=False)
-        else:
-            # Cleanup executor
-            executor.shutdown(wait=True)
+        # Paths nested in the later ones are kept - scanner counts entries of overlapping paths once
+        for path_, resolved in streamed_results.items():
+            yield self.__resolve(path_, resolved, modules_by_path[path_])
+
+    @staticmethod
+    def __resolve(path_: Path_, resolved: "ResolvedTarget", path_modules: list[Path]) -> tuple[Path_, ScanResult]:
+        """Sets resolved target to the modules of the path :return: Path with its size."""
+
+        # Cleanup will delete exactly the resolved matches (partially scanned paths are checked again)
+        if not resolved.incomplete:
+            for path_module in path_modules:
+                path_module._set_resolved(resolved)
+
+        return path_, resolved.result
 
 
 class ProxyCollector:
@@ -4,11 +4,13 @@ from abc import ABC, abstractmethod
 from pathlib import Path as Path_
 from typing import Final, Optional, TypeVar, final
 
-from beartype import beartype  # pyright: ignore [reportUnknownVariableType]
-
 from mac_cleanup import args
-from mac_cleanup.progress import ProgressBar
-from mac_cleanup.utils import check_deletable, check_exists, cmd
+from mac_cleanup.policy import get_policy
+from mac_cleanup.remover import RemoveResult, remove, remove_matches
+from mac_cleanup.runner import CommandResult, runner
+from mac_cleanup.scanner import ResolvedTarget
+from mac_cleanup.typecheck import typechecked
+from mac_cleanup.utils import check_deletable, check_exists
 
 T = TypeVar("T")
 
@@ -18,8 +20,10 @@ class BaseModule(ABC):
 
     __prompt: bool = False
     __prompt_message: str = "Do you want to proceed?"
+    __resources: Optional[frozenset[str]] = None
+    __after: tuple["BaseModule", ...] = ()
 
-    @beartype
+    @typechecked
     def with_prompt(self: T, message_: Optional[str] = None) -> T:
         """
         Execute command with user prompt.
@@ -41,12 +45,61 @@ class BaseModule(ABC):
 
         return self
 
+    @typechecked
+    def exclusive(self: T, *resources: str) -> T:
+        """
+        Don't run unit of the module at the same time with other units.
+
+        :param resources: Names of shared resources (e.g. "brew"), unit won't run with other units using them.
+            Unit runs alone if no resources are specified
+        :return: Instance of self from
+        :class: `BaseModule`
+        """
+
+        # Can't be solved without typing.Self
+        self.__resources = frozenset(resources)  # pyright: ignore [reportAttributeAccessIssue]
+
+        return self
+
+    @typechecked
+    def after(self: T, *modules: "BaseModule") -> T:
+        """
+        Run unit of the module after units of the specified modules are finished.
+
+        :param modules: Modules to be waited for (ones not added to any unit are ignored)
+        :return: Instance of self from
+        :class: `BaseModule`
+        """
+
+        # Can't be solved without typing.Self
+        self.__after = modules  # pyright: ignore [reportAttributeAccessIssue]
+
+        return self
+
+    @property
+    def get_resources(self) -> Optional[frozenset[str]]:
+        """Get resources used exclusively by the module :return: Empty set if module needs to run alone."""
+
+        # Prompts stop progress bar and wait for user
+        if self.__prompt:
+            return frozenset()
+
+        return self.__resources
+
+    @property
+    def get_after(self) -> tuple["BaseModule", ...]:
+        """Get modules to be finished before unit of the module."""
+
+        return self.__after
+
     @abstractmethod
     def _execute(self) -> bool:
         """Base exec with check for prompt :return: True on successful prompt."""
 
         # Call prompt if needed
         if self.__prompt:
+            from mac_cleanup.progress import ProgressBar
+
             # Skip on negative prompt
             return ProgressBar.prompt(prompt_text=self.__prompt_message, prompt_title="Module requires attention")
 
@@ -56,22 +109,31 @@ class BaseModule(ABC):
 class _BaseCommand(BaseModule):
     """Base Command with basic command methods."""
 
-    @beartype
-    def __init__(self, command_: Optional[str]):
-        self.__command: Final[Optional[str]] = command_
+    __result: Optional[CommandResult] = None
+
+    @typechecked
+    def __init__(self, command_: Optional[str | list[str]]):
+        self.__command: Final[Optional[str | list[str]]] = command_
 
     @property
-    def get_command(self) -> Optional[str]:
+    def get_command(self) -> Optional[str | list[str]]:
         """Get command specified to the module."""
 
         return self.__command
 
+    @property
+    def get_result(self) -> Optional[CommandResult]:
+        """Get exit code, duration, and output of the executed command."""
+
+        return self.__result
+
     @abstractmethod
-    def _execute(self, ignore_errors: bool = True) -> Optional[str]:
+    def _execute(self, ignore_errors: bool = True, timeout: Optional[float] = None) -> Optional[str]:
         """
         Execute the command specified.
 
         :param ignore_errors: Ignore errors during execution
+        :param timeout: Time (in seconds) before the command is killed
         :return: Command execution results based on specified parameters
         """
 
@@ -83,15 +145,22 @@ class _BaseCommand(BaseModule):
         if not super()._execute():
             return
 
-        # Execute command
-        return cmd(command=self.__command, ignore_errors=ignore_errors)
+        from mac_cleanup.progress import ProgressBar
+
+        # Execute command and show its output in progress bar (sink is bound to the task of the current thread)
+        self.__result = runner.run(
+            self.__command, ignore_errors=ignore_errors, timeout=timeout, sink=ProgressBar.get_sink
+        )
+
+        return self.__result.output
 
 
 @final
 class Command(_BaseCommand):
-    """Collector list unit for command execution."""
+    """Collector list unit for command execution (simple commands and arguments lists are run w/o shell)."""
 
     __ignore_errors: bool = True
+    __timeout: Optional[float] = None
 
     def with_errors(self) -> "Command":
         """Return errors in exec output :return: :class:`Command`"""
@@ -100,15 +169,40 @@ class Command(_BaseCommand):
 
         return self
 
-    def _execute(self, ignore_errors: Optional[bool] = None) -> Optional[str]:
+    @typechecked
+    def with_timeout(self, timeout: float | int) -> "Command":
+        """
+        Kill command with its child processes if it runs longer than specified.
+
+        Command runs w/o terminal, so it can't ask for input (e.g. sudo password).
+
+        :param timeout: Time (in seconds) before the command is killed
+        :return: :class:`Command`
+        """
+
+        self.__timeout = timeout
+
+        return self
+
+    @property
+    def get_timeout(self) -> Optional[float]:
+        """Get timeout specified to the module."""
+
+        return self.__timeout
+
+    def _execute(self, ignore_errors: Optional[bool] = None, timeout: Optional[float] = None) -> Optional[str]:
         """
         Execute the command specified.
 
         :param ignore_errors: Overrides flag `ignore_errors` in class
+        :param timeout: Overrides timeout in class
         :return: Command execution results based on specified parameters
         """
 
-        return super()._execute(ignore_errors=self.__ignore_errors if ignore_errors is None else ignore_errors)
+        return super()._execute(
+            ignore_errors=self.__ignore_errors if ignore_errors is None else ignore_errors,
+            timeout=self.__timeout if timeout is None else timeout,
+        )
 
 
 @final
@@ -116,8 +210,10 @@ class Path(_BaseCommand):
     """Collector list unit for cleaning paths."""
 
     __dry_run_only: bool = False
+    __resolved: Optional[ResolvedTarget] = None
+    __removed: Optional[RemoveResult] = None
 
-    @beartype
+    @typechecked
     def __init__(self, path: str):
         self.__path: Final[Path_] = Path_(path).expanduser()
 
@@ -131,6 +227,18 @@ class Path(_BaseCommand):
 
         return self.__path
 
+    @property
+    def get_resolved(self) -> Optional[ResolvedTarget]:
+        """Get matches of the path resolved in dry run."""
+
+        return self.__resolved
+
+    @property
+    def get_removed(self) -> Optional[RemoveResult]:
+        """Get size and number of files removed on execution."""
+
+        return self.__removed
+
     def dry_run_only(self) -> "Path":
         """Set module to only count size in dry runs :return: :class:`Path`"""
 
@@ -138,16 +246,71 @@ class Path(_BaseCommand):
 
         return self
 
-    def _execute(self, ignore_errors: bool = True) -> Optional[str]:
-        """Delete specified path :return: Command execution results based on specified
-        parameters.
+    def _set_resolved(self, resolved: ResolvedTarget) -> None:
         """
+        Set matches resolved in dry run, so cleanup deletes exactly them.
+
+        :param resolved: Resolved target of the path
+        """
+
+        self.__resolved = resolved
+
+    def __set_removed(self, removed: RemoveResult, ignore_errors: bool) -> Optional[str]:
+        """
+        Save result of the removal.
+
+        :param removed: Result of the removal
+        :param ignore_errors: Ignore errors during execution
+        :return: Errors of the removal if they are not ignored
+        """
+
+        self.__removed = removed
+
+        if ignore_errors:
+            return
+
+        return "\n".join(removed.errors)
+
+    def _execute(self, ignore_errors: bool = True, timeout: Optional[float] = None) -> Optional[str]:
+        """Delete specified path :return: Errors of the removal based on specified parameters."""
 
         if self.__dry_run_only:
             return
 
+        # Delete exactly what was counted in dry run w/o checking it again
+        if self.__resolved is not None:
+            # Skip if nothing was matched
+            if not self.__resolved.matches:
+                return
+
+            # Skip on negative prompt
+            if not BaseModule._execute(self):
+                return
+
+            # Size is known from dry run
+            removed = remove_matches(
+                (match.path for match in self.__resolved.matches),
+                count_size=False,
+                parallel=args.parallel_delete,
+                background=args.background_delete,
+            )
+            removed.size = self.__resolved.result.size
+
+            return self.__set_removed(removed, ignore_errors=ignore_errors)
+
         # Skip if path is not deletable or undefined
-        if not all([check_deletable(path=self.__path), check_exists(path=self.__path, expand_user=False)]):
+        if not all(
+            [check_deletable(path=self.__path), check_exists(path=self.__path, expand_user=False, cached=False)]
+        ):
             return
 
-        return super()._execute(ignore_errors=ignore_errors)
+        # Skip on negative prompt
+        if not BaseModule._execute(self):
+            return
+
+        # Expand glob and skip non-deletable matches (policy checks batches of them at once)
+        removed = remove(
+            self.__path, predicate=get_policy(), parallel=args.parallel_delete, background=args.background_delete
+        )
+
+        return self.__set_removed(removed, ignore_errors=ignore_errors)
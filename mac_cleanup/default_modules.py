@@ -93,7 +93,9 @@ def xcode_simulators():
             unit.add(Command("osascript -e 'tell application 'Simulator' to quit'"))
             unit.add(Command("xcrun simctl shutdown all"))
             unit.add(
-                Command("xcrun simctl erase all").with_prompt("All Xcode simulators will be pruned.\n" "Continue?")
+                Command("xcrun simctl erase all")
+                .with_prompt("All Xcode simulators will be pruned.\n" "Continue?")
+                .with_timeout(600)
             )
 
             unit.add(Path("~/Library/Developer/CoreSimulator/Devices/*/data/[!Library|var|tmp|Media]*").dry_run_only())
@@ -244,23 +246,27 @@ def kite():
 
 
 def brew():
+    from mac_cleanup.probe import get_probe
     from mac_cleanup.utils import cmd
 
     if cmd("type 'brew'"):
         with clc as unit:
             unit.message("Cleaning up Homebrew Cache")
 
-            # Get brew path
-            brew_cache_path = cmd("brew --cache")
+            # Get brew path (cached between runs, path depends on the environment)
+            brew_cache_path = get_probe().output("brew --cache", env=("HOMEBREW_CACHE", "XDG_CACHE_HOME", "HOME"))
 
-            unit.add(Command("brew cleanup -s"))
+            # Brew locks its cache and taps, so cleanup doesn't run with other brew units
+            unit.add(Command("brew cleanup -s").with_timeout(900).exclusive("brew"))
             unit.add(Path(brew_cache_path))
-            unit.add(Command("brew tap --repair"))
+            unit.add(Command("brew tap --repair").with_timeout(600).exclusive("brew"))
 
         if args.update:
             with clc as unit:
                 unit.message("Updating Homebrew Recipes and upgrading")
-                unit.add(Command("brew update && brew upgrade"))
+
+                # Upgrade may replace tools used by other units, so it runs alone
+                unit.add(Command("brew update && brew upgrade").exclusive())
 
 
 def gem():
@@ -282,16 +288,19 @@ def docker():
             # Flag for turning Docker off
             close_docker = False
 
-            if not cmd("docker ps >/dev/null 2>&1"):
+            # Unresponsive Docker daemon hangs the check
+            if not cmd("docker ps >/dev/null 2>&1", timeout=10):
                 unit.add(Command("open -jga Docker"))
 
                 close_docker = True
 
             unit.add(
-                Command("docker system prune -af").with_prompt(
+                Command("docker system prune -af")
+                .with_prompt(
                     "Stopped containers, dangling images, unused networks, volumes, and build cache will be deleted.\n"
                     "Continue?"
                 )
+                .with_timeout(900)
             )
 
             # Close Docker if it was opened by cleaner
@@ -420,14 +429,18 @@ def java_cache():
 def dns_cache():
     with clc as unit:
         unit.message("Cleaning up DNS cache")
-        unit.add(Command("sudo dscacheutil -flushcache"))
+
+        # Sudo may ask for password
+        unit.add(Command("sudo dscacheutil -flushcache").exclusive())
         unit.add(Command("sudo killall -HUP mDNSResponder"))
 
 
 def inactive_memory():
     with clc as unit:
         unit.message("Purging inactive memory")
-        unit.add(Command("sudo purge"))
+
+        # Sudo may ask for password
+        unit.add(Command("sudo purge").exclusive())
 
 
 def telegram():
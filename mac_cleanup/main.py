@@ -1,17 +1,19 @@
+from functools import cached_property
 from os import environ, statvfs
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
 
-from mac_cleanup.config import Config
-from mac_cleanup.console import console, print_panel
-from mac_cleanup.core import _Collector
 from mac_cleanup.error_handling import catch_exception
-from mac_cleanup.parser import args
-from mac_cleanup.utils import bytes_to_human
+from mac_cleanup.parser import args, parser
+
+# Heavy modules are imported on the code paths using them, so --help doesn't wait for them
+if TYPE_CHECKING:
+    from mac_cleanup.core import _Collector
+    from mac_cleanup.core_modules import BaseModule
 
 
 class EntryPoint:
     config_path: Path
-    base_collector: _Collector
 
     def __init__(self):
         if (config_home := environ.get("XDG_CONFIG_HOME")) is not None:
@@ -19,7 +21,13 @@ class EntryPoint:
         else:
             self.config_path = Path.home().joinpath(".mac_cleanup_py")
 
-        self.base_collector = _Collector()
+    @cached_property
+    def base_collector(self) -> "_Collector":
+        """Collector of the units (created on the first access)"""
+
+        from mac_cleanup.core import _Collector
+
+        return _Collector()
 
     @staticmethod
     def count_free_space() -> float:
@@ -28,30 +36,120 @@ class EntryPoint:
         stat = statvfs("/")
         return float(stat.f_bavail * stat.f_frsize)
 
+    @staticmethod
+    def _execute_modules(modules: Iterable["BaseModule"]) -> None:
+        """Executes modules in their order and prints removed size of the paths."""
+
+        from mac_cleanup.console import console
+        from mac_cleanup.core_modules import Command
+        from mac_cleanup.core_modules import Path as PathModule
+        from mac_cleanup.utils import bytes_to_human
+
+        for module in modules:
+            # Call for module execution
+            module._execute()  # noqa
+
+            # Warn about killed commands
+            if isinstance(module, Command) and (result := module.get_result) is not None and result.timed_out:
+                console.print(
+                    f"Command timed out after {result.duration:.0f}s and was killed:", result.command, style="danger"
+                )
+
+            # Print removed size of the path
+            if args.verbose and isinstance(module, PathModule) and (removed := module.get_removed) is not None:
+                console.print(bytes_to_human(removed.size), f"({removed.files} files)", module.get_path, no_wrap=True)
+
+    @staticmethod
+    def _print_policy_stats() -> None:
+        """Prints number of extended attributes read while checking paths."""
+
+        from mac_cleanup.console import console
+        from mac_cleanup.policy import get_policy
+
+        policy = get_policy()
+
+        console.print(
+            f"Extended attributes: {policy.get_reads - policy.get_dir_reads} read for {policy.get_checks} paths "
+            f"({policy.get_saved} reads saved), {policy.get_dir_reads} read for their directories"
+        )
+
     def cleanup(self) -> None:
         """Launch cleanup and print results."""
 
+        from mac_cleanup.console import print_panel
+        from mac_cleanup.core_modules import Path as PathModule
         from mac_cleanup.progress import ProgressBar
+        from mac_cleanup.reclaimer import get_reclaimer
+        from mac_cleanup.utils import bytes_to_human
 
         # Free space before the run
         free_space_before = self.count_free_space()
 
-        for unit in self.base_collector._execute_list:  # noqa
-            for module in ProgressBar.wrap_iter(unit.modules, description=unit.message, total=len(unit.modules)):
-                # Call for module execution
-                module._execute()  # noqa
+        try:
+            # Run independent units at the same time
+            if args.parallel_units:
+                from mac_cleanup.scheduler import Scheduler
+
+                # Units are streamed while modules are being registered
+                units = self.base_collector._iter_units() if args.stream else self.base_collector._execute_list  # noqa
+
+                with ProgressBar.shared():
+                    Scheduler(units).run(
+                        lambda unit: self._execute_modules(ProgressBar.track(unit.modules, description=unit.message))
+                    )
+            else:
+                for unit in self.base_collector._iter_units():  # noqa
+                    self._execute_modules(
+                        ProgressBar.wrap_iter(unit.modules, description=unit.message, total=len(unit.modules))
+                    )
+        # Reclaim staged paths (including ones left by interrupted runs) after the run
+        finally:
+            get_reclaimer().spawn()
 
         # Free space after the run
         free_space_after = self.count_free_space()
 
-        # Print results
-        print_panel(
-            text=f"Removed - [success]{bytes_to_human(free_space_after - free_space_before)}", title="[info]Success"
+        # Number of paths staged to be removed in background
+        staged = sum(
+            removed.staged
+            for unit in self.base_collector._execute_list  # noqa
+            for module in unit.modules
+            if isinstance(module, PathModule) and (removed := module.get_removed) is not None
         )
 
+        text = f"Removed - [success]{bytes_to_human(free_space_after - free_space_before)}"
+
+        if staged:
+            text += f"[/success]\nStaged - [success]{staged}[/success] paths are deleted in background"
+
+        # Print results
+        print_panel(text=text, title="[info]Success")
+
+        if args.verbose:
+            self._print_policy_stats()
+
+    @staticmethod
+    def _parse_args() -> None:
+        """Parses console arguments and applies the ones configuring shared runner."""
+
+        parser.parse_args(namespace=args)
+
+        # Limit commands running at the same time
+        if args.max_commands is not None:
+            from mac_cleanup.runner import runner
+
+            runner.set_max_concurrent(args.max_commands)
+
     @catch_exception
     def start(self) -> None:
-        """Start mac_cleanup_py by cleaning console, loading config and parsing argument."""
+        """Start mac_cleanup_py by parsing arguments, cleaning console and loading config."""
+
+        # Parse arguments before anything heavy is imported (--help and errors exit here)
+        self._parse_args()
+
+        from mac_cleanup.config import Config
+        from mac_cleanup.console import console, print_panel
+        from mac_cleanup.utils import bytes_to_human
 
         # Clear console at the start
         console.clear()
@@ -71,16 +169,41 @@ class EntryPoint:
         if args.dry_run:
             from rich.prompt import Confirm
 
-            estimate_size: float = 0
+            from mac_cleanup.scanner import ScanResult
+
+            estimate = ScanResult()
+
+            # Paths scanned partially due to time budget
+            incomplete_paths: list[Path] = list()
+
+            for path, result in self.base_collector._extract_paths():
+                if args.verbose and result.size:
+                    console.print(bytes_to_human(result.size), path, no_wrap=True)
+                if result.incomplete:
+                    incomplete_paths.append(path)
+                estimate.add(result)
+
+            freed_space = bytes_to_human(estimate.size)  # noqa
+            allocated_space = bytes_to_human(estimate.allocated)  # noqa
+
+            print_panel(
+                text=f"Approx [success]{freed_space}[/success] will be cleaned "
+                f"([success]{allocated_space}[/success] on disk)",
+                title="[info]Dry run results",
+            )
 
-            for path, size in self.base_collector._extract_paths():
-                if args.verbose and size:
-                    console.print(bytes_to_human(size), path, no_wrap=True)
-                estimate_size += size
+            if args.verbose:
+                self._print_policy_stats()
 
-            freed_space = bytes_to_human(estimate_size)  # noqa
+            # List paths with partial sizes
+            if incomplete_paths:
+                from rich.markup import escape
 
-            print_panel(text=f"Approx [success]{freed_space}[/success] will be cleaned", title="[info]Dry run results")
+                print_panel(
+                    text="[warning]Scan ran out of time, sizes are partial for:[/warning]\n"
+                    + "\n".join(escape(path.as_posix()) for path in incomplete_paths),
+                    title="[info]Incomplete scans",
+                )
 
             try:
                 continue_cleanup = Confirm.ask("Continue?", show_default=False, default="y")
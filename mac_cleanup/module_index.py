@@ -0,0 +1,121 @@
+"""Index of custom modules built with static scan of their files and cached on disk."""
+
+from functools import lru_cache
+from pathlib import Path as Path_
+from typing import TYPE_CHECKING, Any, Final, Iterator, Optional, final
+
+if TYPE_CHECKING:
+    from ast import stmt
+
+
+@final
+class ModuleIndex:
+    """
+    Maps custom modules (functions) to their files w/o executing the files.
+
+    Files are parsed into AST and their entries are cached by path, mtime and size, so only new and changed
+    files are parsed again.
+
+    :param cache_path: Path to the file with cached index
+    """
+
+    def __init__(self, cache_path: Path_):
+        self.cache_path: Final[Path_] = cache_path
+
+    @classmethod
+    def __iter_defs(cls, body: list["stmt"]) -> Iterator[str]:
+        """Yields names of functions defined at module level (including ones in if, try, and with blocks)"""
+
+        from ast import AsyncFunctionDef, FunctionDef, If, Try, With
+
+        for node in body:
+            if isinstance(node, FunctionDef | AsyncFunctionDef):
+                yield node.name
+            elif isinstance(node, If):
+                yield from cls.__iter_defs(node.body)
+                yield from cls.__iter_defs(node.orelse)
+            elif isinstance(node, Try):
+                for block in [node.body, *(handler.body for handler in node.handlers), node.orelse, node.finalbody]:
+                    yield from cls.__iter_defs(block)
+            elif isinstance(node, With):
+                yield from cls.__iter_defs(node.body)
+
+    @classmethod
+    def _scan_file(cls, file_path: Path_) -> Optional[list[str]]:
+        """
+        Gets names of modules defined in the file w/o executing it.
+
+        :param file_path: Path to the file with custom modules
+        :return: Names of modules in their order, None if file can't be parsed
+        """
+
+        from ast import parse
+
+        try:
+            tree = parse(file_path.read_bytes(), filename=file_path.as_posix())
+        except (OSError, SyntaxError, ValueError):
+            return None
+
+        return list(dict.fromkeys(cls.__iter_defs(tree.body)))
+
+    def build(self, root: Path_) -> dict[Path_, Optional[list[str]]]:
+        """
+        Indexes files of custom modules (new and changed files are parsed, cache is updated).
+
+        :param root: Directory with custom modules
+        :return: Names of modules by their files in order of the files (None for files, which can't be parsed)
+        """
+
+        from stat import S_ISREG
+
+        from mac_cleanup.probe import load_cache, save_cache
+
+        cached: dict[str, Any] = load_cache(self.cache_path)
+
+        # Entries of the files in the root (entries of removed files are dropped)
+        entries: dict[str, dict[str, Any]] = dict()
+
+        index: dict[Path_, Optional[list[str]]] = dict()
+
+        for file_path in root.rglob("*.py"):
+            try:
+                stat = file_path.stat()
+            # Broken symlinks are skipped
+            except OSError:
+                continue
+
+            # Directories named as modules aren't files of modules
+            if not S_ISREG(stat.st_mode):
+                continue
+
+            file_posix = file_path.as_posix()
+
+            # Cache may be changed outside, so entries are checked before use
+            entry: Optional[dict[str, Any]] = cached.get(file_posix)
+
+            # Parse new and changed files (and ones with broken entries)
+            if (
+                not isinstance(entry, dict)
+                or entry.get("mtime_ns") != stat.st_mtime_ns
+                or entry.get("size") != stat.st_size
+                or not isinstance(entry.get("modules"), list | None)
+            ):
+                entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "modules": self._scan_file(file_path)}
+
+            entries[file_posix] = entry
+            index[file_path] = entry["modules"]
+
+        # Write index only if something was changed
+        if entries != cached:
+            save_cache(self.cache_path, entries)
+
+        return index
+
+
+@lru_cache(maxsize=1)
+def get_module_index() -> ModuleIndex:
+    """Get index of custom modules cached next to probes (outside of caches removed by cleanup)"""
+
+    from mac_cleanup.probe import get_probe
+
+    return ModuleIndex(get_probe().cache_path.with_name("custom_modules.json"))
@@ -1,7 +1,7 @@
 """Console argument parser configuration."""
 
-from argparse import ArgumentParser, RawTextHelpFormatter
-from typing import final
+from argparse import ArgumentParser, ArgumentTypeError, RawTextHelpFormatter
+from typing import Optional, final
 
 import attr
 
@@ -17,6 +17,21 @@ class Args:
     custom_path: bool = attr.ib(default=False)
     force: bool = attr.ib(default=False)
     verbose: bool = attr.ib(default=False)
+    processes: bool = attr.ib(default=False)
+    parallel_delete: bool = attr.ib(default=False)
+    background_delete: bool = attr.ib(default=False)
+    parallel_units: bool = attr.ib(default=False)
+    stream: bool = attr.ib(default=False)
+    max_commands: Optional[int] = attr.ib(default=None)
+
+
+def _positive_int(value: str) -> int:
+    """Converts argument to positive integer."""
+
+    if not value.isdigit() or (number := int(value)) < 1:
+        raise ArgumentTypeError(f"{value!r} is not a positive integer")
+
+    return number
 
 
 parser = ArgumentParser(
@@ -40,11 +55,39 @@ parser.add_argument("-f", "--force", help="Accept all warnings", action="store_t
 
 parser.add_argument("-v", "--verbose", help="Print folders to be deleted", action="store_true")
 
+parser.add_argument("-P", "--processes", help="Scan dry run with processes instead of threads", action="store_true")
+
+parser.add_argument("-D", "--parallel-delete", help="Delete directories with multiple threads", action="store_true")
+
+parser.add_argument(
+    "-b", "--background-delete", help="Move paths aside and delete them in background", action="store_true"
+)
+
+parser.add_argument("-j", "--parallel-units", help="Run independent modules at the same time", action="store_true")
+
+parser.add_argument(
+    "-s", "--stream", help="Start scan or cleanup while modules are being registered", action="store_true"
+)
+
+parser.add_argument(
+    "-m",
+    "--max-commands",
+    help="Max number of commands running at the same time (4 by default)",
+    type=_positive_int,
+    metavar="N",
+)
+
+# Parsed on start of the entry point
 args = Args()
-parser.parse_args(namespace=args)
 
 # args.dry_run = True  # debug
 # args.configure = True  # debug
 # args.custom_path = True  # debug
 # args.force = True  # debug
 # args.verbose = True # debug
+# args.processes = True  # debug
+# args.parallel_delete = True  # debug
+# args.background_delete = True  # debug
+# args.parallel_units = True  # debug
+# args.stream = True  # debug
+# args.max_commands = 1  # debug
@@ -0,0 +1,283 @@
+"""Policy of protected paths (SIP, user folders, and additional ones from config) compiled once per run."""
+
+from functools import lru_cache
+from os import stat_result
+from os.path import dirname
+from typing import TYPE_CHECKING, Final, Optional, Sequence, final
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+# Paths protected by SIP
+_SIP_PATHS: Final[tuple[str, ...]] = ("/System", "/usr", "/sbin", "/Applications", "/Library", "/usr/local")
+
+# User folders
+_USER_PATHS: Final[tuple[str, ...]] = ("~/Documents", "~/Downloads", "~/Desktop", "~/Movies", "~/Pictures")
+
+# Extended attribute of paths protected by SIP (contents of directories are protected too)
+_ROOTLESS_XATTR: Final[str] = "com.apple.rootless"
+
+
+def _has_rootless(path_posix: str) -> bool:
+    """Checks if path has SIP attribute (missing paths don't have it)."""
+
+    from xattr import xattr  # pyright: ignore [reportMissingTypeStubs]
+
+    return _ROOTLESS_XATTR in xattr(path_posix)
+
+
+@final
+class _Node:
+    """Node of the trie of path components."""
+
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Final[dict[str, _Node]] = dict()
+        self.terminal: bool = False
+
+
+@final
+class Policy:
+    """
+    Checks if paths are deletable.
+
+    Protected roots are compiled into a trie of path components, so every path is matched in O(depth).
+    SIP attributes of directories are read once and inherited by their contents. Batches of matches
+    (:meth:`check_all`) are read per directory on a pool of threads and memoized by their inodes.
+
+    :param protected: Additional protected paths (user is expanded)
+    """
+
+    # Number of threads reading attributes of the batch
+    _MAX_READERS: Final[int] = 8
+
+    # Min number of attributes to be read in a batch before the pool is used
+    _MIN_PARALLEL_READS: Final[int] = 32
+
+    def __init__(self, *protected: str):
+        from threading import Lock
+
+        self.__root: Final = _Node()
+
+        # SIP protection of the checked directories
+        self.__rootless: Final[dict[str, bool]] = dict()
+
+        # SIP protection of the matches by their device and inode
+        self.__inodes: Final[dict[tuple[int, int], bool]] = dict()
+
+        # Pool reading attributes (started on the first big batch)
+        self.__executor: Optional["ThreadPoolExecutor"] = None
+
+        # Number of paths checked after the protected roots and number of attributes read (of paths and directories)
+        self.__checks: int = 0
+        self.__reads: int = 0
+        self.__dir_reads: int = 0
+        self.__lock: Final = Lock()
+
+        self.protect(*_SIP_PATHS, *_USER_PATHS, *protected)
+
+    @property
+    def get_checks(self) -> int:
+        """Get number of paths with attributes checked."""
+
+        return self.__checks
+
+    @property
+    def get_reads(self) -> int:
+        """Get number of attributes read (one syscall each)"""
+
+        return self.__reads
+
+    @property
+    def get_dir_reads(self) -> int:
+        """Get number of attributes read for parent directories of the checked paths."""
+
+        return self.__dir_reads
+
+    @property
+    def get_saved(self) -> int:
+        """Get number of checked paths w/o their own attributes read (e.g. inherited or read for hardlink)"""
+
+        return self.__checks - (self.__reads - self.__dir_reads)
+
+    @staticmethod
+    def __split(path_posix: str) -> list[str]:
+        """Splits path into components w/o empty and current directory ones."""
+
+        return [part for part in path_posix.split("/") if part and part != "."]
+
+    def protect(self, *paths: str) -> None:
+        """
+        Adds protected paths.
+
+        :param paths: Paths protected with their contents (user is expanded)
+        """
+
+        from mac_cleanup.utils import expanduser
+
+        for path_ in paths:
+            node = self.__root
+
+            for part in self.__split(expanduser(path_)):
+                node = node.children.setdefault(part, _Node())
+
+            node.terminal = True
+
+    def __is_protected(self, path_posix: str) -> bool:
+        """Checks if path or any of its parents is protected."""
+
+        # Relative paths aren't under protected roots
+        if not path_posix.startswith("/"):
+            return False
+
+        node = self.__root
+
+        for part in self.__split(path_posix):
+            if (child := node.children.get(part)) is None:
+                return False
+
+            if child.terminal:
+                return True
+
+            node = child
+
+        return False
+
+    def __read(self, paths: list[str], directories: bool = False) -> list[bool]:
+        """Reads SIP attributes of the paths (or of their parent directories)"""
+
+        with self.__lock:
+            self.__reads += len(paths)
+
+            if directories:
+                self.__dir_reads += len(paths)
+
+        return [_has_rootless(path_posix) for path_posix in paths]
+
+    def __is_rootless_dir(self, dir_posix: str) -> bool:
+        """Checks if directory or any of its parents is protected by SIP (once per directory)."""
+
+        # Relative paths stop at the current directory
+        if not dir_posix:
+            return False
+
+        if (rootless := self.__rootless.get(dir_posix)) is not None:
+            return rootless
+
+        parent = dirname(dir_posix)
+
+        rootless = (parent != dir_posix and self.__is_rootless_dir(parent)) or self.__read(
+            [dir_posix], directories=True
+        )[0]
+
+        self.__rootless[dir_posix] = rootless
+
+        return rootless
+
+    def __precheck(self, path_posix: str) -> Optional[bool]:
+        """Checks path w/o reading its own attributes :return: None if attributes need to be read."""
+
+        # Returns False if empty
+        if path_posix == ".":
+            return False
+
+        # If glob return True (it'll delete nothing at the end, hard to handle otherwise)
+        if "*" in path_posix:
+            return True
+
+        if self.__is_protected(path_posix):
+            return False
+
+        with self.__lock:
+            self.__checks += 1
+
+        if self.__is_rootless_dir(dirname(path_posix)):
+            return False
+
+        # Attributes of files aren't cached (directories may be already checked as parents)
+        if (rootless := self.__rootless.get(path_posix)) is not None:
+            return not rootless
+
+        return None
+
+    def is_deletable(self, path_posix: str) -> bool:
+        """
+        Checks if path is deletable.
+
+        :param path_posix: Path to be checked as a posix
+        :return: True if path isn't protected
+        """
+
+        if (deletable := self.__precheck(path_posix)) is not None:
+            return deletable
+
+        return not self.__read([path_posix])[0]
+
+    __call__ = is_deletable
+
+    def __read_batches(self, batches: list[list[str]]) -> list[list[bool]]:
+        """Reads attributes of the batches (on the pool if there are a lot of them)"""
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        if len(batches) < 2 or sum(map(len, batches)) < self._MIN_PARALLEL_READS:
+            return list(map(self.__read, batches))
+
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                    max_workers=self._MAX_READERS, thread_name_prefix="mac_cleanup_xattr"
+                )
+
+        return list(self.__executor.map(self.__read, batches))
+
+    def check_all(self, matches: Sequence[tuple[str, stat_result]]) -> list[bool]:
+        """
+        Checks if paths are deletable at once.
+
+        :param matches: Paths to be checked as a posix with their stats
+        :return: True for every path, which isn't protected
+        """
+
+        results: list[Optional[bool]] = [self.__precheck(path_posix) for path_posix, _ in matches]
+
+        # Indexes of unchecked paths by their inodes (hardlinks in different directories are read once)
+        inodes: dict[tuple[int, int], list[int]] = dict()
+
+        for index, (_, stat_) in enumerate(matches):
+            if results[index] is not None:
+                continue
+
+            key = (stat_.st_dev, stat_.st_ino)
+
+            if (rootless := self.__inodes.get(key)) is not None:
+                results[index] = not rootless
+                continue
+
+            inodes.setdefault(key, list()).append(index)
+
+        # Inodes grouped by directories of their first paths
+        batches: dict[str, list[tuple[int, int]]] = dict()
+
+        for key, indexes in inodes.items():
+            batches.setdefault(dirname(matches[indexes[0]][0]), list()).append(key)
+
+        # Read attributes of each inode once
+        paths = [[matches[inodes[key][0]][0] for key in batch] for batch in batches.values()]
+
+        for batch, rootless_list in zip(batches.values(), self.__read_batches(paths), strict=True):
+            for key, rootless in zip(batch, rootless_list, strict=True):
+                self.__inodes[key] = rootless
+
+                for index in inodes[key]:
+                    results[index] = not rootless
+
+        return [bool(result) for result in results]
+
+
+@lru_cache(maxsize=1)
+def get_policy() -> Policy:
+    """Get policy of the run."""
+
+    return Policy()
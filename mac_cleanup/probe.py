@@ -0,0 +1,215 @@
+"""Probes of the system used by modules on registration (executables, paths, and outputs of slow commands)."""
+
+from functools import lru_cache
+from os import environ
+from pathlib import Path as Path_
+from threading import Lock
+from typing import Any, Final, Iterable, Optional, final
+
+
+def get_cache_dir() -> Path_:
+    """Get cache directory of mac_cleanup_py (in data directory, so it isn't removed with ~/Library/Caches)"""
+
+    from mac_cleanup.reclaimer import get_data_dir
+
+    return get_data_dir().joinpath("cache")
+
+
+def load_cache(cache_path: Path_) -> dict[str, Any]:
+    """
+    Loads JSON cache.
+
+    :param cache_path: Path to the cache
+    :return: Cached dict, empty one if cache is missing or broken
+    """
+
+    from json import JSONDecodeError, loads
+
+    try:
+        cache = loads(cache_path.read_text())
+    except (OSError, UnicodeDecodeError, JSONDecodeError):
+        return dict()
+
+    return cache if isinstance(cache, dict) else dict()  # pyright: ignore [reportUnknownVariableType]
+
+
+def save_cache(cache_path: Path_, cache: dict[str, Any]) -> None:
+    """
+    Atomically replaces JSON cache (cache is skipped if it can't be written).
+
+    :param cache_path: Path to the cache
+    :param cache: Dict to be cached
+    """
+
+    from json import dumps
+    from os import replace
+    from tempfile import NamedTemporaryFile
+
+    tmp_path: Optional[Path_] = None
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with NamedTemporaryFile("w", dir=cache_path.parent, prefix=cache_path.name, suffix=".tmp", delete=False) as f:
+            tmp_path = Path_(f.name)
+            f.write(dumps(cache))
+
+        replace(tmp_path, cache_path)
+    except OSError:
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+
+
+@final
+class Probe:
+    """
+    Resolves executables with an index of PATH, memoizes existence of paths within the run, and keeps
+    outputs of slow commands on disk.
+
+    Cached output is used until its executable or environment is changed (e.g. upgraded) or TTL expires.
+
+    :param cache_path: Path to the file with cached outputs
+    """
+
+    # Time (in seconds) cached outputs are valid for
+    _TTL: Final[float] = 24 * 60 * 60
+
+    def __init__(self, cache_path: Path_):
+        self.cache_path: Final[Path_] = cache_path
+
+        self.__lock: Final = Lock()
+
+        # Candidates of executables by their names (with PATH the index was built for)
+        self.__index: Optional[tuple[str, dict[str, list[str]]]] = None
+
+        # Existence of paths checked during the run
+        self.__exists: Final[dict[str, bool]] = dict()
+
+        # Cached outputs of the commands (loaded on first access)
+        self.__outputs: Optional[dict[str, dict[str, Any]]] = None
+
+    @staticmethod
+    def __build_index(path_env: str) -> dict[str, list[str]]:
+        """Lists directories of PATH once (earlier directories go first)."""
+
+        from os import scandir
+
+        index: dict[str, list[str]] = dict()
+
+        for directory in path_env.split(":"):
+            try:
+                with scandir(directory or ".") as entries:
+                    for entry in entries:
+                        index.setdefault(entry.name, list()).append(entry.path)
+            # Missing directories are skipped as by shell
+            except OSError:
+                continue
+
+        return index
+
+    def which(self, name: str) -> Optional[str]:
+        """
+        Resolves executable like :func:`shutil.which` w/o listing PATH for every name.
+
+        :param name: Name of the executable
+        :return: Path to the executable or None if it wasn't found
+        """
+
+        from os import R_OK, X_OK, access
+        from os.path import isfile
+
+        # Paths aren't looked up in PATH
+        if "/" in name:
+            candidates = [name]
+        else:
+            path_env = environ.get("PATH", "")
+
+            with self.__lock:
+                # Rebuild index if PATH was changed
+                if self.__index is None or self.__index[0] != path_env:
+                    self.__index = (path_env, self.__build_index(path_env))
+
+                candidates = self.__index[1].get(name, list())
+
+        # Directories and files w/o permissions aren't executables
+        return next(
+            (candidate for candidate in candidates if isfile(candidate) and access(candidate, R_OK | X_OK)), None
+        )
+
+    def exists(self, path_: Path_) -> bool:
+        """
+        Checks if path exists (once per run).
+
+        :param path_: Path to be checked
+        :return: True if specified path exists
+        """
+
+        key = path_.as_posix()
+
+        # Don't hold the lock on slow file systems
+        if (exists := self.__exists.get(key)) is None:
+            exists = self.__exists.setdefault(key, path_.exists())
+
+        return exists
+
+    def __load(self) -> dict[str, dict[str, Any]]:
+        """Loads cached outputs (cache is rebuilt if it's missing or broken)"""
+
+        if self.__outputs is None:
+            self.__outputs = load_cache(self.cache_path)
+
+        return self.__outputs
+
+    def output(self, command: str, *, ttl: Optional[float | int] = None, env: Iterable[str] = ()) -> str:
+        """
+        Gets output of the command from cache or executes it.
+
+        :param command: Simple command (its first word is the executable)
+        :param ttl: Time (in seconds) cached output is valid for
+        :param env: Names of environment variables the output depends on
+        :return: stdout of the command
+        """
+
+        from shlex import split
+        from time import time
+
+        from mac_cleanup.utils import cmd
+
+        # Executable isn't installed
+        if (executable := self.which(split(command)[0])) is None:
+            return ""
+
+        # Changed executables and environment may output something else
+        stat = Path_(executable).stat()
+        key = f"{executable}:{stat.st_mtime_ns}:{stat.st_size}:{[(name, environ.get(name)) for name in env]!r}"
+
+        with self.__lock:
+            cached = self.__load().get(command)
+
+        if (
+            cached is not None
+            and cached.get("key") == key
+            and 0 <= time() - cached.get("time", 0) < (self._TTL if ttl is None else ttl)
+        ):
+            return cached.get("output", "")
+
+        output = cmd(command)
+
+        # Failed commands aren't cached
+        if not output:
+            return output
+
+        with self.__lock:
+            outputs = self.__load()
+            outputs[command] = {"key": key, "time": time(), "output": output}
+
+            save_cache(self.cache_path, outputs)
+
+        return output
+
+
+@lru_cache(maxsize=1)
+def get_probe() -> Probe:
+    """Get probe with the user's cache directory."""
+
+    return Probe(get_cache_dir().joinpath("probes.json"))
@@ -1,12 +1,14 @@
 """Modified rich progress bar."""
 
-from typing import Iterable, Optional, Sequence
+from contextlib import contextmanager
+from typing import Callable, Final, Generator, Iterable, Optional, Sequence
 
 from rich.progress import (
     BarColumn,
     Progress,
     ProgressType,
     SpinnerColumn,
+    TaskID,
     TaskProgressColumn,
     TextColumn,
     TimeElapsedColumn,
@@ -20,7 +22,15 @@ from mac_cleanup.console import console, print_panel
 class _ProgressBar:
     """Proxy rich progress bar with blocking prompt."""
 
+    # Max length of the status shown next to description
+    _MAX_STATUS: Final[int] = 60
+
     def __init__(self):
+        from threading import local
+
+        # Task of the current thread
+        self.__local: Final = local()
+
         # Call parent init w/ default stuff
         self.current_progress = Progress(
             SpinnerColumn(),
@@ -83,6 +93,65 @@ class _ProgressBar:
         # Return user answer
         return answer
 
+    def __track(
+        self, sequence: Iterable[ProgressType], total: Optional[float], description: str, remove: bool
+    ) -> Iterable[ProgressType]:
+        """
+        Tracks sequence as a task, which receives :meth:`status` of the current thread.
+
+        :param sequence: Sequence you wish to iterate over.
+        :param total: Total number of steps.
+        :param description: Description of task show next to progress bar.
+        :param remove: Remove task once finished
+        :return: An iterable of the values in the sequence
+        """
+
+        task_id = self.current_progress.add_task(description, total=total)
+
+        self.__local.task = (task_id, description)
+
+        try:
+            for value in sequence:
+                yield value
+
+                # Reset status of the previous step
+                self.current_progress.update(task_id, advance=1, description=description)
+        finally:
+            self.__local.task = None
+
+            if remove:
+                self.current_progress.remove_task(task_id)
+
+    def __show_status(self, task: tuple[TaskID, str], text: str) -> None:
+        """Shows status next to description of the task."""
+
+        from rich.markup import escape
+
+        task_id, description = task
+
+        self.current_progress.update(task_id, description=f"{description} [dim]{escape(text[: self._MAX_STATUS])}")
+
+    def status(self, text: str) -> None:
+        """
+        Shows status (e.g. last line of command output) next to description of the current thread's task.
+
+        :param text: Status to be shown
+        """
+
+        if (task := getattr(self.__local, "task", None)) is not None:
+            self.__show_status(task, text)
+
+    @property
+    def get_sink(self) -> Optional[Callable[[str], None]]:
+        """Get sink showing statuses in the current thread's task (from any thread), None if there is no task."""
+
+        from functools import partial
+
+        if (task := getattr(self.__local, "task", None)) is None:
+            return None
+
+        return partial(self.__show_status, task)
+
     def wrap_iter(
         self,
         sequence: Iterable[ProgressType] | Sequence[ProgressType],
@@ -98,6 +167,8 @@ class _ProgressBar:
         :return: An iterable of the values in the sequence
         """
 
+        from operator import length_hint
+
         # Clear previous Live instance
         self.current_progress.console.clear_live()
 
@@ -106,7 +177,33 @@ class _ProgressBar:
 
         # Call context manager and yield from it
         with self.current_progress:
-            yield from self.current_progress.track(sequence, total=total, description=description)
+            yield from self.__track(
+                sequence, total=total or float(length_hint(sequence)) or None, description=description, remove=False
+            )
+
+    @contextmanager
+    def shared(self) -> Generator[None, None, None]:
+        """Shows single progress bar for sequences tracked at the same time with :meth:`track`"""
+
+        # Clear previous Live instance
+        self.current_progress.console.clear_live()
+
+        # Get new progress instance with default stuff
+        self.__init__()
+
+        with self.current_progress:
+            yield
+
+    def track(self, sequence: Sequence[ProgressType], description: str = "Working...") -> Iterable[ProgressType]:
+        """
+        Tracks sequence as a separate task of the shared progress bar (task is removed once finished)
+
+        :param sequence: Sequence you wish to iterate over.
+        :param description: Description of task show next to progress bar. Defaults to "Working".
+        :return: An iterable of the values in the sequence
+        """
+
+        return self.__track(sequence, total=len(sequence), description=description, remove=True)
 
 
 # ProgressBar instance for all project
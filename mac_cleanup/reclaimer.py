@@ -0,0 +1,394 @@
+"""Background cleanup: paths are renamed into staging directories and removed after the run."""
+
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import count
+from os import close, environ, fsync, replace
+from pathlib import Path as Path_
+from threading import Lock
+from typing import Final, Generator, Iterable, Optional, final
+
+from mac_cleanup.remover import _DIR_FLAGS, RemoveResult, remove_entry  # noqa
+
+# Staging directory on volumes w/o data directory
+_STAGING_NAME: Final[str] = ".mac_cleanup_py-staging"
+
+# Prefix of staging directories of the runs
+_RUN_PREFIX: Final[str] = "run-"
+
+
+def get_data_dir() -> Path_:
+    """Get data directory of mac_cleanup_py (for journal and staging on the home volume)."""
+
+    if (data_home := environ.get("XDG_DATA_HOME")) is not None:
+        return Path_(data_home).expanduser().joinpath("mac_cleanup_py")
+
+    return Path_.home().joinpath("Library", "Application Support", "mac_cleanup_py")
+
+
+@final
+class Journal:
+    """
+    List of staging roots with data to be reclaimed.
+
+    Journal is locked on every access, so runs and background reclaimers can share it.
+    File is removed once the list is empty.
+
+    :param path_: Path to the journal file
+    """
+
+    def __init__(self, path_: Path_):
+        self.path: Final[Path_] = path_
+
+    def __read(self) -> list[str]:
+        """Reads roots from the journal."""
+
+        try:
+            return self.path.read_text().splitlines()
+        except FileNotFoundError:
+            return list()
+
+    def __write(self, roots: list[str]) -> None:
+        """Atomically replaces the journal with the roots."""
+
+        if not roots:
+            self.path.unlink(missing_ok=True)
+            return
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+
+        with tmp_path.open("w") as f:
+            f.write("\n".join(roots) + "\n")
+            f.flush()
+            fsync(f.fileno())
+
+        replace(tmp_path, self.path)
+
+    @contextmanager
+    def locked(self) -> Generator[list[str], None, None]:
+        """Locks the journal :return: Roots of the journal, changes are saved on exit w/o errors."""
+
+        from fcntl import LOCK_EX, flock
+        from os import O_CLOEXEC, O_CREAT, O_RDWR
+        from os import open as os_open
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        lock_fd = os_open(self.path.with_name(self.path.name + ".lock"), O_RDWR | O_CREAT | O_CLOEXEC, 0o600)
+
+        try:
+            flock(lock_fd, LOCK_EX)
+
+            roots = self.__read()
+            saved = list(roots)
+
+            yield roots
+
+            if roots != saved:
+                self.__write(roots)
+        # Lock is released with the descriptor
+        finally:
+            close(lock_fd)
+
+
+@final
+class _Run:
+    """Locked staging directory of the current run on the volume."""
+
+    __slots__ = ("fd", "path", "names")
+
+    def __init__(self, fd: int, path_posix: str):
+        self.fd: Final[int] = fd
+        self.path: Final[str] = path_posix
+
+        # Unique names of staged entries
+        self.names: Final = count()
+
+
+def _lock_dir(dir_posix: str, blocking: bool) -> Optional[int]:
+    """
+    Opens and locks directory, so reclaimers skip it.
+
+    :param dir_posix: Path to the directory as a posix
+    :param blocking: Wait for the lock
+    :return: Descriptor holding the lock or None if directory is locked by someone else
+    """
+
+    from fcntl import LOCK_EX, LOCK_NB, flock
+    from os import open as os_open
+
+    fd = os_open(dir_posix, _DIR_FLAGS)
+
+    try:
+        flock(fd, LOCK_EX if blocking else LOCK_EX | LOCK_NB)
+    except BlockingIOError:
+        close(fd)
+        return None
+
+    return fd
+
+
+@final
+class Reclaimer:
+    """
+    Stages paths for removal and reclaims their space in background.
+
+    Paths are renamed into a staging directory on their volume (O(1) per path), which is locked by the run.
+    Staging roots are written to the journal before anything is renamed into them, so interrupted
+    reclaims are resumed by the next run and staged data is never left behind.
+
+    :param data_dir: Directory for the journal and staging on its volume
+    """
+
+    def __init__(self, data_dir: Path_):
+        self.__data_dir: Final[Path_] = data_dir
+        self.journal: Final[Journal] = Journal(data_dir.joinpath("journal"))
+
+        # Staging directories of the current run by device (None if volume can't be staged)
+        self.__runs: Final[dict[int, Optional[_Run]]] = dict()
+
+        # Units may stage paths at the same time
+        self.__lock: Final = Lock()
+
+    def __find_root(self, dev: int, path_posix: str) -> Path_:
+        """
+        Finds staging root on the volume of the path.
+
+        :param dev: Device of the path
+        :param path_posix: Path to be staged as a posix
+        :return: Data directory's staging or top directory of the volume
+        """
+
+        from os import stat
+
+        # Closest existing parent of data directory
+        data_parent = next(parent for parent in [self.__data_dir, *self.__data_dir.parents] if parent.exists())
+
+        if stat(data_parent).st_dev == dev:
+            return self.__data_dir.joinpath("staging")
+
+        from mac_cleanup.scanner import _lstat  # noqa
+
+        # Go up until the volume changes
+        top = Path_(path_posix).parent
+
+        for parent in top.parents:
+            if (stat_ := _lstat(parent.as_posix())) is None or stat_.st_dev != dev:
+                break
+
+            top = parent
+
+        return top.joinpath(_STAGING_NAME)
+
+    def __get_run(self, dev: int, path_posix: str) -> Optional[_Run]:
+        """Gets staging directory of the run on the volume and creates it on first use."""
+
+        with self.__lock:
+            if dev not in self.__runs:
+                self.__runs[dev] = self.__create_run(dev, path_posix)
+
+            return self.__runs[dev]
+
+    def __create_run(self, dev: int, path_posix: str) -> Optional[_Run]:
+        """Creates and locks staging directory of the run :return: None if volume can't be staged."""
+
+        from tempfile import mkdtemp
+
+        root = self.__find_root(dev, path_posix)
+
+        try:
+            # Run directory is created and locked under the journal lock, so reclaimers can't take it
+            with self.journal.locked() as roots:
+                if root.as_posix() not in roots:
+                    roots.append(root.as_posix())
+
+                root.mkdir(parents=True, exist_ok=True)
+                run_posix = mkdtemp(prefix=_RUN_PREFIX, dir=root)
+
+                if (fd := _lock_dir(run_posix, blocking=True)) is not None:
+                    return _Run(fd=fd, path_posix=run_posix)
+        # Volume is read-only or not writable by user
+        except OSError:
+            pass
+
+        return None
+
+    def stage(self, path_posix: str, result: RemoveResult, count_size: bool = True, parallel: bool = False) -> None:
+        """
+        Moves path into staging or removes it in place, if path can't be moved.
+
+        :param path_posix: Path to be removed as a posix
+        :param result: Result to be updated
+        :param count_size: Count size of files removed in place
+        :param parallel: Remove directories in place with :class:`mac_cleanup.remover.ParallelRemover`
+        """
+
+        from os import rename
+
+        from mac_cleanup.scanner import _lstat  # noqa
+
+        # Skip non-existent paths
+        if (stat_ := _lstat(path_posix)) is None:
+            return
+
+        if (run := self.__get_run(stat_.st_dev, path_posix)) is not None:
+            try:
+                rename(path_posix, f"{run.path}/{next(run.names)}")
+            # Skip already removed paths
+            except FileNotFoundError:
+                return
+            # Mount points, protected paths, and paths w/o write access to parent are removed in place
+            except OSError:
+                pass
+            else:
+                result.staged += 1
+                return
+
+        remove_entry(path_posix, result, count_size=count_size, parallel=parallel)
+
+    def stage_matches(self, paths: Iterable[str], count_size: bool = True, parallel: bool = False) -> RemoveResult:
+        """
+        Stages paths w/o expanding them.
+
+        :param paths: Paths to be removed as a posix
+        :param count_size: Count size of files removed in place
+        :param parallel: Remove directories in place with :class:`mac_cleanup.remover.ParallelRemover`
+        :return: Result of the staging
+        """
+
+        result = RemoveResult()
+
+        for path_posix in paths:
+            self.stage(path_posix, result, count_size=count_size, parallel=parallel)
+
+        return result
+
+    def release(self) -> None:
+        """Unlocks staging directories of the run, so they can be reclaimed."""
+
+        with self.__lock:
+            for run in self.__runs.values():
+                if run is not None:
+                    close(run.fd)
+
+            self.__runs.clear()
+
+    def __take_runs(self, result: RemoveResult) -> list[tuple[int, str]]:
+        """
+        Locks staging directories of finished runs in all journaled roots.
+
+        :param result: Result to be updated with errors
+        :return: Descriptors holding the locks with paths to the directories as a posix
+        """
+
+        from os import scandir
+
+        locked: list[tuple[int, str]] = list()
+
+        # Directories are locked under the journal lock, so new runs can't be taken
+        with self.journal.locked() as roots:
+            for root in list(roots):
+                try:
+                    with scandir(root) as entries:
+                        run_paths = [entry.path for entry in entries if entry.name.startswith(_RUN_PREFIX)]
+                # Drop removed roots
+                except FileNotFoundError:
+                    roots.remove(root)
+                    continue
+                except OSError as err:
+                    result.fail(root, err)
+                    continue
+
+                for run_path in run_paths:
+                    try:
+                        if (fd := _lock_dir(run_path, blocking=False)) is not None:
+                            locked.append((fd, run_path))
+                    except OSError as err:
+                        result.fail(run_path, err)
+
+        return locked
+
+    def reclaim(self) -> RemoveResult:
+        """
+        Removes staged data from all journaled roots, except directories of running stagings.
+
+        :return: Result of the removal
+        """
+
+        from os import rmdir
+
+        from mac_cleanup.remover import _remove_tree  # noqa
+
+        result = RemoveResult()
+
+        for fd, run_path in self.__take_runs(result):
+            try:
+                _remove_tree(run_path, result, count_size=False)
+            finally:
+                close(fd)
+
+        # Drop roots w/o staged data
+        with self.journal.locked() as roots:
+            for root in list(roots):
+                try:
+                    rmdir(root)
+                except FileNotFoundError:
+                    pass
+                # Root is used by another run
+                except OSError:
+                    continue
+
+                roots.remove(root)
+
+        return result
+
+    def spawn(self) -> bool:
+        """
+        Releases the run and starts reclaiming in a detached low-priority process.
+
+        :return: True if process was started
+        """
+
+        from subprocess import DEVNULL, Popen
+        from sys import executable
+
+        self.release()
+
+        # Nothing is staged
+        if not self.journal.path.exists():
+            return False
+
+        # Process outlives the run, so interrupted reclaims are continued by the next one
+        Popen(
+            [executable, "-m", "mac_cleanup.reclaimer"],
+            stdin=DEVNULL,
+            stdout=DEVNULL,
+            stderr=DEVNULL,
+            start_new_session=True,
+        )
+
+        return True
+
+
+@lru_cache(maxsize=1)
+def get_reclaimer() -> Reclaimer:
+    """Get reclaimer of the user's data directory."""
+
+    return Reclaimer(get_data_dir())
+
+
+def _lower_priority() -> None:
+    """Lowers CPU and disk I/O priority of the current process."""
+
+    import os
+
+    os.nice(19)
+
+    # Background QoS throttles disk I/O on macOS (Python 3.12+)
+    if hasattr(os, "PRIO_DARWIN_BG"):
+        os.setpriority(os.PRIO_DARWIN_PROCESS, 0, os.PRIO_DARWIN_BG)
+
+
+if __name__ == "__main__":
+    _lower_priority()  # pragma: no cover (runs in detached process)
+    get_reclaimer().reclaim()  # pragma: no cover
@@ -0,0 +1,452 @@
+"""Deletion engine for cleanup."""
+
+from os import O_CLOEXEC, O_DIRECTORY, O_NOFOLLOW, O_RDONLY, DirEntry, close
+from os import open as os_open
+from os import rmdir, scandir, unlink
+from pathlib import Path as Path_
+from stat import S_ISDIR
+from threading import Lock
+from typing import Callable, Final, Iterable, Iterator, Optional, final
+
+import attr
+
+# Flags for opening directories w/o following symlinks
+_DIR_FLAGS: Final[int] = O_RDONLY | O_DIRECTORY | O_NOFOLLOW | O_CLOEXEC
+
+
+@final
+@attr.s(slots=True)
+class RemoveResult:
+    """Apparent size and number of removed files, number of staged paths, and errors of the removal."""
+
+    size: int = attr.ib(default=0)
+    files: int = attr.ib(default=0)
+    staged: int = attr.ib(default=0)
+    errors: list[str] = attr.ib(factory=list[str])
+
+    def add(self, other: "RemoveResult") -> None:
+        """Adds other result to the current one."""
+
+        self.size += other.size
+        self.files += other.files
+        self.staged += other.staged
+        self.errors.extend(other.errors)
+
+    def fail(self, path_posix: str, err: OSError) -> None:
+        """Adds error of the path."""
+
+        self.errors.append(f"{path_posix}: {err.strerror}")
+
+
+def _join(parent: str, name: str) -> str:
+    """Joins directory path as a posix with the name."""
+
+    return f"{parent.rstrip('/')}/{name}"
+
+
+def _list(dir_fd: int, dir_posix: str, result: RemoveResult) -> Iterator["DirEntry[str]"]:
+    """
+    Lists directory before its entries are removed.
+
+    Entries are taken at once, as removing them during listing may skip some entries on macOS.
+
+    :param dir_fd: Descriptor of the directory
+    :param dir_posix: Path to the directory as a posix (for errors)
+    :param result: Result to be updated
+    :return: Entries of the directory
+    """
+
+    try:
+        with scandir(dir_fd) as dir_iterator:
+            return iter(list(dir_iterator))
+    except OSError as err:
+        result.fail(dir_posix, err)
+        return iter(())
+
+
+# Open directory with its entries, path as a posix, and name in the parent directory
+_Frame = tuple[int, Iterator["DirEntry[str]"], str, str]
+
+
+def _remove_entry_at(
+    dir_fd: int, entry: "DirEntry[str]", dir_posix: str, result: RemoveResult, count_size: bool
+) -> Optional[_Frame]:
+    """
+    Removes file or symlink relative to the directory descriptor.
+
+    :param dir_fd: Descriptor of the parent directory
+    :param entry: Entry to be removed
+    :param dir_posix: Path to the parent directory as a posix (for errors)
+    :param result: Result to be updated
+    :param count_size: Count size of removed files (costs a stat per file)
+    :return: Frame of the opened directory if entry is a directory (it's removed after its contents)
+    """
+
+    try:
+        # Directories are opened w/o following symlinks, so swapped entries can't lead outside the tree
+        if entry.is_dir(follow_symlinks=False):
+            entry_fd = os_open(entry.name, _DIR_FLAGS, dir_fd=dir_fd)
+            entry_posix = _join(dir_posix, entry.name)
+
+            return entry_fd, _list(entry_fd, entry_posix, result), entry_posix, entry.name
+
+        size = entry.stat(follow_symlinks=False).st_size if count_size else 0
+        unlink(entry.name, dir_fd=dir_fd)
+    # Skip already removed entries
+    except FileNotFoundError:
+        return None
+    except OSError as err:
+        result.fail(_join(dir_posix, entry.name), err)
+        return None
+
+    result.size += size
+    result.files += 1
+
+    return None
+
+
+def _remove_tree(dir_posix: str, result: RemoveResult, count_size: bool) -> None:
+    """
+    Removes directory with everything inside of it w/o following symlinks.
+
+    Walks with an explicit stack of open directories and removes entries with calls relative to their
+    descriptors, so no paths are resolved twice. Directories are removed after their contents.
+
+    :param dir_posix: Path to the directory as a posix
+    :param result: Result to be updated
+    :param count_size: Count size of removed files
+    """
+
+    try:
+        top_fd = os_open(dir_posix, _DIR_FLAGS)
+    except FileNotFoundError:
+        return
+    except OSError as err:
+        result.fail(dir_posix, err)
+        return
+
+    stack: list[_Frame] = [(top_fd, _list(top_fd, dir_posix, result), dir_posix, dir_posix)]
+
+    while stack:
+        dir_fd, entries, current_posix, name = stack[-1]
+
+        for entry in entries:
+            # Descend into directory and continue listing of the current one after it
+            if (frame := _remove_entry_at(dir_fd, entry, current_posix, result, count_size)) is not None:
+                stack.append(frame)
+                break
+        else:
+            stack.pop()
+            close(dir_fd)
+
+            # Remove directory from its parent (fails if something inside wasn't removed)
+            try:
+                if stack:
+                    rmdir(name, dir_fd=stack[-1][0])
+                else:
+                    rmdir(dir_posix)
+            except OSError as err:
+                result.fail(current_posix, err)
+
+
+@final
+class _DirTask:
+    """Directory being removed by parallel workers."""
+
+    __slots__ = ("parent", "name", "path", "fd", "pending", "lock")
+
+    def __init__(self, parent: Optional["_DirTask"], name: str, path_posix: str):
+        self.parent: Final[Optional[_DirTask]] = parent
+        self.name: Final[str] = name
+        self.path: Final[str] = path_posix
+
+        # Descriptor is kept open until the directory is removed
+        self.fd: Optional[int] = None
+
+        # Number of unfinished items (listing, chunks of files, and subdirectories)
+        self.pending: int = 1
+        self.lock: Final = Lock()
+
+
+# Work item: directory to be listed (w/o names) or chunk of its files to be unlinked
+_RemoveItem = tuple[_DirTask, Optional[list[str]]]
+
+
+@final
+class ParallelRemover:
+    """
+    Removes directory trees with pool of threads.
+
+    Subdirectories are fanned out to workers, and big directories are split into chunks of files.
+    Directory is removed by the worker, which finishes its last item, so trees are removed bottom-up.
+    Items are taken in LIFO order, so subtrees are finished before new ones are opened.
+
+    :param max_workers: Number of worker threads (capped, so filesystem isn't saturated)
+    :param count_size: Count size of removed files (costs a stat per file)
+    """
+
+    # Max number of workers, more threads only add contention in the filesystem
+    _MAX_WORKERS: Final[int] = 8
+
+    # Number of files unlinked in one work item
+    _CHUNK_SIZE: Final[int] = 1024
+
+    def __init__(self, max_workers: Optional[int] = None, count_size: bool = True):
+        from os import cpu_count
+        from threading import Condition
+
+        self.max_workers: Final[int] = min(max_workers or cpu_count() or 1, self._MAX_WORKERS)
+        self.__count_size: Final[bool] = count_size
+
+        # Pending items of the current tree
+        self.__items: Final[list[_RemoveItem]] = list()
+        self.__condition: Final = Condition()
+        self.__done: bool = False
+        self.__error: Optional[BaseException] = None
+
+    def __push(self, items: list[_RemoveItem]) -> None:
+        """Adds items and wakes up waiting workers."""
+
+        with self.__condition:
+            self.__items.extend(items)
+            self.__condition.notify(len(items))
+
+    def __pop(self) -> Optional[_RemoveItem]:
+        """Waits for the next item :return: Item or None if tree is removed."""
+
+        with self.__condition:
+            while not self.__items and not self.__done:
+                self.__condition.wait()
+
+            return None if self.__done else self.__items.pop()
+
+    def __stop(self, error: Optional[BaseException] = None) -> None:
+        """Stops all workers."""
+
+        with self.__condition:
+            self.__done = True
+            self.__error = self.__error or error
+            self.__condition.notify_all()
+
+    def __work(self, result: RemoveResult) -> None:
+        """Worker loop."""
+
+        try:
+            while (item := self.__pop()) is not None:
+                task, names = item
+
+                if names is None:
+                    self.__list(task, result)
+                else:
+                    self.__unlink(task, names, result)
+
+                self.__finish(task, result)
+        # Pass errors to the main thread
+        except BaseException as err:
+            self.__stop(err)
+
+    def __list(self, task: _DirTask, result: RemoveResult) -> None:
+        """Opens directory and queues its subdirectories and chunks of files."""
+
+        # Subdirectories are opened relative to their parents w/o following symlinks
+        try:
+            task.fd = (
+                os_open(task.name, _DIR_FLAGS, dir_fd=task.parent.fd) if task.parent else os_open(task.path, _DIR_FLAGS)
+            )
+        except FileNotFoundError:
+            return
+        except OSError as err:
+            result.fail(task.path, err)
+            return
+
+        subdirs: list[str] = list()
+        files: list[str] = list()
+
+        for entry in _list(task.fd, task.path, result):
+            try:
+                (subdirs if entry.is_dir(follow_symlinks=False) else files).append(entry.name)
+            except OSError as err:
+                result.fail(_join(task.path, entry.name), err)
+
+        chunks = [files[index : index + self._CHUNK_SIZE] for index in range(0, len(files), self._CHUNK_SIZE)]
+
+        # First chunk is unlinked by the current worker
+        items: list[_RemoveItem] = [(_DirTask(task, name, _join(task.path, name)), None) for name in subdirs]
+        items.extend((task, chunk) for chunk in chunks[1:])
+
+        with task.lock:
+            task.pending += len(items)
+
+        self.__push(items)
+
+        if chunks:
+            self.__unlink(task, chunks[0], result)
+
+    def __unlink(self, task: _DirTask, names: list[str], result: RemoveResult) -> None:
+        """Unlinks files of the directory."""
+
+        from os import stat
+
+        for name in names:
+            try:
+                size = stat(name, dir_fd=task.fd, follow_symlinks=False).st_size if self.__count_size else 0
+                unlink(name, dir_fd=task.fd)
+            # Skip already removed entries
+            except FileNotFoundError:
+                continue
+            except OSError as err:
+                result.fail(_join(task.path, name), err)
+                continue
+
+            result.size += size
+            result.files += 1
+
+    def __finish(self, task: Optional[_DirTask], result: RemoveResult) -> None:
+        """Finishes item of the directory and removes directories w/o pending items bottom-up."""
+
+        while task is not None:
+            with task.lock:
+                task.pending -= 1
+
+                if task.pending:
+                    return
+
+            # Remove opened directory from its parent (fails if something inside wasn't removed)
+            if task.fd is not None:
+                close(task.fd)
+
+                try:
+                    if task.parent is not None:
+                        rmdir(task.name, dir_fd=task.parent.fd)
+                    else:
+                        rmdir(task.path)
+                except OSError as err:
+                    result.fail(task.path, err)
+
+            # Top directory is removed
+            if task.parent is None:
+                self.__stop()
+
+            task = task.parent
+
+    def remove_tree(self, dir_posix: str) -> RemoveResult:
+        """
+        Removes directory with everything inside of it w/o following symlinks.
+
+        :param dir_posix: Path to the directory as a posix
+        :return: Result of the removal
+        """
+
+        from threading import Thread
+
+        # Reset state of the previous tree
+        self.__done, self.__error = False, None
+        self.__items.append((_DirTask(None, dir_posix, dir_posix), None))
+
+        results = [RemoveResult() for _ in range(self.max_workers)]
+        workers = [Thread(target=self.__work, args=(result,), daemon=True) for result in results]
+
+        for worker in workers:
+            worker.start()
+
+        try:
+            for worker in workers:
+                worker.join()
+        # Stop workers on interrupt
+        except KeyboardInterrupt:
+            self.__stop()
+            raise
+
+        if self.__error is not None:
+            raise self.__error
+
+        total = RemoveResult()
+
+        for result in results:
+            total.add(result)
+
+        return total
+
+
+def remove_entry(path_posix: str, result: RemoveResult, count_size: bool = True, parallel: bool = False) -> None:
+    """
+    Removes file, symlink or directory with everything inside of it.
+
+    :param path_posix: Path to be removed as a posix
+    :param result: Result to be updated
+    :param count_size: Count size of removed files (costs a stat per file)
+    :param parallel: Remove directory with :class:`ParallelRemover`
+    """
+
+    from mac_cleanup.scanner import _lstat  # noqa
+
+    # Skip non-existent paths
+    if (stat_ := _lstat(path_posix)) is None:
+        return
+
+    if S_ISDIR(stat_.st_mode) and parallel:
+        result.add(ParallelRemover(count_size=count_size).remove_tree(path_posix))
+        return
+
+    if S_ISDIR(stat_.st_mode):
+        _remove_tree(path_posix, result, count_size)
+        return
+
+    try:
+        unlink(path_posix)
+    except FileNotFoundError:
+        return
+    except OSError as err:
+        result.fail(path_posix, err)
+        return
+
+    result.size += stat_.st_size
+    result.files += 1
+
+
+def remove_matches(
+    paths: Iterable[str], count_size: bool = True, parallel: bool = False, background: bool = False
+) -> RemoveResult:
+    """
+    Removes paths w/o expanding them.
+
+    :param paths: Paths to be removed as a posix
+    :param count_size: Count size of removed files (can be skipped if it's known from dry run)
+    :param parallel: Remove directories with :class:`ParallelRemover`
+    :param background: Stage paths with :class:`mac_cleanup.reclaimer.Reclaimer` to be removed after the run
+    :return: Result of the removal
+    """
+
+    if background:
+        from mac_cleanup.reclaimer import get_reclaimer
+
+        return get_reclaimer().stage_matches(paths, count_size=count_size, parallel=parallel)
+
+    result = RemoveResult()
+
+    for path_posix in paths:
+        remove_entry(path_posix, result, count_size=count_size, parallel=parallel)
+
+    return result
+
+
+def remove(
+    path_: Path_, predicate: Optional[Callable[[str], bool]] = None, parallel: bool = False, background: bool = False
+) -> RemoveResult:
+    """
+    Expands the path into existing matches and removes them.
+
+    :param path_: Path to the file, directory or glob
+    :param predicate: Filter for matches (e.g. deletable ones), matches failing it are skipped
+    :param parallel: Remove directories with :class:`ParallelRemover`
+    :param background: Stage matches to be removed after the run
+    :return: Result of the removal
+    """
+
+    from mac_cleanup.scanner import _expand  # noqa
+
+    return remove_matches(
+        (match_posix for match_posix, _, _ in _expand(path_, predicate, deadline=None)),
+        parallel=parallel,
+        background=background,
+    )
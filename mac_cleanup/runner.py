@@ -0,0 +1,415 @@
+"""Runner of shell commands with streamed output, timeouts, and limited concurrency."""
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from typing import Any, Callable, Coroutine, Final, Iterable, Optional, TypeVar, final
+
+import attr
+
+T = TypeVar("T")
+
+
+@final
+@attr.s(slots=True)
+class CommandResult:
+    """Exit code, duration (in seconds), and output of the command (truncated to the last lines)."""
+
+    command: str = attr.ib()
+    exit_code: int = attr.ib()
+    duration: float = attr.ib()
+    output: str = attr.ib(default="")
+    truncated: bool = attr.ib(default=False)
+    timed_out: bool = attr.ib(default=False)
+
+
+# Characters with special meaning for the shell outside of quotes and inside of double quotes
+_SHELL_CHARS: Final[frozenset[str]] = frozenset("|&;<>()$`\\*?[]{}~#!\n")
+_DOUBLE_QUOTED_SHELL_CHARS: Final[frozenset[str]] = frozenset("$`\\")
+
+# Shell keywords and builtins w/o executables with the same behavior
+_SHELL_WORDS: Final[frozenset[str]] = frozenset(
+    {
+        *("!", "case", "do", "done", "elif", "else", "esac", "fi", "for", "if", "in", "then", "until", "while"),
+        *(".", ":", "alias", "bg", "break", "cd", "command", "continue", "declare", "echo", "eval", "exec", "exit"),
+        *("export", "fc", "fg", "getopts", "hash", "jobs", "let", "local", "printf", "read", "readonly", "return"),
+        *("set", "shift", "source", "times", "trap", "type", "typeset", "ulimit", "umask", "unalias", "unset", "wait"),
+    }
+)
+
+
+def _split_command(command: str) -> Optional[list[str]]:
+    """
+    Splits simple command into words.
+
+    :param command: Bash command
+    :return: Words or None if command needs shell (pipes, redirects, variables, globs, etc.)
+    """
+
+    from shlex import split
+
+    quote: Optional[str] = None
+
+    # Find special characters outside of single quotes
+    for char in command:
+        if quote is None and char in ("'", '"'):
+            quote = char
+        elif quote is None and char in _SHELL_CHARS:
+            return None
+        elif char == quote:
+            quote = None
+        elif quote == '"' and char in _DOUBLE_QUOTED_SHELL_CHARS:
+            return None
+
+    # Unterminated quotes are reported by shell
+    if quote is not None:
+        return None
+
+    return split(command) or None
+
+
+def _resolve_type(names: list[str], ignore_errors: bool) -> Optional[tuple[int, str]]:
+    """
+    Resolves executables like shell builtin "type" w/o starting shell (used by module probes).
+
+    :param names: Names of the executables
+    :param ignore_errors: If True, no errors in output
+    :return: Exit code with output or None if shell is needed (e.g. for builtins)
+    """
+
+    from mac_cleanup.probe import get_probe
+
+    if not names or any(name in _SHELL_WORDS for name in names):
+        return None
+
+    found: list[str] = list()
+    missing: list[str] = list()
+
+    for name in names:
+        if (path_ := get_probe().which(name)) is None:
+            missing.append(f"{name}: not found")
+        else:
+            found.append(f"{name} is {path_}")
+
+    output = "\n".join(found + ([] if ignore_errors else missing))
+
+    return (1 if missing else 0), output
+
+
+@final
+class _RingBuffer:
+    """Last lines of the stream limited by their total size."""
+
+    __slots__ = ("lines", "size", "max_size", "truncated")
+
+    def __init__(self, max_size: int):
+        self.lines: Final[deque[bytes]] = deque()
+        self.size: int = 0
+        self.max_size: Final[int] = max_size
+        self.truncated: bool = False
+
+    def append(self, line: bytes) -> None:
+        """Adds line and drops the oldest ones over the size limit."""
+
+        self.lines.append(line)
+        self.size += len(line)
+
+        # Lines are never longer than the limit of the stream
+        while self.size > self.max_size:
+            self.truncated = True
+            self.size -= len(self.lines.popleft())
+
+    def text(self) -> str:
+        """Decodes lines to stripped text."""
+
+        return b"".join(self.lines).decode("utf-8", errors="replace").strip()
+
+
+@final
+class CommandRunner:
+    """
+    Runs shell commands on asyncio event loop, so only limited number of them runs at the same time.
+
+    Event loop runs on its own thread started on the first command, so commands don't pay for a new loop.
+    Output is streamed line by line into bounded ring buffers and an optional sink (e.g. progress bar),
+    so long outputs aren't kept in memory. Commands with timeout are started in their own process group
+    (w/o controlling terminal), and the whole group is killed once the timeout expires.
+
+    :param max_concurrent: Max number of commands running at the same time
+    """
+
+    # Max number of commands running at the same time
+    _MAX_CONCURRENT: Final[int] = 4
+
+    # Max number of output bytes kept for each stream (longer lines are dropped)
+    _MAX_OUTPUT: Final[int] = 64 * 1024
+
+    # Time (in seconds) given to killed process group to release output pipes
+    _KILL_GRACE_PERIOD: Final[float] = 1.0
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        from threading import BoundedSemaphore, Lock
+
+        self.max_concurrent: int = max_concurrent or self._MAX_CONCURRENT
+        self.__slots = BoundedSemaphore(self.max_concurrent)
+
+        # Event loop of the runner thread (started on the first command)
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__loop_lock: Final = Lock()
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        """
+        Sets max number of commands running at the same time (e.g. from console arguments).
+
+        Running commands keep their slots, so the limit is applied to the commands started later.
+
+        :param max_concurrent: Max number of commands running at the same time
+        """
+
+        from threading import BoundedSemaphore
+
+        self.max_concurrent = max_concurrent
+        self.__slots = BoundedSemaphore(max_concurrent)
+
+    def __get_loop(self) -> asyncio.AbstractEventLoop:
+        """Gets event loop running on the runner thread (thread is started on the first call)"""
+
+        with self.__loop_lock:
+            if self.__loop is None:
+                from threading import Thread
+
+                self.__loop = asyncio.new_event_loop()
+
+                # Daemon thread, so running loop doesn't block exit
+                Thread(target=self.__loop.run_forever, name="mac_cleanup_runner", daemon=True).start()
+
+            return self.__loop
+
+    def __wait(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Runs coroutine on the runner thread and waits for its result."""
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.__get_loop())
+
+        try:
+            return future.result()
+        # Interrupted commands are cancelled (and killed if they are detached)
+        except BaseException:
+            future.cancel()
+            raise
+
+    @staticmethod
+    def __kill(process: asyncio.subprocess.Process) -> None:
+        """Kills process group of the process started in its own process group."""
+
+        from os import killpg
+        from signal import SIGKILL
+
+        # Group is already gone
+        with suppress(ProcessLookupError):
+            killpg(process.pid, SIGKILL)
+
+    @staticmethod
+    async def __read(
+        stream: Optional[asyncio.StreamReader], buffer: _RingBuffer, sink: Optional[Callable[[str], None]]
+    ) -> None:
+        """Streams lines into the buffer and the sink."""
+
+        if stream is None:
+            return
+
+        while True:
+            try:
+                line = await stream.readline()
+            # Line over the limit is dropped
+            except ValueError:
+                buffer.truncated = True
+                continue
+
+            if not line:
+                return
+
+            buffer.append(line)
+
+            if sink is not None:
+                sink(line.decode("utf-8", errors="replace").rstrip())
+
+    @staticmethod
+    def __prepare(command: str | list[str], ignore_errors: bool) -> list[str] | CommandResult:
+        """
+        Chooses how the command is executed.
+
+        :param command: Bash command or arguments
+        :param ignore_errors: If True, no errors in output
+        :return: Arguments to be executed or result of resolved "type"
+        """
+
+        from time import perf_counter
+
+        if isinstance(command, list):
+            return command
+
+        if (argv := _split_command(command)) is None:
+            return ["/bin/sh", "-c", command]
+
+        start = perf_counter()
+
+        # Module probes don't need shell to find executables
+        if argv[0] == "type" and (resolved := _resolve_type(argv[1:], ignore_errors)) is not None:
+            return CommandResult(
+                command=command, exit_code=resolved[0], duration=perf_counter() - start, output=resolved[1]
+            )
+
+        # Variable assignments and builtins need shell
+        if "=" in argv[0] or argv[0] in _SHELL_WORDS:
+            return ["/bin/sh", "-c", command]
+
+        return argv
+
+    async def run_async(
+        self,
+        command: str | list[str],
+        *,
+        ignore_errors: bool = True,
+        timeout: Optional[float] = None,
+        sink: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """
+        Runs command on the current event loop and waits for its completion.
+
+        Simple commands and arguments are executed directly, other commands are executed with shell.
+
+        :param command: Bash command or arguments
+        :param ignore_errors: If True, no stderr in output
+        :param timeout: Time (in seconds) before the command is killed, waits forever if not specified
+        :param sink: Receives every line of the output
+        :return: Result of the command
+        """
+
+        if isinstance(argv := self.__prepare(command, ignore_errors), CommandResult):
+            return argv
+
+        return await self.__execute(command, argv, ignore_errors=ignore_errors, timeout=timeout, sink=sink)
+
+    async def __execute(
+        self,
+        command: str | list[str],
+        argv: list[str],
+        *,
+        ignore_errors: bool,
+        timeout: Optional[float],
+        sink: Optional[Callable[[str], None]],
+    ) -> CommandResult:
+        """Runs prepared arguments of the command on the current event loop and waits for its completion."""
+
+        from asyncio.subprocess import DEVNULL, PIPE
+        from shlex import join
+        from time import perf_counter
+
+        start = perf_counter()
+        timed_out = False
+
+        command_str = join(command) if isinstance(command, list) else command
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=PIPE,
+                stderr=(DEVNULL if ignore_errors else PIPE),
+                start_new_session=timeout is not None,
+                limit=self._MAX_OUTPUT,
+            )
+        # Report missing executables as shell does
+        except (FileNotFoundError, PermissionError) as err:
+            return CommandResult(
+                command=command_str,
+                exit_code=127 if isinstance(err, FileNotFoundError) else 126,
+                duration=perf_counter() - start,
+                output="" if ignore_errors else f"{argv[0]}: {err.strerror}",
+            )
+
+        buffers = (_RingBuffer(self._MAX_OUTPUT), _RingBuffer(self._MAX_OUTPUT))
+        readers = asyncio.gather(
+            self.__read(process.stdout, buffers[0], sink), self.__read(process.stderr, buffers[1], sink)
+        )
+
+        try:
+            await asyncio.wait_for(asyncio.shield(readers), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            self.__kill(process)
+
+            # Pipes may be held by processes, which left the group
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(readers, self._KILL_GRACE_PERIOD)
+        # Detached commands don't receive terminal interrupts
+        except BaseException:
+            if timeout is not None:
+                self.__kill(process)
+            raise
+
+        exit_code = await process.wait()
+
+        return CommandResult(
+            command=command_str,
+            exit_code=exit_code,
+            duration=perf_counter() - start,
+            output="".join(buffer.text() for buffer in buffers),
+            truncated=any(buffer.truncated for buffer in buffers),
+            timed_out=timed_out,
+        )
+
+    def run(
+        self,
+        command: str | list[str],
+        *,
+        ignore_errors: bool = True,
+        timeout: Optional[float] = None,
+        sink: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """
+        Runs command on the event loop of the runner and waits for its completion.
+
+        :param command: Bash command or arguments
+        :param ignore_errors: If True, no stderr in output
+        :param timeout: Time (in seconds) before the command is killed, waits forever if not specified
+        :param sink: Receives every line of the output
+        :return: Result of the command
+        """
+
+        # Resolved "type" doesn't wait for a free slot
+        if isinstance(argv := self.__prepare(command, ignore_errors), CommandResult):
+            return argv
+
+        with self.__slots:
+            return self.__wait(self.__execute(command, argv, ignore_errors=ignore_errors, timeout=timeout, sink=sink))
+
+    async def __run_all(
+        self, commands: Iterable[str | list[str]], ignore_errors: bool, timeout: Optional[float]
+    ) -> list[CommandResult]:
+        """Runs commands on the current event loop with limited concurrency."""
+
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def run_limited(command: str | list[str]) -> CommandResult:
+            async with semaphore:
+                return await self.run_async(command, ignore_errors=ignore_errors, timeout=timeout)
+
+        return list(await asyncio.gather(*(run_limited(command) for command in commands)))
+
+    def run_all(
+        self, commands: Iterable[str | list[str]], *, ignore_errors: bool = True, timeout: Optional[float] = None
+    ) -> list[CommandResult]:
+        """
+        Runs independent commands at the same time on the event loop of the runner.
+
+        :param commands: Bash commands or arguments
+        :param ignore_errors: If True, no stderr in outputs
+        :param timeout: Time (in seconds) before each command is killed
+        :return: Results of the commands in their order
+        """
+
+        return self.__wait(self.__run_all(commands, ignore_errors=ignore_errors, timeout=timeout))
+
+
+# Runner instance for all project
+runner = CommandRunner()
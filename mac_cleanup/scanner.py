@@ -0,0 +1,1531 @@
+"""Size engine for dry runs."""
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+from fnmatch import fnmatchcase, translate
+from functools import lru_cache
+from itertools import compress, islice
+from os import lstat, scandir, stat_result
+from pathlib import Path as Path_
+from re import Pattern
+from re import compile as re_compile
+from stat import S_ISDIR
+from threading import Lock
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Final, Generator, Iterable, Iterator, Optional, final
+
+import attr
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+# Chars which mark the path as a glob
+_GLOB_CHARS: tuple[str, ...] = ("*", "[", "]")
+
+# Size of block in st_blocks
+_BLOCK_SIZE: Final[int] = 512
+
+
+@final
+@attr.s(slots=True)
+class ScanResult:
+    """Apparent and allocated (on-disk) size of the scanned path."""
+
+    size: int = attr.ib(default=0)
+    allocated: int = attr.ib(default=0)
+    incomplete: bool = attr.ib(default=False)
+
+    def add(self, other: "ScanResult") -> None:
+        """Adds sizes of other result to the current one."""
+
+        self.size += other.size
+        self.allocated += other.allocated
+        self.incomplete |= other.incomplete
+
+
+@final
+class InodeSet:
+    """
+    Thread-safe set of seen (st_dev, st_ino) pairs for counting hardlinked files once.
+
+    New inodes are buffered in a set, which is flushed into sorted arrays with 8 bytes per inode.
+    Arrays of the similar size are merged, so lookups stay logarithmic.
+    """
+
+    __slots__ = ("__buffers", "__levels", "__lock")
+
+    # Max number of inodes in buffer before flush
+    _BUFFER_SIZE: Final[int] = 1 << 16
+
+    def __init__(self):
+        self.__buffers: dict[int, set[int]] = dict()
+        self.__levels: dict[int, list[array[int]]] = dict()
+        self.__lock: Final = Lock()
+
+    def __len__(self) -> int:
+        return sum(map(len, self.__buffers.values())) + sum(
+            len(level) for levels in self.__levels.values() for level in levels
+        )
+
+    def __contains(self, device: int, inode: int) -> bool:
+        """Checks if inode was seen on the device."""
+
+        if inode in self.__buffers.get(device, ()):
+            return True
+
+        for level in self.__levels.get(device, ()):
+            if (index := bisect_left(level, inode)) != len(level) and level[index] == inode:
+                return True
+
+        return False
+
+    def __flush(self, device: int) -> None:
+        """Moves buffer of the device into sorted arrays."""
+
+        levels = self.__levels.setdefault(device, list())
+        levels.append(array("Q", sorted(self.__buffers.pop(device))))
+
+        # Merge arrays until every next one is at least twice smaller
+        while len(levels) > 1 and len(levels[-2]) <= 2 * len(levels[-1]):
+            last = levels.pop()
+            levels[-1] = array("Q", sorted(levels[-1] + last))
+
+    def add(self, device: int, inode: int) -> bool:
+        """
+        Adds inode to the set.
+
+        :param device: Device of the file (st_dev)
+        :param inode: Inode of the file (st_ino)
+        :return: True if inode wasn't seen before
+        """
+
+        with self.__lock:
+            if self.__contains(device, inode):
+                return False
+
+            (buffer := self.__buffers.setdefault(device, set())).add(inode)
+
+            if len(buffer) >= self._BUFFER_SIZE:
+                self.__flush(device)
+
+            return True
+
+
+@final
+class _LinkLog:
+    """Hardlinked files of the scan shard, which are counted once by the main process."""
+
+    __slots__ = ("links",)
+
+    def __init__(self):
+        # Apparent and allocated size by (st_dev, st_ino)
+        self.links: dict[tuple[int, int], tuple[int, int]] = dict()
+
+
+def _count(result: ScanResult, stat_: stat_result, inodes: Optional[InodeSet | _LinkLog]) -> None:
+    """
+    Adds sizes from stat to result.
+
+    :param result: Result to be updated
+    :param stat_: Stat of the path (w/o following symlinks)
+    :param inodes: Seen inodes, hardlinked files are counted once if specified
+    """
+
+    # Only files with multiple links can be seen twice
+    if inodes is not None and stat_.st_nlink > 1 and not S_ISDIR(stat_.st_mode):
+        # Hardlinks are only logged in shards
+        if isinstance(inodes, _LinkLog):
+            inodes.links[(stat_.st_dev, stat_.st_ino)] = (stat_.st_size, stat_.st_blocks * _BLOCK_SIZE)
+            return
+
+        if not inodes.add(stat_.st_dev, stat_.st_ino):
+            return
+
+    result.size += stat_.st_size
+    result.allocated += stat_.st_blocks * _BLOCK_SIZE
+
+
+class _DeadlineExceeded(Exception):
+    """Raised when scan runs out of its time budget."""
+
+
+def _check_deadline(deadline: Optional[float]) -> None:
+    """Raises :class:`_DeadlineExceeded` if deadline (:func:`time.monotonic` time) has passed."""
+
+    if deadline is not None and monotonic() > deadline:
+        raise _DeadlineExceeded
+
+
+@final
+class _Claims:
+    """
+    Thread-safe registry of matches claimed by the scans, so partially overlapping paths count entries once.
+
+    E.g. ``t/a`` and ``t/*/b`` both reach ``t/a/b``: match nested in the claimed one is skipped, and entry of
+    the claimed match is skipped by the listing of its claimed parent.
+
+    :param claimed: Claims to start with (e.g. snapshot of claims passed to other process)
+    """
+
+    __slots__ = ("__claimed", "__lock")
+
+    def __init__(self, claimed: Optional[dict[str, bool]] = None):
+        # Whether entry of the match itself is counted by path of the match as a posix
+        self.__claimed: Final[dict[str, bool]] = claimed or dict()
+        self.__lock: Final = Lock()
+
+    def claim(self, match_posix: str, counts_entry: bool) -> Optional[bool]:
+        """
+        Claims match for the scan.
+
+        :param match_posix: Path of the match as a posix
+        :param counts_entry: Match counts its entry itself (not only contents of the directory)
+        :return: True if match should be scanned, False if only its entry is left, None if it is already counted
+        """
+
+        with self.__lock:
+            # Match inside the claimed one is already counted by it
+            parent = match_posix
+
+            while parent := parent.rpartition("/")[0]:
+                if parent in self.__claimed:
+                    return None
+
+            if (counted := self.__claimed.get(match_posix)) is None:
+                self.__claimed[match_posix] = counts_entry
+                return True
+
+            # Same match was claimed w/o its entry
+            if counted or not counts_entry:
+                return None
+
+            self.__claimed[match_posix] = True
+            return False
+
+    def take(self, entry_posix: str) -> Optional[bool]:
+        """
+        Takes entry listed inside the claimed match.
+
+        :param entry_posix: Path of the entry as a posix
+        :return: None if entry isn't a claimed match, True if entry itself should be counted, False if it is skipped
+        """
+
+        # Most of the entries aren't claimed, so they don't take the lock
+        if entry_posix not in self.__claimed:
+            return None
+
+        with self.__lock:
+            if self.__claimed[entry_posix]:
+                return False
+
+            self.__claimed[entry_posix] = True
+            return True
+
+    def nested(self, dir_posix: str) -> dict[str, bool]:
+        """Gets claims inside the directory (for the scans in other processes)"""
+
+        prefix = dir_posix.rstrip("/") + "/"
+
+        with self.__lock:
+            return {
+                match_posix: counted
+                for match_posix, counted in self.__claimed.items()
+                if match_posix.startswith(prefix)
+            }
+
+
+def _list_dir(
+    dir_posix: str, result: ScanResult, inodes: Optional[InodeSet | _LinkLog], claims: Optional[_Claims] = None
+) -> list[str]:
+    """
+    Counts size of the directory entries w/o following symlinks.
+
+    Uses :class:`os.DirEntry` caches for type and stat checks, so no :class:`pathlib.Path` objects are created.
+
+    :param dir_posix: Path to the directory as a posix
+    :param result: Result to be updated
+    :param inodes: Seen inodes, hardlinked files are counted once if specified
+    :param claims: Matches claimed by other scans, their contents are skipped
+    :return: Subdirectories to be listed next
+    """
+
+    subdirs: list[str] = list()
+
+    # Except SIP, non-existent paths, and files
+    try:
+        dir_iterator = scandir(dir_posix)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return subdirs
+
+    with dir_iterator:
+        for entry in dir_iterator:
+            # Except SIP, symlinks, and not non-existent path
+            try:
+                # Claimed matches are counted by their own scans
+                if claims is not None and (counts_entry := claims.take(entry.path)) is not None:
+                    if counts_entry:
+                        _count(result, entry.stat(follow_symlinks=False), inodes)
+                    continue
+
+                # Queue directories (symlinks are not followed)
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+
+                _count(result, entry.stat(follow_symlinks=False), inodes)
+            except (PermissionError, FileNotFoundError):
+                continue
+
+    return subdirs
+
+
+def _scan_tree(
+    top: str,
+    result: ScanResult,
+    inodes: Optional[InodeSet | _LinkLog],
+    deadline: Optional[float],
+    claims: Optional[_Claims] = None,
+) -> None:
+    """
+    Counts size of everything inside the directory w/o following symlinks.
+
+    Walks with an explicit stack of path strings.
+
+    :param top: Path to the directory as a posix
+    :param result: Result to be updated
+    :param inodes: Seen inodes, hardlinked files are counted once if specified
+    :param deadline: Time budget is checked before listing every directory
+    :param claims: Matches claimed by other scans, their contents are skipped
+    """
+
+    # Stack of directories to be listed
+    stack = [top]
+
+    while stack:
+        _check_deadline(deadline)
+
+        stack.extend(_list_dir(stack.pop(), result, inodes, claims))
+
+
+def _lstat(path_posix: str) -> Optional[stat_result]:
+    """Gets stat of the path w/o following symlinks :return: Stat or None if path doesn't exist."""
+
+    # Except SIP, symlinks, and not non-existent path (including ones inside files)
+    try:
+        return lstat(path_posix)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _count_match(
+    path_posix: str,
+    result: ScanResult,
+    inodes: Optional[InodeSet | _LinkLog],
+    contents_only: bool = False,
+    stat_: Optional[stat_result] = None,
+) -> Optional[bool]:
+    """
+    Counts size of the path itself.
+
+    :param path_posix: Path to the file or directory as a posix
+    :param result: Result to be updated
+    :param inodes: Seen inodes, hardlinked files are counted once if specified
+    :param contents_only: Skip the path if it is a directory
+    :param stat_: Stat of the path taken during glob expansion
+    :return: True if path is a real directory, False if it isn't, and None if path doesn't exist
+    """
+
+    if stat_ is None and (stat_ := _lstat(path_posix)) is None:
+        return None
+
+    is_dir = S_ISDIR(stat_.st_mode)
+
+    if not (contents_only and is_dir):
+        _count(result, stat_, inodes)
+
+    return is_dir
+
+
+def _scan_entry(
+    path_posix: str,
+    result: ScanResult,
+    inodes: Optional[InodeSet],
+    deadline: Optional[float],
+    contents_only: bool = False,
+    stat_: Optional[stat_result] = None,
+) -> bool:
+    """
+    Counts size of the path itself and everything inside of it.
+
+    :param path_posix: Path to the file or directory as a posix
+    :param result: Result to be updated
+    :param inodes: Seen inodes, hardlinked files are counted once if specified
+    :param deadline: Time budget of the scan
+    :param contents_only: Count only contents of the directory w/o directory itself
+    :param stat_: Stat of the path taken during glob expansion
+    :return: True if path exists
+    """
+
+    if (is_dir := _count_match(path_posix, result, inodes, contents_only=contents_only, stat_=stat_)) is None:
+        return False
+
+    # Count contents of the real directories only
+    if is_dir:
+        _scan_tree(path_posix, result, inodes, deadline)
+
+    return True
+
+
+@final
+@attr.s(slots=True, frozen=True)
+class ResolvedMatch:
+    """Existing path matched by the target with its size."""
+
+    path: str = attr.ib()
+    size: int = attr.ib(default=0)
+    allocated: int = attr.ib(default=0)
+
+
+@final
+@attr.s(slots=True, frozen=True)
+class ResolvedTarget:
+    """Target path expanded into existing matches during dry run."""
+
+    path: Path_ = attr.ib()
+    matches: tuple[ResolvedMatch, ...] = attr.ib(factory=tuple)
+    incomplete: bool = attr.ib(default=False)
+
+    @property
+    def result(self) -> ScanResult:
+        """Total size of all matches."""
+
+        return ScanResult(
+            size=sum(match.size for match in self.matches),
+            allocated=sum(match.allocated for match in self.matches),
+            incomplete=self.incomplete,
+        )
+
+
+def resolve(
+    path_: Path_,
+    inodes: Optional[InodeSet] = None,
+    predicate: Optional[Callable[[str], bool]] = None,
+    deadline: Optional[float] = None,
+    progress: Optional[ScanResult] = None,
+) -> ResolvedTarget:
+    """
+    Expands the path into existing matches and counts their sizes.
+
+    Glob paths count every match with its contents. Directories count only their contents.
+    Scan stops on deadline and returns partial result marked as incomplete.
+
+    :param path_: Path to the file, directory or glob
+    :param inodes: Seen inodes, hardlinked files are counted once if specified
+    :param predicate: Filter for matches (e.g. deletable ones), matches failing it are skipped
+    :param deadline: Time budget of the scan as :func:`time.monotonic` time
+    :param progress: Live total of the scan, which can be read from other threads
+    :return: Frozen target with matches and their sizes
+    """
+
+    # Total is updated in-place, so partial size is always available
+    total = progress if progress is not None else ScanResult()
+
+    matches: list[ResolvedMatch] = list()
+
+    def scan_match(match_posix: str, stat_: stat_result, contents_only: bool = False) -> None:
+        """Counts match and adds it to the list (size of match is a diff of total)"""
+
+        size_before, allocated_before = total.size, total.allocated
+        exists = False
+
+        try:
+            exists = _scan_entry(match_posix, total, inodes, deadline, contents_only=contents_only, stat_=stat_)
+        except _DeadlineExceeded:
+            # Partially counted match is kept
+            exists = True
+            raise
+        finally:
+            if exists:
+                matches.append(
+                    ResolvedMatch(
+                        path=match_posix, size=total.size - size_before, allocated=total.allocated - allocated_before
+                    )
+                )
+
+    try:
+        for match_posix, stat_, contents_only in _expand(path_, predicate, deadline):
+            scan_match(match_posix, stat_, contents_only=contents_only)
+    except _DeadlineExceeded:
+        total.incomplete = True
+
+    return ResolvedTarget(path=path_, matches=tuple(matches), incomplete=total.incomplete)
+
+
+# Match as a posix with its stat and whether only contents of the match are counted
+_Match = tuple[str, stat_result, bool]
+
+
+# Number of matches checked by :class:`mac_cleanup.policy.Policy` at once
+_PREDICATE_BATCH: Final[int] = 256
+
+
+def _filter(predicate: Optional[Callable[[str], bool]], matches: Iterable[_Match]) -> Iterator[_Match]:
+    """
+    Filters matches by predicate (policy checks batches of them at once).
+
+    :param predicate: Filter for matches, matches failing it are skipped
+    :param matches: Matches to be filtered
+    :return: Yields matches passing the predicate
+    """
+
+    from mac_cleanup.policy import Policy
+
+    if predicate is None:
+        yield from matches
+        return
+
+    if not isinstance(predicate, Policy):
+        yield from (match for match in matches if predicate(match[0]))
+        return
+
+    pending_matches = iter(matches)
+
+    while batch := list(islice(pending_matches, _PREDICATE_BATCH)):
+        yield from compress(batch, predicate.check_all([(match_posix, stat_) for match_posix, stat_, _ in batch]))
+
+
+def _expand(
+    path_: Path_,
+    predicate: Optional[Callable[[str], bool]],
+    deadline: Optional[float],
+    planned: Optional[list[_Match]] = None,
+) -> Generator[_Match, None, None]:
+    """
+    Expands the path into existing matches.
+
+    :param path_: Path to the file, directory or glob
+    :param predicate: Filter for matches, matches failing it are skipped
+    :param deadline: Time budget is checked before every listed directory and glob match
+    :param planned: Matches of the path expanded by :class:`TraversalPlan`
+    :return: Yields matches as a posix with their stats and whether only contents of the match are counted
+    """
+
+    # Planned path is already expanded
+    if planned is not None:
+        yield from _filter(predicate, planned)
+        return
+
+    # Get path posix
+    path_posix = path_.as_posix()
+
+    # Expand glob and count every match
+    if (compiled_glob := _compile_glob(path_posix)) is not None:
+        yield from _filter(
+            predicate, ((match_posix, stat_, False) for match_posix, stat_ in compiled_glob.expand(deadline))
+        )
+
+    # Skip if path is not deletable or undefined
+    elif (stat_ := _lstat(path_posix)) is not None and (predicate is None or predicate(path_posix)):
+        yield path_posix, stat_, True
+
+
+def _join(parent: str, name: str) -> str:
+    """Joins path as a posix with the name (empty parent is the current directory)"""
+
+    return f"{parent.rstrip('/')}/{name}" if parent else name
+
+
+@final
+class _CompiledGlob:
+    """
+    Glob path compiled into its literal root and matchers of the following segments.
+
+    Segments are literal names, compiled patterns, or None for recursive ``**``.
+    Matches are found in a single traversal, which lists every directory once and takes stats of
+    matches from :class:`os.DirEntry` caches, so the size of the match can be counted w/o extra calls.
+    Semantics follow :meth:`pathlib.Path.glob` - wildcards match hidden files and are case-sensitive.
+    """
+
+    __slots__ = ("root", "segments")
+
+    def __init__(self, root: str, segments: tuple[Optional[str | Pattern[str]], ...]):
+        self.root: Final[str] = root
+        self.segments: Final[tuple[Optional[str | Pattern[str]], ...]] = segments
+
+    def expand(self, deadline: Optional[float] = None) -> Generator[tuple[str, stat_result], None, None]:
+        """
+        Expands glob into existing matches.
+
+        :param deadline: Time budget is checked before every listed directory
+        :return: Yields matches as a posix with their stats (w/o following symlinks)
+        """
+
+        # Stack of paths with index of the next segment to be matched
+        stack: list[tuple[str, int]] = [(self.root, 0)]
+
+        while stack:
+            _check_deadline(deadline)
+
+            path_posix, index = stack.pop()
+
+            # Path matched the whole glob (after recursive segment)
+            if index == len(self.segments):
+                if (stat_ := _lstat(path_posix)) is not None:
+                    yield path_posix, stat_
+                continue
+
+            segment = self.segments[index]
+            is_last = index == len(self.segments) - 1
+
+            # Literal segments don't need listing
+            if isinstance(segment, str):
+                if not is_last:
+                    stack.append((_join(path_posix, segment), index + 1))
+                elif (stat_ := _lstat(match_posix := _join(path_posix, segment))) is not None:
+                    yield match_posix, stat_
+                continue
+
+            # Recursive segment matches the directory itself too
+            if segment is None:
+                stack.append((path_posix, index + 1))
+
+            yield from self.__match_entries(path_posix, index, segment, is_last, stack)
+
+    def __match_entries(
+        self, dir_posix: str, index: int, segment: Optional[Pattern[str]], is_last: bool, stack: list[tuple[str, int]]
+    ) -> Generator[tuple[str, stat_result], None, None]:
+        """Lists directory once and routes its entries to the stack or yields them as matches."""
+
+        # Except SIP, non-existent paths, and files
+        try:
+            dir_iterator = scandir(dir_posix or ".")
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            return
+
+        with dir_iterator:
+            for entry in dir_iterator:
+                # Except SIP, symlinks, and not non-existent path
+                try:
+                    entry_posix = _join(dir_posix, entry.name)
+
+                    # Recursive segment goes into subdirectories w/o following symlinks
+                    if segment is None:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry_posix, index))
+
+                    elif segment.match(entry.name) is None:
+                        continue
+
+                    elif is_last:
+                        yield entry_posix, entry.stat(follow_symlinks=False)
+
+                    # Intermediate segments follow symlinks same as pathlib
+                    elif entry.is_dir():
+                        stack.append((entry_posix, index + 1))
+                except (PermissionError, FileNotFoundError):
+                    continue
+
+
+@lru_cache(maxsize=None)
+def _compile_glob(path_posix: str) -> Optional[_CompiledGlob]:
+    """
+    Compiles glob path.
+
+    :param path_posix: Path as a posix
+    :return: Compiled glob or None if path isn't a glob
+    """
+
+    parts = path_posix.split("/")
+
+    # Find first segment with glob
+    if (first_glob := next((index for index, part in enumerate(parts) if _is_glob(part)), None)) is None:
+        return None
+
+    root = "/".join(parts[:first_glob]) or ("/" if path_posix.startswith("/") else "")
+
+    segments = tuple(
+        None if part == "**" else re_compile(translate(part)) if _is_glob(part) else part for part in parts[first_glob:]
+    )
+
+    return _CompiledGlob(root, segments)
+
+
+@final
+class _PlanNode:
+    """Node of the traversal plan with children routed by the segment."""
+
+    __slots__ = ("literals", "patterns", "targets")
+
+    def __init__(self):
+        self.literals: dict[str, _PlanNode] = dict()
+        self.patterns: dict[str, tuple[Pattern[str], _PlanNode]] = dict()
+
+        # Targets ending on the node with whether only contents of the match are counted
+        self.targets: list[tuple[Path_, bool]] = list()
+
+
+@final
+class TraversalPlan:
+    """
+    Trie of the absolute target paths for expanding all of them at once.
+
+    Directories on the shared prefixes are listed once and their entries are routed to every child
+    matching them, so sibling targets don't list their parents again.
+    Paths with recursive ``**`` globs are not planned and are expanded separately.
+
+    :param paths: Target paths
+    """
+
+    __slots__ = ("__root", "paths")
+
+    def __init__(self, paths: Iterable[Path_]):
+        self.__root: Final[_PlanNode] = _PlanNode()
+
+        # Paths added to the plan
+        self.paths: Final[list[Path_]] = list()
+
+        for path_ in paths:
+            self.__insert(path_)
+
+    def __insert(self, path_: Path_) -> None:
+        """Adds path to the trie."""
+
+        segments = path_.as_posix().split("/")[1:]
+
+        # Skip relative paths, root, and recursive globs
+        if not path_.is_absolute() or "" in segments or "**" in segments:
+            return
+
+        node = self.__root
+
+        for segment in segments:
+            if not _is_glob(segment):
+                node = node.literals.setdefault(segment, _PlanNode())
+            else:
+                node = node.patterns.setdefault(segment, (re_compile(translate(segment)), _PlanNode()))[1]
+
+        node.targets.append((path_, not any(map(_is_glob, segments))))
+        self.paths.append(path_)
+
+    def expand(self, deadline: Optional[float] = None) -> dict[Path_, list[_Match]]:
+        """
+        Expands all planned paths into existing matches.
+
+        :param deadline: Time budget is checked before every node
+        :return: Matches of every planned path
+        """
+
+        planned: dict[Path_, list[_Match]] = {path_: list() for path_ in self.paths}
+
+        # Stack of nodes with their paths and stats taken during listing
+        stack: list[tuple[_PlanNode, str, Optional[stat_result]]] = [(self.__root, "/", None)]
+
+        while stack:
+            _check_deadline(deadline)
+
+            node, path_posix, stat_ = stack.pop()
+
+            if node.targets and (stat_ is not None or (stat_ := _lstat(path_posix)) is not None):
+                for path_, contents_only in node.targets:
+                    planned[path_].append((path_posix, stat_, contents_only))
+
+            stack.extend(self.__route(node, path_posix))
+
+        return planned
+
+    @staticmethod
+    def __route(node: _PlanNode, dir_posix: str) -> list[tuple[_PlanNode, str, Optional[stat_result]]]:
+        """
+        Routes entries of the directory to the children of the node.
+
+        :param node: Node of the directory
+        :param dir_posix: Path to the directory as a posix
+        :return: Children with their paths and stats
+        """
+
+        # Literal children are checked w/o listing (names on case-insensitive volumes may differ in case)
+        routed: list[tuple[_PlanNode, str, Optional[stat_result]]] = [
+            (child, _join(dir_posix, name), None) for name, child in node.literals.items()
+        ]
+
+        if not node.patterns:
+            return routed
+
+        # Except SIP, non-existent paths, and files (literals of unreadable directory are still checked)
+        try:
+            dir_iterator = scandir(dir_posix)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            return routed
+
+        with dir_iterator:
+            for entry in dir_iterator:
+                children = [child for pattern, child in node.patterns.values() if pattern.match(entry.name)]
+
+                if not children:
+                    continue
+
+                # Except SIP, symlinks, and not non-existent path
+                try:
+                    # Stat is only needed for matches
+                    stat_ = entry.stat(follow_symlinks=False) if any(child.targets for child in children) else None
+                except (PermissionError, FileNotFoundError):
+                    continue
+
+                entry_posix = _join(dir_posix, entry.name)
+                routed.extend((child, entry_posix, stat_) for child in children)
+
+        return routed
+
+
+def get_size(path_: Path_, inodes: Optional[InodeSet] = None) -> ScanResult:
+    """
+    Counts size of the path.
+
+    Glob paths count every match with its contents. Directories count only their contents.
+
+    :param path_: Path to the file, directory or glob
+    :param inodes: Seen inodes, hardlinked files are counted once if specified
+    :return: Apparent and allocated size of specified path
+    """
+
+    return resolve(path_, inodes=inodes).result
+
+
+def _is_glob(segment: str) -> bool:
+    """Checks if path segment is a glob."""
+
+    return any(glob in segment for glob in _GLOB_CHARS)
+
+
+def _covers(pattern: str, segment: str) -> bool:
+    """
+    Checks if every match of the path segment is matched by the pattern segment.
+
+    :param pattern: Segment of the covering path
+    :param segment: Segment of the covered path
+    :return: True if pattern covers the segment
+    """
+
+    if pattern == segment or pattern == "*":
+        return True
+
+    # Glob can't be proven to be covered by other globs
+    if not _is_glob(pattern) or _is_glob(segment):
+        return False
+
+    return fnmatchcase(segment, pattern)
+
+
+@final
+class _TargetTrie:
+    """Prefix trie of path segments with globs stored separately from literals."""
+
+    __slots__ = ("literals", "globs", "terminal")
+
+    def __init__(self):
+        self.literals: dict[str, _TargetTrie] = dict()
+        self.globs: dict[str, _TargetTrie] = dict()
+        self.terminal: bool = False
+
+    def insert(self, segments: tuple[str, ...]) -> None:
+        """Adds path segments to the trie."""
+
+        node = self
+
+        for segment in segments:
+            children = node.globs if _is_glob(segment) else node.literals
+            node = children.setdefault(segment, _TargetTrie())
+
+        node.terminal = True
+
+    def covers(self, segments: tuple[str, ...], depth: int = 0) -> bool:
+        """
+        Checks if path is inside any of the added paths.
+
+        :param segments: Path segments
+        :param depth: Index of the current segment
+        :return: True if path is a duplicate or is nested in other path
+        """
+
+        if self.terminal:
+            return True
+
+        if depth == len(segments):
+            return False
+
+        segment = segments[depth]
+
+        if (child := self.literals.get(segment)) is not None and child.covers(segments, depth + 1):
+            return True
+
+        return any(
+            child.covers(segments, depth + 1) for pattern, child in self.globs.items() if _covers(pattern, segment)
+        )
+
+
+def collapse_targets(paths: Iterable[Path_]) -> list[Path_]:
+    """
+    Removes duplicate and nested paths, so every subtree is counted once.
+
+    :param paths: Paths to be counted
+    :return: Paths not covered by any other path in the original order
+    """
+
+    unique_paths = list(dict.fromkeys(paths))
+
+    # Covering path is always shorter or more generic - it'll be added to the trie first
+    def sort_key(path_index: int) -> tuple[int, int, int]:
+        parts = unique_paths[path_index].parts
+        return len(parts), -sum(map(_is_glob, parts)), -parts.count("*")
+
+    trie = _TargetTrie()
+    kept_indexes: list[int] = list()
+
+    for index in sorted(range(len(unique_paths)), key=sort_key):
+        # Empty path (cwd) isn't a real target and can't cover others
+        if not (parts := unique_paths[index].parts):
+            kept_indexes.append(index)
+            continue
+
+        if trie.covers(parts):
+            continue
+
+        trie.insert(parts)
+        kept_indexes.append(index)
+
+    return [unique_paths[index] for index in sorted(kept_indexes)]
+
+
+@final
+class _Target:
+    """State of the path being scanned by multiple workers."""
+
+    __slots__ = ("path", "deadline", "matches", "pending", "incomplete", "lock")
+
+    def __init__(self, path_: Path_):
+        self.path: Final[Path_] = path_
+
+        # Deadline is set once the scan of the path starts
+        self.deadline: float = float("inf")
+
+        # Matches with their live totals
+        self.matches: list[tuple[str, ScanResult]] = list()
+
+        # Number of work items left (the first one expands the path)
+        self.pending: int = 1
+
+        self.incomplete: bool = False
+        self.lock: Final = Lock()
+
+    def resolved(self, incomplete: bool = False) -> ResolvedTarget:
+        """
+        Gets resolved target from the current state.
+
+        :param incomplete: Mark target as incomplete
+        :return: Resolved target (partial if scan isn't finished)
+        """
+
+        with self.lock:
+            matches = tuple(
+                ResolvedMatch(path=match_posix, size=total.size, allocated=total.allocated)
+                for match_posix, total in self.matches
+            )
+
+        return ResolvedTarget(path=self.path, matches=matches, incomplete=self.incomplete or incomplete)
+
+
+def _abandon(in_flight: set[_Target], paths: Iterator[Path_]) -> Generator[tuple[Path_, ResolvedTarget], None, None]:
+    """Yields partial results of stuck scans and marks pending paths as incomplete."""
+
+    for target in in_flight:
+        yield target.path, target.resolved(incomplete=True)
+
+    for path_ in paths:
+        yield path_, ResolvedTarget(path=path_, incomplete=True)
+
+
+# Work item: target, total of the match, and directory to be listed (expands target if None)
+_WorkItem = tuple[_Target, Optional[ScanResult], Optional[str]]
+
+
+class _BaseScanner:
+    """
+    Time budgets, traversal plan, and seen inodes shared by the scanners.
+
+    :param predicate: Filter for matches (e.g. deletable ones), matches failing it are skipped
+    :param max_in_flight_per_worker: Number of paths being scanned at once per worker
+    :param target_budget: Time budget (in seconds) of each path from the start of its scan
+    :param total_budget: Time budget (in seconds) of the whole scan
+    :param grace_period: Time (in seconds) given to scans after deadline before taking partial results
+    :param max_workers: Number of workers
+    """
+
+    def __init__(
+        self,
+        predicate: Optional[Callable[[str], bool]],
+        max_in_flight_per_worker: int,
+        target_budget: float,
+        total_budget: float,
+        grace_period: float,
+        max_workers: int,
+    ):
+        self._predicate: Final = predicate
+
+        self.max_workers: Final[int] = max_workers
+        self._window: Final[int] = max_in_flight_per_worker * max_workers
+
+        self._target_budget: Final[float] = target_budget
+        self._total_budget: Final[float] = total_budget
+        self._grace_period: Final[float] = grace_period
+        self._deadline: float = float("inf")
+
+        # Matches of the paths expanded by traversal plan
+        self._planned: dict[Path_, list[_Match]] = dict()
+
+        # Hardlinked files are counted once across all paths
+        self.inodes: Final[InodeSet] = InodeSet()
+
+        # Overlapping matches are counted once across all paths
+        self._claims: Final[_Claims] = _Claims()
+
+    def _start_scan(self, plan: Optional[TraversalPlan]) -> None:
+        """Starts budget of the whole scan and expands planned paths at once."""
+
+        # Deadline of the whole scan
+        self._deadline = monotonic() + self._total_budget
+
+        # Unplanned paths (and all paths if plan runs out of time) are expanded by their own scans
+        if plan is None:
+            return
+
+        try:
+            self._planned = plan.expand(self._deadline)
+        except _DeadlineExceeded:
+            return
+
+    def _wait_timeout(self, in_flight: set[_Target]) -> float:
+        """Gets time left until the earliest deadline of the scans in flight (with grace period)"""
+
+        deadline = min((target.deadline for target in in_flight), default=self._deadline)
+
+        return max(min(deadline, self._deadline) - monotonic(), 0) + self._grace_period
+
+    def _abandon_overdue(
+        self, in_flight: set[_Target], paths: Iterator[Path_]
+    ) -> Generator[tuple[Path_, ResolvedTarget], None, None]:
+        """
+        Yields partial results of the scans stuck after their deadlines and removes them from the scans in flight.
+
+        :param in_flight: Scans in flight
+        :param paths: Pending paths, they are marked as incomplete once the whole scan is out of budget
+        :return: Yields paths with their partial resolved targets
+        """
+
+        overdue = monotonic() - self._grace_period
+
+        if overdue >= self._deadline:
+            yield from _abandon(in_flight, paths)
+            in_flight.clear()
+            return
+
+        for target in [target for target in in_flight if target.deadline <= overdue]:
+            in_flight.discard(target)
+
+            # Rest of the target is skipped by the workers
+            target.incomplete = True
+
+            yield target.path, target.resolved()
+
+    def _count_claimed(self, match_posix: str, total: ScanResult, stat_: stat_result, contents_only: bool) -> bool:
+        """
+        Claims match and counts its entry unless it is already counted by other paths.
+
+        :param match_posix: Path of the match as a posix
+        :param total: Total of the match
+        :param stat_: Stat of the match
+        :param contents_only: Count only contents of the directory w/o directory itself
+        :return: True if contents of the match should be scanned
+        """
+
+        is_dir = S_ISDIR(stat_.st_mode)
+        counts_entry = not (contents_only and is_dir)
+
+        if (claimed := self._claims.claim(match_posix, counts_entry=counts_entry)) is None:
+            return False
+
+        if counts_entry:
+            _count(total, stat_, self.inodes)
+
+        # Contents of the real directories only
+        return claimed and is_dir
+
+    def _expand_target(self, target: _Target) -> Generator[_Match, None, None]:
+        """Starts budget of the target :return: Yields its matches (raises :class:`_DeadlineExceeded`)"""
+
+        # Budget of the path starts when its scan starts
+        target.deadline = min(monotonic() + self._target_budget, self._deadline)
+
+        return _expand(target.path, self._predicate, target.deadline, self._planned.get(target.path))
+
+
+@final
+class Scanner(_BaseScanner):
+    """
+    Resolves paths with work-stealing pool of threads.
+
+    Every directory is a separate work item. Workers keep discovered subdirectories in a local
+    stack and hand the oldest ones (usually the biggest subtrees) to the shared queue while other
+    workers are idle. Totals are aggregated per match, so one huge path is scanned by all workers.
+
+    :param predicate: Filter for matches (e.g. deletable ones), matches failing it are skipped
+    :param max_in_flight_per_worker: Number of paths being scanned at once per worker
+    :param target_budget: Time budget (in seconds) of each path from the start of its scan
+    :param total_budget: Time budget (in seconds) of the whole scan
+    :param grace_period: Time (in seconds) given to scans after deadline before taking partial results
+    :param max_workers: Number of worker threads
+    """
+
+    def __init__(
+        self,
+        predicate: Optional[Callable[[str], bool]] = None,
+        max_in_flight_per_worker: int = 2,
+        target_budget: float = 60.0,
+        total_budget: float = 300.0,
+        grace_period: float = 1.0,
+        max_workers: Optional[int] = None,
+    ):
+        from collections import deque
+        from os import cpu_count
+        from queue import SimpleQueue
+        from threading import Condition
+
+        super().__init__(
+            predicate=predicate,
+            max_in_flight_per_worker=max_in_flight_per_worker,
+            target_budget=target_budget,
+            total_budget=total_budget,
+            grace_period=grace_period,
+            # Same number of workers as ThreadPoolExecutor default
+            max_workers=max_workers or min(32, (cpu_count() or 1) + 4),
+        )
+
+        # Shared queue of work items, idle workers take items from it
+        self.__shared: Final[deque[_WorkItem]] = deque()
+        self.__condition: Final = Condition()
+        self.__idle: int = 0
+        self.__stopped: bool = False
+
+        # Finished targets or errors raised in workers
+        self.__finished: Final[SimpleQueue[_Target | BaseException]] = SimpleQueue()
+
+    def __share(self, item: _WorkItem) -> None:
+        """Puts work item to the shared queue and wakes up idle worker."""
+
+        with self.__condition:
+            self.__shared.append(item)
+            self.__condition.notify()
+
+    def __steal(self) -> Optional[_WorkItem]:
+        """Waits for work item in the shared queue :return: Work item or None if scan is stopped."""
+
+        with self.__condition:
+            self.__idle += 1
+
+            while not self.__shared and not self.__stopped:
+                self.__condition.wait()
+
+            self.__idle -= 1
+
+            if self.__stopped:
+                return None
+
+            return self.__shared.popleft()
+
+    def __work(self) -> None:
+        """Worker loop."""
+
+        local: deque[_WorkItem] = deque()
+
+        try:
+            while True:
+                if not local:
+                    if (item := self.__steal()) is None:
+                        return
+                    local.append(item)
+
+                self.__process(local.pop(), local)
+
+                # Share the oldest item with idle workers
+                if len(local) > 1 and self.__idle:
+                    self.__share(local.popleft())
+        # Pass errors to the main thread
+        except BaseException as err:
+            self.__finished.put(err)
+
+    def __process(self, item: _WorkItem, local: deque[_WorkItem]) -> None:
+        """
+        Processes work item.
+
+        :param item: Work item to be processed
+        :param local: Local stack of the worker for new work items
+        """
+
+        target, total, dir_posix = item
+
+        # Skip the rest of target on deadline
+        if target.incomplete or self.__stopped:
+            pass
+        elif monotonic() > target.deadline:
+            target.incomplete = True
+        elif total is None or dir_posix is None:
+            self.__expand(target, local)
+        else:
+            self.__walk(target, total, dir_posix, local)
+
+        # Errors are passed to the main thread before target is finished
+        with target.lock:
+            target.pending -= 1
+            finished = not target.pending
+
+        if finished:
+            self.__finished.put(target)
+
+    def __add_match(
+        self, target: _Target, match_posix: str, stat_: stat_result, local: deque[_WorkItem], contents_only: bool
+    ) -> None:
+        """
+        Adds match to the target and queues its contents.
+
+        :param target: Target of the match
+        :param match_posix: Path of the match as a posix
+        :param stat_: Stat of the match
+        :param local: Local stack of the worker
+        :param contents_only: Count only contents of the directory w/o directory itself
+        """
+
+        total = ScanResult()
+
+        # Matches counted by other paths are kept with empty totals
+        is_scanned = self._count_claimed(match_posix, total, stat_, contents_only=contents_only)
+
+        with target.lock:
+            target.matches.append((match_posix, total))
+
+            if is_scanned:
+                target.pending += 1
+
+        if is_scanned:
+            local.append((target, total, match_posix))
+
+    def __expand(self, target: _Target, local: deque[_WorkItem]) -> None:
+        """Expands target into matches and starts its time budget."""
+
+        try:
+            for match_posix, stat_, contents_only in self._expand_target(target):
+                self.__add_match(target, match_posix, stat_, local, contents_only=contents_only)
+        except _DeadlineExceeded:
+            target.incomplete = True
+
+    def __walk(self, target: _Target, total: ScanResult, dir_posix: str, local: deque[_WorkItem]) -> None:
+        """Lists directory and queues its subdirectories as new work items."""
+
+        result = ScanResult()
+        subdirs = _list_dir(dir_posix, result, self.inodes, self._claims)
+
+        # Aggregate totals per match
+        with target.lock:
+            total.add(result)
+            target.pending += len(subdirs)
+
+        local.extend((target, total, subdir) for subdir in subdirs)
+
+    def __submit(self, in_flight: set[_Target], paths: Iterator[Path_], count: int) -> None:
+        """Submits up to count of pending paths to workers."""
+
+        for path_ in islice(paths, count):
+            in_flight.add(target := _Target(path_))
+            self.__share((target, None, None))
+
+    def scan(
+        self, paths: Iterable[Path_], plan: Optional[TraversalPlan] = None
+    ) -> Generator[tuple[Path_, ResolvedTarget], None, None]:
+        """
+        Resolves paths and yields them in order of completion.
+
+        :param paths: Paths to be resolved
+        :param plan: Traversal plan of the paths, planned paths are expanded at once
+        :return: Yields paths with their resolved targets
+        """
+
+        from queue import Empty
+        from threading import Thread
+
+        # Paths waiting for submission and paths being scanned
+        pending_paths = iter(paths)
+        in_flight: set[_Target] = set()
+
+        self._start_scan(plan)
+
+        # Daemon workers, so stuck ones don't block exit
+        for _ in range(self.max_workers):
+            Thread(target=self.__work, daemon=True).start()
+
+        try:
+            # Fill submission window
+            self.__submit(in_flight, pending_paths, self._window)
+
+            while in_flight:
+                # Scans stop on deadline by themselves, timeout is only hit if they are stuck
+                try:
+                    finished = self.__finished.get(timeout=self._wait_timeout(in_flight))
+                except Empty:
+                    yield from self._abandon_overdue(in_flight, pending_paths)
+
+                    # Refill submission window
+                    self.__submit(in_flight, pending_paths, self._window - len(in_flight))
+                    continue
+
+                # Raise errors from workers
+                if isinstance(finished, BaseException):
+                    raise finished
+
+                # Abandoned scans are already yielded
+                if finished not in in_flight:
+                    continue
+
+                in_flight.discard(finished)
+
+                # Refill submission window
+                self.__submit(in_flight, pending_paths, 1)
+
+                yield finished.path, finished.resolved()
+        # Stop without waiting for scans
+        except KeyboardInterrupt:
+            return
+        finally:
+            with self.__condition:
+                self.__stopped = True
+                self.__condition.notify_all()
+
+
+# Apparent size, allocated size, incomplete flag, and hardlinked files (device, inode, size, allocated)
+_ShardResult = tuple[int, int, bool, tuple[tuple[int, int, int, int], ...]]
+
+
+def _scan_shard(dirs: tuple[str, ...], deadline: float, claimed: Optional[dict[str, bool]] = None) -> _ShardResult:
+    """
+    Counts size of everything inside the directories in worker process.
+
+    :param dirs: Paths to the directories as a posix
+    :param deadline: Time budget of the shard as :func:`time.monotonic` time
+    :param claimed: Matches inside the directories claimed by other scans
+    :return: Compact result of the shard
+    """
+
+    result = ScanResult()
+    links = _LinkLog()
+    claims = _Claims(claimed) if claimed else None
+
+    try:
+        for dir_posix in dirs:
+            _scan_tree(dir_posix, result, links, deadline, claims)
+    except _DeadlineExceeded:
+        result.incomplete = True
+
+    return (
+        result.size,
+        result.allocated,
+        result.incomplete,
+        tuple((device, inode, size, allocated) for (device, inode), (size, allocated) in links.links.items()),
+    )
+
+
+@final
+class ProcessScanner(_BaseScanner):
+    """
+    Resolves paths with pool of processes.
+
+    Main process expands paths and lists top levels of every matched directory to split it into shards.
+    Shards are counted in worker processes w/o sharing the GIL and return only totals and hardlinked files,
+    which are counted once by the main process.
+
+    :param predicate: Filter for matches (e.g. deletable ones), matches failing it are skipped
+    :param max_in_flight_per_worker: Number of paths being scanned at once per worker
+    :param target_budget: Time budget (in seconds) of each path from the start of its scan
+    :param total_budget: Time budget (in seconds) of the whole scan
+    :param grace_period: Time (in seconds) given to scans after deadline before taking partial results
+    :param max_workers: Number of worker processes
+    """
+
+    # Number of shards of each directory per worker
+    _SHARDS_PER_WORKER: Final[int] = 4
+
+    # Max number of levels listed by the main process for splitting
+    _MAX_SPLIT_DEPTH: Final[int] = 3
+
+    def __init__(
+        self,
+        predicate: Optional[Callable[[str], bool]] = None,
+        max_in_flight_per_worker: int = 2,
+        target_budget: float = 60.0,
+        total_budget: float = 300.0,
+        grace_period: float = 1.0,
+        max_workers: Optional[int] = None,
+    ):
+        from os import cpu_count
+
+        super().__init__(
+            predicate=predicate,
+            max_in_flight_per_worker=max_in_flight_per_worker,
+            target_budget=target_budget,
+            total_budget=total_budget,
+            grace_period=grace_period,
+            # One process per core
+            max_workers=max_workers or cpu_count() or 1,
+        )
+
+        # Submitted shards with their targets and totals of the matches
+        self.__shards: Final[dict["Future[_ShardResult]", tuple[_Target, ScanResult]]] = dict()
+
+    def __split(self, dir_posix: str, total: ScanResult, deadline: float) -> list[str]:
+        """Lists top levels of the directory :return: Directories left for shards."""
+
+        frontier = [dir_posix]
+
+        for _ in range(self._MAX_SPLIT_DEPTH):
+            if len(frontier) >= self.max_workers * self._SHARDS_PER_WORKER:
+                break
+
+            _check_deadline(deadline)
+
+            frontier = [subdir for parent in frontier for subdir in _list_dir(parent, total, self.inodes, self._claims)]
+
+        return frontier
+
+    def __submit(
+        self, executor: "ProcessPoolExecutor", target: _Target, total: ScanResult, match_posix: str, dirs: list[str]
+    ) -> None:
+        """Splits directories of the match evenly between shards and submits them to workers."""
+
+        shard_count = min(len(dirs), self.max_workers * self._SHARDS_PER_WORKER)
+
+        # Matches claimed later inside the match are skipped by their scans, so snapshot is enough
+        claims: dict[str, bool] = self._claims.nested(match_posix) if shard_count else dict()
+
+        for index in range(shard_count):
+            future = executor.submit(_scan_shard, tuple(dirs[index::shard_count]), target.deadline, claims)
+
+            self.__shards[future] = (target, total)
+            target.pending += 1
+
+    def __start(self, executor: "ProcessPoolExecutor", target: _Target) -> None:
+        """Expands target into matches and submits their shards."""
+
+        try:
+            for match_posix, stat_, contents_only in self._expand_target(target):
+                total = ScanResult()
+
+                # Matches counted by other paths are kept with empty totals
+                is_scanned = self._count_claimed(match_posix, total, stat_, contents_only=contents_only)
+
+                target.matches.append((match_posix, total))
+
+                if is_scanned:
+                    self.__submit(
+                        executor, target, total, match_posix, self.__split(match_posix, total, target.deadline)
+                    )
+        except _DeadlineExceeded:
+            target.incomplete = True
+
+        # Expansion is done
+        target.pending -= 1
+
+    def __fill(
+        self, executor: "ProcessPoolExecutor", in_flight: set[_Target], paths: Iterator[Path_]
+    ) -> Generator[_Target, None, None]:
+        """Starts pending paths until submission window is full :return: Yields targets finished w/o shards."""
+
+        while len(in_flight) < self._window and (path_ := next(paths, None)) is not None:
+            self.__start(executor, target := _Target(path_))
+
+            if target.pending:
+                in_flight.add(target)
+            else:
+                yield target
+
+    def __merge(self, future: "Future[_ShardResult]") -> _Target:
+        """Adds result of the shard to its match :return: Target of the shard."""
+
+        target, total = self.__shards.pop(future)
+        size, allocated, incomplete, links = future.result()
+
+        total.add(ScanResult(size=size, allocated=allocated))
+        target.incomplete |= incomplete
+
+        # Hardlinked files are counted once across all shards
+        for device, inode, link_size, link_allocated in links:
+            if self.inodes.add(device, inode):
+                total.add(ScanResult(size=link_size, allocated=link_allocated))
+
+        target.pending -= 1
+
+        return target
+
+    def scan(
+        self, paths: Iterable[Path_], plan: Optional[TraversalPlan] = None
+    ) -> Generator[tuple[Path_, ResolvedTarget], None, None]:
+        """
+        Resolves paths and yields them in order of completion.
+
+        :param paths: Paths to be resolved
+        :param plan: Traversal plan of the paths, planned paths are expanded at once
+        :return: Yields paths with their resolved targets
+        """
+
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        # Paths waiting for submission and paths being scanned
+        pending_paths = iter(paths)
+        in_flight: set[_Target] = set()
+
+        self._start_scan(plan)
+
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        completed = False
+
+        # Some of the shards are stuck
+        stuck = False
+
+        try:
+            while True:
+                for target in self.__fill(executor, in_flight, pending_paths):
+                    yield target.path, target.resolved()
+
+                if not in_flight:
+                    completed = not stuck
+                    break
+
+                # Shards stop on deadline by themselves, timeout is only hit if they are stuck
+                done, _ = wait(self.__shards, timeout=self._wait_timeout(in_flight), return_when=FIRST_COMPLETED)
+
+                if not done:
+                    stuck = True
+                    yield from self._abandon_overdue(in_flight, pending_paths)
+                    continue
+
+                for future in done:
+                    # Abandoned scans are already yielded
+                    if not (target := self.__merge(future)).pending and target in in_flight:
+                        in_flight.discard(target)
+
+                        yield target.path, target.resolved()
+        # Stop without waiting for scans
+        except KeyboardInterrupt:
+            return
+        finally:
+            # Stuck and interrupted workers are terminated
+            if not completed:
+                for process in list((executor._processes or dict()).values()):  # noqa
+                    process.terminate()
+
+            executor.shutdown(wait=completed, cancel_futures=not completed)
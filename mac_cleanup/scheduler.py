@@ -0,0 +1,196 @@
+"""Scheduler running independent units at the same time."""
+
+from typing import TYPE_CHECKING, Any, Callable, Final, Iterable, Optional, final
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+    from mac_cleanup.core import Unit
+
+
+@final
+class _Job:
+    """Unit with its constraints."""
+
+    __slots__ = ("unit", "resources", "dependencies")
+
+    def __init__(self, unit: "Unit"):
+        self.unit: Final = unit
+
+        # Resources used by the modules (None if there are none, empty set if unit runs alone)
+        resources = [module.get_resources for module in unit.modules if module.get_resources is not None]
+
+        self.resources: Final[Optional[frozenset[str]]] = (
+            (frozenset[str]().union(*resources) if all(resources) else frozenset()) if resources else None
+        )
+
+        # Jobs to be finished before this one
+        self.dependencies: Final[set[_Job]] = set()
+
+    def conflicts(self, other: "_Job") -> bool:
+        """Checks if jobs can't run at the same time."""
+
+        # Units running alone conflict with any unit
+        if self.resources == frozenset() or other.resources == frozenset():
+            return True
+
+        if self.resources is None or other.resources is None:
+            return False
+
+        return bool(self.resources & other.resources)
+
+
+@final
+class Scheduler:
+    """
+    Runs units on a bounded pool of threads.
+
+    Modules inside a unit are executed in their order. Units are started in their order, once units of
+    modules in :meth:`mac_cleanup.core_modules.BaseModule.after` are finished and no conflicting units
+    (:meth:`mac_cleanup.core_modules.BaseModule.exclusive`) are running. Unit running alone is never
+    overtaken by later units, unless it waits for them.
+
+    Units may be streamed by an iterator (e.g. while modules are being registered), so units are started
+    before the rest of them is available. Modules of units not available yet are ignored in
+    :meth:`mac_cleanup.core_modules.BaseModule.after`
+
+    :param units: Units to be executed (list or stream of them)
+    :param max_workers: Number of units running at the same time
+    """
+
+    # Max number of units running at the same time (most of them wait for commands)
+    _MAX_WORKERS: Final[int] = 4
+
+    def __init__(self, units: Iterable["Unit"], max_workers: Optional[int] = None):
+        self.max_workers: Final[int] = max_workers or self._MAX_WORKERS
+
+        self.__units: Final[Iterable["Unit"]] = units
+
+        # Map modules to their jobs
+        self.__jobs_by_module: Final[dict[int, _Job]] = dict()
+
+    def __add(self, units: Iterable["Unit"]) -> list[_Job]:
+        """Creates jobs of the units with dependencies on the known jobs."""
+
+        jobs = [_Job(unit) for unit in units]
+
+        for job in jobs:
+            for module in job.unit.modules:
+                self.__jobs_by_module[id(module)] = job
+
+        for job in jobs:
+            for module in job.unit.modules:
+                for dependency in module.get_after:
+                    dependency_job = self.__jobs_by_module.get(id(dependency))
+
+                    if dependency_job is not None and dependency_job is not job:
+                        job.dependencies.add(dependency_job)
+
+        self.__check_cycles(jobs)
+
+        return jobs
+
+    @staticmethod
+    def __check_cycles(jobs: list[_Job]) -> None:
+        """Raises ValueError if the new jobs have cyclic dependencies (known jobs don't depend on them)"""
+
+        blocked = set(jobs)
+
+        # Remove jobs w/o dependencies on the blocked ones until none are left
+        while blocked:
+            if not (free := {job for job in blocked if not job.dependencies & blocked}):
+                raise ValueError("Units have cyclic dependencies")
+
+            blocked -= free
+
+    @staticmethod
+    def __can_start(job: _Job, finished: set[_Job], running: list[_Job]) -> bool:
+        """Checks if all dependencies of the job are finished and it doesn't conflict with running jobs."""
+
+        return job.dependencies <= finished and not any(job.conflicts(other) for other in running)
+
+    def __start(
+        self,
+        executor: "Executor",
+        execute: Callable[["Unit"], None],
+        pending: list[_Job],
+        running: dict["Future[None]", _Job],
+        finished: set[_Job],
+    ) -> None:
+        """Starts pending jobs in their order while there are free workers."""
+
+        for job in list(pending):
+            if len(running) >= self.max_workers:
+                break
+
+            if self.__can_start(job, finished, list(running.values())):
+                pending.remove(job)
+                running[executor.submit(execute, job.unit)] = job
+            # Don't overtake unit waiting to run alone (units it depends on may be later ones)
+            elif job.resources == frozenset() and job.dependencies <= finished:
+                break
+
+    def run(self, execute: Callable[["Unit"], None]) -> None:
+        """
+        Executes all units.
+
+        :param execute: Function executing modules of the unit
+        """
+
+        from collections.abc import Sequence
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        pending: list[_Job] = list()
+        finished: set[_Job] = set()
+        running: dict[Future[None], _Job] = dict()
+
+        # First error of the units or of the stream
+        error: Optional[BaseException] = None
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mac_cleanup_unit")
+
+        # Stream of units is read in the separate thread, so running units aren't blocked by it
+        feeder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mac_cleanup_feed")
+        stream: Optional[Future[Optional[Unit]]] = None
+
+        units = iter(self.__units)
+
+        if isinstance(self.__units, Sequence):
+            pending.extend(self.__add(units))
+        else:
+            stream = feeder.submit(next, units, None)
+
+        try:
+            while pending or running or stream is not None:
+                self.__start(executor, execute, pending, running, finished)
+
+                futures: list[Future[Any]] = [*running]
+
+                if stream is not None:
+                    futures.append(stream)
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    # Take the next unit from the stream
+                    if stream is not None and future is stream:
+                        if (error := error or stream.exception()) is None and (unit := stream.result()) is not None:
+                            pending.extend(self.__add([unit]))
+                            stream = feeder.submit(next, units, None)
+                        else:
+                            stream = None
+                    else:
+                        finished.add(running.pop(future))
+                        error = error or future.exception()
+
+                    # Finish running units w/o starting new ones
+                    if error is not None:
+                        pending.clear()
+                        stream = None
+        # Running units aren't waited for on interrupt
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            feeder.shutdown(wait=False, cancel_futures=True)
+
+        if error is not None:
+            raise error
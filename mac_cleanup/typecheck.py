@@ -0,0 +1,36 @@
+"""Switch of runtime type checking in helpers and modules."""
+
+from os import environ
+from typing import Any, Callable, Final, TypeVar
+
+T = TypeVar("T", bound=Callable[..., Any])
+
+# Environment variable switching runtime type checking (read on import of decorated functions)
+TYPECHECK_ENV: Final[str] = "MAC_CLEANUP_TYPECHECK"
+
+# Values of the environment variable disabling runtime type checking
+_DISABLED_VALUES: Final[frozenset[str]] = frozenset({"0", "false", "no", "off"})
+
+
+def is_typecheck_enabled() -> bool:
+    """Checks if runtime type checking is enabled (it is unless disabled in the environment)"""
+
+    return environ.get(TYPECHECK_ENV, "").strip().lower() not in _DISABLED_VALUES
+
+
+def typechecked(func: T) -> T:
+    """
+    Decorator checking types of arguments and returns with beartype in runtime.
+
+    Function is returned as is if runtime type checking is disabled, so calls don't pay for the wrapper.
+
+    :param func: Function to be decorated
+    :return: Decorated function or the function itself
+    """
+
+    if not is_typecheck_enabled():
+        return func
+
+    from beartype import beartype  # pyright: ignore [reportUnknownVariableType]
+
+    return beartype(func)
@@ -1,35 +1,26 @@
 from pathlib import Path
-from typing import Optional, cast
+from typing import Optional
 
-from beartype import beartype  # pyright: ignore [reportUnknownVariableType]
-from xattr import xattr  # pyright: ignore [reportMissingTypeStubs]
+from mac_cleanup.typecheck import typechecked
 
 
-@beartype
-def cmd(command: str, *, ignore_errors: bool = True) -> str:
+@typechecked
+def cmd(command: str | list[str], *, ignore_errors: bool = True, timeout: Optional[float | int] = None) -> str:
     """
-    Executes command in Popen.
+    Executes command w/o shell if it's not needed.
 
-    :param command: Bash command
+    :param command: Bash command or arguments
     :param ignore_errors: If True, no stderr in return
+    :param timeout: Time (in seconds) before the command is killed, waits forever if not specified
     :return: stdout of executed command
     """
 
-    from subprocess import DEVNULL, PIPE, Popen
+    from mac_cleanup.runner import runner
 
-    # Get stdout and stderr from PIPE
-    out_tuple = Popen(command, shell=True, stdout=PIPE, stderr=(DEVNULL if ignore_errors else PIPE)).communicate()
+    return runner.run(command, ignore_errors=ignore_errors, timeout=timeout).output
 
-    # Cast correct type on out_tuple
-    out_tuple = cast(tuple[Optional[bytes], Optional[bytes]], out_tuple)
 
-    # Filter NoneType output and decode it
-    filtered_out = [out.decode("utf-8", errors="replace").strip() for out in out_tuple if out is not None]
-
-    return "".join(filtered_out)
-
-
-@beartype
+@typechecked
 def expanduser(str_path: str) -> str:
     """
     Expands user.
@@ -43,13 +34,14 @@ def expanduser(str_path: str) -> str:
     return Path(str_path).expanduser().as_posix()
 
 
-@beartype
-def check_exists(path: Path | str, *, expand_user: bool = True) -> bool:
+@typechecked
+def check_exists(path: Path | str, *, expand_user: bool = True, cached: bool = True) -> bool:
     """
     Checks if path exists.
 
     :param path: Path to be checked
     :param expand_user: True if path needs to be expanded
+    :param cached: True if result of the previous check within the run can be used (e.g. on registration)
     :return: True if specified path exists
     """
 
@@ -59,14 +51,21 @@ def check_exists(path: Path | str, *, expand_user: bool = True) -> bool:
     if expand_user:
         path = path.expanduser()
 
+    from mac_cleanup.scanner import _is_glob  # noqa
+
     # If glob return True (it'll delete nothing at the end, hard to handle otherwise)
-    if "*" in path.as_posix():
+    if _is_glob(path.as_posix()):
         return True
 
+    if cached:
+        from mac_cleanup.probe import get_probe
+
+        return get_probe().exists(path)
+
     return path.exists()
 
 
-@beartype
+@typechecked
 def check_deletable(path: Path | str) -> bool:
     """
     Checks if path is deletable.
@@ -75,32 +74,18 @@ def check_deletable(path: Path | str) -> bool:
     :return: True if specified path is deletable
     """
 
+    from mac_cleanup.policy import get_policy
+
     # Convert path to correct type
     if not isinstance(path, Path):
         path_: Path = Path(path)
     else:
         path_ = path
 
-    sip_list = ["/System", "/usr", "/sbin", "/Applications", "/Library", "/usr/local"]
-
-    user_list = ["~/Documents", "~/Downloads", "~/Desktop", "~/Movies", "~/Pictures"]
-
-    # Returns False if empty
-    if (path_posix := path_.as_posix()) == ".":
-        return False
-
-    # If glob return True (it'll delete nothing at the end, hard to handle otherwise)
-    if "*" in path_posix:
-        return True
-
-    # Returns False if path startswith anything from SIP list or in custom list
-    if any(path_posix.startswith(protected_path) for protected_path in list(map(expanduser, sip_list + user_list))):
-        return False
-
-    return "com.apple.rootless" not in xattr(path_posix)
+    return get_policy().is_deletable(path_.as_posix())
 
 
-@beartype
+@typechecked
 def bytes_to_human(size_bytes: int | float) -> str:
     """
     Converts bytes to human-readable format.
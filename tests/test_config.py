@@ -2,7 +2,7 @@
 
 import tempfile
 from pathlib import Path
-from typing import IO, Callable, Optional
+from typing import IO, Callable, Iterator, Optional
 
 import pytest
 import toml
@@ -45,6 +45,24 @@ def dummy_key() -> Callable[..., str]:
     return lambda: key.ENTER
 
 
+@pytest.fixture(autouse=True)
+def module_index(tmp_path: Path, monkeypatch: MonkeyPatch) -> Iterator[None]:
+    """Keep cache of probes and index of custom modules in tmp_path."""
+
+    from mac_cleanup.module_index import get_module_index
+    from mac_cleanup.probe import get_probe
+
+    monkeypatch.setattr("mac_cleanup.probe.get_cache_dir", lambda: tmp_path.joinpath("cache"))
+
+    get_probe.cache_clear()
+    get_module_index.cache_clear()
+
+    yield
+
+    get_probe.cache_clear()
+    get_module_index.cache_clear()
+
+
 class TestConfig:
     @pytest.mark.parametrize("enabled", [1, 2])
     def test_init_enabled_modules(self, enabled: int):
@@ -97,6 +115,27 @@ class TestConfig:
         # Assert that custom path is correct
         assert config.get_custom_path == custom_path
 
+    def test_init_protected(self, tmp_path: Path):
+        """Test protected paths being added to the policy in :class:`mac_cleanup.config.Config`"""
+
+        from mac_cleanup.policy import get_policy
+
+        # Create dummy ConfigFile with protected path
+        test_config = ConfigFile(enabled=["test"], custom_path=None, protected=[tmp_path.as_posix()])
+
+        (config_path := tmp_path.joinpath("config.toml")).write_text(toml.dumps(test_config))
+
+        get_policy.cache_clear()
+
+        try:
+            assert get_policy().is_deletable(tmp_path.joinpath("file").as_posix())
+
+            Config(config_path_=config_path)
+
+            assert not get_policy().is_deletable(tmp_path.joinpath("file").as_posix())
+        finally:
+            get_policy.cache_clear()
+
     @staticmethod
     def config_call_final_checks(
         config: Config,
@@ -376,6 +415,112 @@ class TestConfig:
         # Check enabled modules
         assert config.get_config_data.get("enabled") == [dummy_module_name]
 
+    def test_call_lazy_custom_modules(self, tmp_path: Path, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+        """Test only files of enabled custom modules being loaded in :class:`mac_cleanup.config.Config`"""
+
+        from mac_cleanup.module_index import ModuleIndex
+
+        (modules_dir := tmp_path.joinpath("modules")).mkdir()
+
+        modules_dir.joinpath("enabled.py").write_text(
+            "def enabled_module():\n    print('enabled_output')\n\n\ndef other_module():\n    pass\n"
+        )
+
+        # File failing on execution
+        modules_dir.joinpath("expensive.py").write_text("raise RuntimeError\n\n\ndef disabled_module():\n    pass\n")
+
+        # Simulate default module overridden by custom one
+        def dummy_load_default(cfg_self: Config) -> None:
+            cfg_self.get_modules.update({"other_module": lambda: None})
+
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__load_default", dummy_load_default)
+
+        # Simulate config read
+        def dummy_read(self: Config) -> ConfigFile:  # noqa
+            return ConfigFile(enabled=["enabled_module"], custom_path=modules_dir.as_posix())
+
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__read", dummy_read)
+
+        # Simulate index with cache in tmp_path
+        monkeypatch.setattr(
+            "mac_cleanup.module_index.get_module_index", lambda: ModuleIndex(tmp_path.joinpath("index.json"))
+        )
+
+        config = Config(Path(""))
+
+        # Check custom modules are indexed w/o loading
+        assert config.get_custom_files == {
+            "enabled_module": modules_dir.joinpath("enabled.py"),
+            "other_module": modules_dir.joinpath("enabled.py"),
+            "disabled_module": modules_dir.joinpath("expensive.py"),
+        }
+
+        config(configuration_prompted=False)
+
+        # Check enabled module is called
+        assert "enabled_output" in capsys.readouterr().out
+
+        # Check modules of the loaded file override default ones
+        assert config.get_modules["other_module"].__module__ == "enabled"
+        assert config.get_custom_files == {"disabled_module": modules_dir.joinpath("expensive.py")}
+
+    def test_call_not_indexed_modules(self, tmp_path: Path, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+        """Test modules missed by the index being found in :class:`mac_cleanup.config.Config`"""
+
+        (modules_dir := tmp_path.joinpath("modules")).mkdir()
+
+        modules_dir.joinpath("lambdas.py").write_text("lambda_module = lambda: print('lambda_output')  # noqa\n")
+        modules_dir.joinpath("imported.py").write_text("from platform import system as imported_module\n")
+
+        # Clear default modules list
+        dummy_load_default: Callable[[Config], None] = lambda cfg_self: None
+
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__load_default", dummy_load_default)
+
+        test_config = ConfigFile(enabled=["lambda_module", "imported_module", "missing_module"], custom_path=None)
+        test_config["custom_path"] = modules_dir.as_posix()
+
+        (config_path := tmp_path.joinpath("config.toml")).write_text(toml.dumps(test_config))
+
+        config = Config(config_path_=config_path)
+
+        # Check modules aren't indexed
+        assert not config.get_custom_files
+
+        config(configuration_prompted=False)
+
+        assert "lambda_output" in capsys.readouterr().out
+
+        # Check only module missing from all files is removed from config
+        assert toml.loads(config_path.read_text())["enabled"] == ["lambda_module", "imported_module"]
+
+    def test_init_not_indexed_custom_modules(self, tmp_path: Path, monkeypatch: MonkeyPatch):
+        """Test files of custom modules, which can't be indexed, being loaded in :class:`mac_cleanup.config.Config`"""
+
+        from mac_cleanup.module_index import ModuleIndex
+
+        (modules_dir := tmp_path.joinpath("modules")).mkdir()
+        (broken_path := modules_dir.joinpath("broken.py")).write_text("def broken_module(:\n")
+
+        # Simulate config read
+        def dummy_read(self: Config) -> ConfigFile:  # noqa
+            return ConfigFile(enabled=["broken_module"], custom_path=modules_dir.as_posix())
+
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__read", dummy_read)
+
+        # Simulate index with cache in tmp_path
+        monkeypatch.setattr(
+            "mac_cleanup.module_index.get_module_index", lambda: ModuleIndex(tmp_path.joinpath("index.json"))
+        )
+
+        # Check file is executed right away
+        try:
+            with pytest.raises(SyntaxError):
+                Config(Path(""))
+        # Broken files aren't left as modules in temp directory
+        finally:
+            broken_path.unlink()
+
     def test_call_faulty_modules(self, monkeypatch: MonkeyPatch):
         """Test faulty (deleted) modules in configuration of :class:`mac_cleanup.config.Config`"""
 
@@ -415,6 +560,75 @@ class TestConfig:
         # Check enabled modules
         assert len(config.get_config_data.get("enabled")) == 0
 
+    def test_call_concurrent_modules(self, monkeypatch: MonkeyPatch):
+        """Test modules being registered concurrently in config order in :class:`mac_cleanup.config.Config`"""
+
+        from threading import Barrier, Event
+
+        from mac_cleanup.core import ProxyCollector, Unit, _Collector  # noqa
+        from mac_cleanup.core_modules import Command
+
+        # Every module has to be called before any of them is finished
+        barrier = Barrier(3)
+        finished = [Event() for _ in range(3)]
+
+        def dummy_module(num: int) -> Callable[[], None]:
+            def inner() -> None:
+                barrier.wait(timeout=5)
+
+                # Later modules finish first
+                if num + 1 < len(finished):
+                    assert finished[num + 1].wait(timeout=5)
+
+                with ProxyCollector() as unit:
+                    unit.message(f"test_concurrent{num}")
+                    unit.add(Command(f"test_concurrent{num}"))
+
+                finished[num].set()
+
+            return inner
+
+        modules_list = {f"test_concurrent{num}": dummy_module(num) for num in range(3)}
+
+        # Simulate modules list
+        def dummy_load_default(cfg_self: Config) -> None:
+            cfg_self.get_modules.update(modules_list)
+
+        # Simulate config read
+        def dummy_read(self: Config) -> ConfigFile:  # noqa
+            return ConfigFile(enabled=list(modules_list), custom_path=None)
+
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__load_default", dummy_load_default)
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__read", dummy_read)
+        monkeypatch.setattr(_Collector(), "_execute_list", list[Unit]())
+
+        config = Config(Path(""))
+
+        config(configuration_prompted=False)
+
+        # Check units are in config order
+        assert [unit.message for unit in _Collector()._execute_list] == list(modules_list)  # noqa
+
+    def test_call_module_error(self, monkeypatch: MonkeyPatch):
+        """Test error of the module being raised in :class:`mac_cleanup.config.Config`"""
+
+        def dummy_error() -> None:
+            raise ValueError("test")
+
+        # Simulate modules list
+        def dummy_load_default(cfg_self: Config) -> None:
+            cfg_self.get_modules.update({"test_ok": lambda: None, "test_error": dummy_error})
+
+        # Simulate config read
+        def dummy_read(self: Config) -> ConfigFile:  # noqa
+            return ConfigFile(enabled=["test_ok", "test_error"], custom_path=None)
+
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__load_default", dummy_load_default)
+        monkeypatch.setattr("mac_cleanup.config.Config._Config__read", dummy_read)
+
+        with pytest.raises(ValueError, match="test"):
+            Config(Path(""))(configuration_prompted=False)
+
     def test_none_modules_selected(
         self, dummy_key: Callable[..., str], capsys: CaptureFixture[str], monkeypatch: MonkeyPatch
     ):
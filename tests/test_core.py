@@ -1,10 +1,9 @@
 """All tests for mac_cleanup_py.core."""
 
-import os
-import tempfile
+from functools import partial
 from pathlib import Path as Pathlib
 from random import choice, randint
-from typing import Callable, Optional, Type
+from typing import Any, Callable, Iterable, Iterator, Optional, Type
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
@@ -13,6 +12,7 @@ from mac_cleanup.core import ProxyCollector as Collector
 from mac_cleanup.core import _Collector  # noqa
 from mac_cleanup.core import Unit
 from mac_cleanup.core_modules import BaseModule, Command, Path
+from mac_cleanup.scanner import ResolvedMatch, ResolvedTarget, Scanner, ScanResult, TraversalPlan
 
 
 class TestUnit:
@@ -115,83 +115,100 @@ class TestCollector:
         # Check no module with specified message
         assert not len([unit for unit in base_collector._execute_list if unit.message == "test_add_no_module"])
 
-    @pytest.mark.parametrize("size_multiplier", [0, 1, 1024])
-    def test_get_size(self, size_multiplier: int, base_collector: _Collector):
-        """Test :meth:`mac_cleanup.core._Collector._get_size` works correctly."""
+    def test_concurrent_units(self, base_collector: _Collector):
+        """Test units being collected from several threads in :class:`mac_cleanup.core._Collector`"""
 
-        # Get size in bytes
-        size = 1024 * size_multiplier
+        from concurrent.futures import ThreadPoolExecutor
+        from threading import Barrier
+
+        barrier = Barrier(2)
+
+        def dummy_module(message: str) -> None:
+            with Collector() as t:
+                t.message(message)
+
+                # Both units are filled at the same time
+                barrier.wait(timeout=5)
+                t.add(Path(message))
+                barrier.wait(timeout=5)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            registered = [
+                executor.submit(base_collector._register, partial(dummy_module, message))  # noqa
+                for message in ["test_concurrent_0", "test_concurrent_1"]
+            ]
+
+        units = [future.result() for future in registered]
+
+        # Check each module got its own unit
+        assert [[unit.message for unit in module_units] for module_units in units] == [
+            ["test_concurrent_0"],
+            ["test_concurrent_1"],
+        ]
+        assert [
+            [[module.get_path.name for module in unit.modules if isinstance(module, Path)] for unit in module_units]
+            for module_units in units
+        ] == [[["test_concurrent_0"]], [["test_concurrent_1"]]]
+
+        # Check units of registered modules aren't added by the collector
+        assert not [unit for unit in base_collector._execute_list if unit.message.startswith("test_concurrent")]
+
+    def test_iter_units(self, base_collector: _Collector, monkeypatch: MonkeyPatch):
+        """Test units being streamed in order of their modules in :class:`mac_cleanup.core._Collector`"""
+
+        from threading import Event
+
+        # Simulate empty collector
+        monkeypatch.setattr(base_collector, "_execute_list", list[Unit]())
+        monkeypatch.setattr(base_collector, "_registering", None)
+
+        registered = Event()
+
+        def dummy_module(message: str, event: Optional[Event] = None) -> Callable[[], None]:
+            def inner() -> None:
+                if event is not None:
+                    event.wait(timeout=5)
+
+                with Collector() as t:
+                    t.message(message)
+                    t.add(Command(message))
+
+            return inner
+
+        base_collector._register_all(  # noqa
+            [dummy_module("first"), lambda: None, dummy_module("slow", registered), dummy_module("last")]
+        )
+
+        units = base_collector._iter_units()  # noqa
+
+        # Check unit is available before later modules are registered
+        assert next(units).message == "first"
+
+        registered.set()
+
+        assert [unit.message for unit in units] == ["slow", "last"]
+        assert base_collector._registering is None
 
-        with (
-            tempfile.TemporaryDirectory() as dir_name,
-            tempfile.NamedTemporaryFile(mode="w+b", dir=dir_name, prefix="test_get_size", suffix=".test") as f,
-        ):
-            # Write random bytes with specified size
-            f.write(os.urandom(size))
-
-            # Flush from buffer
-            f.flush()
-            # Move pointer to start of file
-            f.seek(0)
-
-            assert (
-                size
-                # Check on a file
-                == base_collector._get_size(Pathlib(f.name))
-                # Check on dir
-                == base_collector._get_size(Pathlib(dir_name))
-                # Check in glob with star
-                # == base_collector._get_size(Pathlib(dir_name + "/*"))
-                # Check in glob with brackets
-                # == base_collector._get_size(Pathlib(dir_name + "/[!mac]*"))
-            )
-
-            assert (
-                0
-                # Check in glob with star
-                == base_collector._get_size(Pathlib(f.name + "/*"))
-                # Negative check in glob with brackets
-                == base_collector._get_size(Pathlib(dir_name + "/[!test]*"))
-            )
-
-    @pytest.mark.parametrize("is_file", [True, False])
-    def test_get_size_errors(self, is_file: bool, base_collector: _Collector, monkeypatch: MonkeyPatch):
-        """Test errors in :meth:`mac_cleanup.core._Collector._get_size`"""
-
-        # Check path doesn't exist in glob
-        assert base_collector._get_size(Pathlib("~/Documents")) == 0
-
-        error = PermissionError
-
-        # Dummy path raising error
-        def dummy_path_stat(console_self: Pathlib, follow_symlinks: bool) -> None:  # noqa  # noqa  # noqa
-            raise error
-
-        # Dummy Pathlib.is_file
-        dummy_is_file: Callable[[Pathlib], bool] = lambda path_self: is_file
-
-        # Dummy Pathlib.exists (always True)
-        dummy_exists: Callable[[Pathlib], bool] = lambda path_self: True
-
-        # Dummy Pathlib.glob (always one empty path)
-        dummy_glob: Callable[[Pathlib, str], list[Pathlib]] = lambda path_self, pattern: [Pathlib()]
-
-        # Simulate path is file and exist
-        monkeypatch.setattr("mac_cleanup.core.Path_.is_file", dummy_is_file)
-        monkeypatch.setattr("mac_cleanup.core.Path_.exists", dummy_exists)
-
-        # Simulate glob being opened
-        monkeypatch.setattr("mac_cleanup.core.Path_.glob", dummy_glob)
-
-        # Simulate error being raised
-        monkeypatch.setattr("mac_cleanup.core.Path_.stat", dummy_path_stat)
-
-        # Check PermissionError
-        base_collector._get_size(Pathlib("/"))
-
-        # Check FileNotFoundError
-        error = FileNotFoundError
-        base_collector._get_size(Pathlib("/"))
+        # Check registered units are kept
+        assert [unit.message for unit in base_collector._iter_units()] == ["first", "slow", "last"]  # noqa
+
+    def test_register_all_error(self, base_collector: _Collector, monkeypatch: MonkeyPatch):
+        """Test error of the module being raised in :meth:`mac_cleanup.core._Collector._wait_registered`"""
+
+        # Simulate empty collector
+        monkeypatch.setattr(base_collector, "_execute_list", list[Unit]())
+        monkeypatch.setattr(base_collector, "_registering", None)
+
+        def dummy_error() -> None:
+            raise KeyError("test")
+
+        base_collector._register_all([dummy_error])  # noqa
+
+        with pytest.raises(KeyError, match="test"):
+            base_collector._wait_registered()  # noqa
+
+        assert base_collector._registering is None
+        assert not base_collector._execute_list
 
     @pytest.mark.parametrize("size_multiplier", [0, 1, 1024])
     def test_extract_paths(self, size_multiplier: int, base_collector: _Collector, monkeypatch: MonkeyPatch):
@@ -200,11 +217,16 @@ class TestCollector:
         # Get size in bytes
         size = 1024 * size_multiplier
 
-        # Dummy get_size
-        dummy_get_size: Callable[[_Collector, Pathlib], float] = lambda clc_self, path: size
+        # Dummy scan
+        dummy_scan: Callable[
+            [Scanner, Iterable[Pathlib], Optional[TraversalPlan]], Iterator[tuple[Pathlib, ResolvedTarget]]
+        ] = lambda scanner_self, paths, plan: (
+            (path, ResolvedTarget(path=path, matches=(ResolvedMatch(path=path.as_posix(), size=size),)))
+            for path in paths
+        )
 
-        # Simulate get_size with specified size
-        monkeypatch.setattr("mac_cleanup.core._Collector._get_size", dummy_get_size)
+        # Simulate scan with specified size
+        monkeypatch.setattr("mac_cleanup.scanner.Scanner.scan", dummy_scan)
 
         # Simulate stuff in execute_list
         monkeypatch.setattr(base_collector, "_execute_list", [Unit(message="test", modules=[Path("~/test")])])
@@ -215,20 +237,52 @@ class TestCollector:
         # Check results
         assert len(paths) == 1
         assert paths[0][0] == Path("~/test").get_path
-        assert paths[0][1] == size
+        assert paths[0][1].size == size
+
+        # Check resolution was passed to module
+        assert isinstance(module := base_collector._execute_list[0].modules[0], Path)
+        assert (resolved := module.get_resolved) is not None
+        assert resolved.result.size == size
+
+    @pytest.mark.parametrize("processes", [True, False])
+    def test_extract_paths_backend(self, processes: bool, base_collector: _Collector, monkeypatch: MonkeyPatch):
+        """Test scanning backend being selected in :meth:`mac_cleanup.core._Collector._extract_paths`"""
+
+        from mac_cleanup.parser import args
+
+        used: list[str] = list()
+
+        # Dummy scan recording used backend
+        def dummy_scan(scanner_self: Any, paths: list[Pathlib], plan: Any) -> Any:
+            used.append(type(scanner_self).__name__)
+            return iter([])
 
-    def test_extract_paths_error(self, base_collector: _Collector, monkeypatch: MonkeyPatch):
+        # Simulate scan of both backends
+        monkeypatch.setattr("mac_cleanup.scanner.Scanner.scan", dummy_scan)
+        monkeypatch.setattr("mac_cleanup.scanner.ProcessScanner.scan", dummy_scan)
+
+        # Simulate selected backend
+        monkeypatch.setattr(args, "processes", processes)
+
+        # Simulate stuff in execute_list
+        monkeypatch.setattr(base_collector, "_execute_list", [Unit(message="test", modules=[Path("~/test")])])
+
+        assert not list(base_collector._extract_paths())
+        assert used == ["ProcessScanner" if processes else "Scanner"]
+
+    def test_extract_paths_error(self, base_collector: _Collector, tmp_path: Pathlib, monkeypatch: MonkeyPatch):
         """Test errors in :meth:`mac_cleanup.core._Collector._extract_paths`"""
 
-        # Dummy get size raising KeyboardInterrupt
-        def dummy_get_size(clc_self: _Collector, path: Pathlib) -> float:  # noqa  # noqa
+        # Dummy policy check raising KeyboardInterrupt
+        def dummy_check_deletable(*args: Any) -> bool:  # noqa
             raise KeyboardInterrupt
 
-        # Simulate get_size with error
-        monkeypatch.setattr("mac_cleanup.core._Collector._get_size", dummy_get_size)
+        # Simulate error in scan worker
+        monkeypatch.setattr("mac_cleanup.policy.Policy.__call__", dummy_check_deletable)
+        monkeypatch.setattr("mac_cleanup.policy.Policy.check_all", dummy_check_deletable)
 
         # Simulate stuff in execute_list
-        monkeypatch.setattr(base_collector, "_execute_list", [Unit(message="test", modules=[Path("~/test")])])
+        monkeypatch.setattr(base_collector, "_execute_list", [Unit(message="test", modules=[Path(str(tmp_path))])])
 
         # Check prematurely exit return 0
         # Call _extract_paths
@@ -236,3 +290,160 @@ class TestCollector:
 
         # Check results
         assert len(paths) == 0
+
+    def test_extract_paths_overlap(self, base_collector: _Collector, monkeypatch: MonkeyPatch):
+        """Test nested and duplicate paths being counted once in
+        :meth:`mac_cleanup.core._Collector._extract_paths`
+        """
+
+        # Dummy scan
+        dummy_scan: Callable[
+            [Scanner, Iterable[Pathlib], Optional[TraversalPlan]], Iterator[tuple[Pathlib, ResolvedTarget]]
+        ] = lambda scanner_self, paths, plan: (
+            (path, ResolvedTarget(path=path, matches=(ResolvedMatch(path=path.as_posix(), size=1024),)))
+            for path in paths
+        )
+
+        # Simulate scan
+        monkeypatch.setattr("mac_cleanup.scanner.Scanner.scan", dummy_scan)
+
+        # Simulate overlapping paths in execute_list
+        monkeypatch.setattr(
+            base_collector,
+            "_execute_list",
+            [
+                Unit(message="test_1", modules=[Path("~/test/*"), Command("test")]),
+                Unit(message="test_2", modules=[Path("~/test/yarn"), Path("~/test/*")]),
+            ],
+        )
+
+        # Call _extract_paths
+        paths = list(base_collector._extract_paths())
+
+        # Check only covering path was counted
+        assert paths == [(Path("~/test/*").get_path, ScanResult(size=1024))]
+
+    def test_extract_paths_streamed(self, base_collector: _Collector, monkeypatch: MonkeyPatch):
+        """Test paths being scanned while modules are being registered in
+        :meth:`mac_cleanup.core._Collector._extract_paths`
+        """
+
+        scanned: list[Pathlib] = list()
+
+        # Dummy scan recording scanned paths
+        def dummy_scan(scanner_self: Any, paths: Any, plan: Any) -> Any:
+            assert plan is None
+
+            for path in paths:
+                scanned.append(path)
+                yield path, ResolvedTarget(path=path, matches=(ResolvedMatch(path=path.as_posix(), size=1024),))
+
+        # Simulate scan
+        monkeypatch.setattr("mac_cleanup.scanner.Scanner.scan", dummy_scan)
+
+        # Simulate empty collector
+        monkeypatch.setattr(base_collector, "_execute_list", list[Unit]())
+        monkeypatch.setattr(base_collector, "_registering", None)
+
+        def dummy_module(*paths: str) -> Callable[[], None]:
+            def inner() -> None:
+                with Collector() as t:
+                    for path in paths:
+                        t.add(Path(path))
+
+            return inner
+
+        base_collector._register_all(  # noqa
+            [dummy_module("~/test/yarn"), dummy_module("~/test/*", "~/test/yarn/cache", "~/test/*")]
+        )
+
+        # Call _extract_paths
+        paths = list(base_collector._extract_paths())
+
+        # Check paths covered by already scanned ones aren't scanned
+        assert scanned == [Path("~/test/yarn").get_path, Path("~/test/*").get_path]
+
+        # Check path scanned before the covering one is kept
+        assert paths == [
+            (Path("~/test/yarn").get_path, ScanResult(size=1024)),
+            (Path("~/test/*").get_path, ScanResult(size=1024)),
+        ]
+
+        # Check all units were registered
+        assert len(base_collector._execute_list) == 2
+
+    def test_extract_paths_streamed_hardlinks(
+        self, base_collector: _Collector, tmp_path: Pathlib, monkeypatch: MonkeyPatch
+    ):
+        """Test streamed paths being counted same as collapsed ones in
+        :meth:`mac_cleanup.core._Collector._extract_paths`
+        """
+
+        # Simulate directory with hardlinked file nested in glob
+        (nested_dir := tmp_path.joinpath("x", "y")).mkdir(parents=True)
+        nested_dir.joinpath("file.bin").write_bytes(b"0" * 5000)
+        nested_dir.joinpath("link.bin").hardlink_to(nested_dir.joinpath("file.bin"))
+
+        def dummy_module(path: Pathlib) -> Callable[[], None]:
+            def inner() -> None:
+                with Collector() as t:
+                    t.add(Path(str(path)))
+
+            return inner
+
+        modules = [dummy_module(nested_dir), dummy_module(tmp_path.joinpath("x", "*"))]
+
+        # Scan all paths at once
+        monkeypatch.setattr(base_collector, "_execute_list", list[Unit]())
+        base_collector._register_all(modules)  # noqa
+        base_collector._wait_registered()  # noqa
+
+        expected = sum(size.size for _, size in base_collector._extract_paths())
+
+        # Scan paths while modules are being registered
+        monkeypatch.setattr(base_collector, "_execute_list", list[Unit]())
+        monkeypatch.setattr(base_collector, "_registering", None)
+        base_collector._register_all(modules)  # noqa
+
+        assert sum(size.size for _, size in base_collector._extract_paths()) == expected
+
+        # Check nested directory and hardlinked file were counted once
+        assert expected == nested_dir.lstat().st_size + 5000
+
+    def test_extract_paths_window(self, base_collector: _Collector, tmp_path: Pathlib, monkeypatch: MonkeyPatch):
+        """Test bounded submission and path correlation in
+        :meth:`mac_cleanup.core._Collector._extract_paths`
+        """
+
+        from mac_cleanup import scanner
+
+        # Count submitted paths
+        submitted: list[Pathlib] = list()
+        original_target = scanner._Target  # noqa
+
+        def dummy_target(path: Pathlib) -> Any:
+            submitted.append(path)
+            return original_target(path)
+
+        monkeypatch.setattr("mac_cleanup.scanner._Target", dummy_target)
+
+        # Simulate lots of files with size based on their names
+        for num in range(1, 300):
+            tmp_path.joinpath(str(num)).write_bytes(b"0" * num)
+
+        modules: list[BaseModule] = [Path(str(tmp_path.joinpath(str(num)))) for num in range(1, 300)]
+        monkeypatch.setattr(base_collector, "_execute_list", [Unit(message="test", modules=modules)])
+
+        yielded = 0
+
+        for path, size in base_collector._extract_paths():
+            yielded += 1
+
+            # Check path corresponds to its size
+            assert int(path.name) == size.size
+
+            # Check submission window is bounded
+            assert len(submitted) - yielded < 32 * base_collector._MAX_IN_FLIGHT_PER_WORKER
+
+        # Check every path was submitted once
+        assert yielded == len(submitted) == len(modules)
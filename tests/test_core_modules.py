@@ -2,7 +2,7 @@
 
 import tempfile
 from pathlib import Path as Pathlib
-from typing import IO, Callable, Optional, cast
+from typing import IO, Any, Callable, Optional, cast
 
 import pytest
 from _pytest.capture import CaptureFixture
@@ -113,6 +113,18 @@ class TestCommand:
         # Check if stderr wasn't captured
         assert "test" not in captured_execute
 
+    def test_with_timeout(self):
+        """Test killing command on timeout in :class:`mac_cleanup.core_modules.Command`"""
+
+        command = Command("echo 'test'; sleep 10").with_timeout(0.3)
+
+        assert command.get_timeout == 0.3
+        assert command._execute() == "test"
+
+        # Check result of the killed command
+        assert command.get_result is not None
+        assert command.get_result.timed_out
+
 
 class TestPath:
     @pytest.mark.parametrize("is_file", [True, False])
@@ -241,7 +253,7 @@ class TestPath:
         dummy_deletable: Callable[[Pathlib | str], bool] = lambda path: deletable
 
         # Dummy check_exists utility
-        dummy_exists: Callable[[Pathlib | str, bool], bool] = lambda path, expand_user: exist
+        dummy_exists: Callable[[Pathlib | str, bool, bool], bool] = lambda path, expand_user, cached: exist
 
         # Get tmp file
         with tempfile.NamedTemporaryFile(mode="w+") as f:
@@ -259,3 +271,76 @@ class TestPath:
 
             # Check file exists
             assert tmp_path.exists()
+
+    def test_execute_resolved(self, tmp_path: Pathlib, monkeypatch: MonkeyPatch):
+        """Test only resolved matches being deleted in :class:`mac_cleanup.core_modules.Path`"""
+
+        from mac_cleanup.scanner import ResolvedMatch, ResolvedTarget
+
+        # Dummy check raising error (resolved paths shouldn't be checked again)
+        def dummy_check(*args: Any, **kwargs: Any) -> bool:  # noqa
+            raise AssertionError
+
+        monkeypatch.setattr("mac_cleanup.core_modules.check_deletable", dummy_check)
+        monkeypatch.setattr("mac_cleanup.core_modules.check_exists", dummy_check)
+
+        # Create dummy files
+        for name in ["a b", "b", "c"]:
+            tmp_path.joinpath(name).touch()
+
+        path = Path(tmp_path.joinpath("*").as_posix())
+
+        # Check no matches
+        path._set_resolved(ResolvedTarget(path=path.get_path))
+        assert path._execute() is None
+        assert len(list(tmp_path.iterdir())) == 3
+
+        # Simulate "c" being created after dry run
+        path._set_resolved(
+            ResolvedTarget(
+                path=path.get_path,
+                matches=tuple(ResolvedMatch(path=tmp_path.joinpath(name).as_posix()) for name in ["a b", "b"]),
+            )
+        )
+
+        path._execute()
+
+        # Check only resolved matches were deleted
+        assert [file.name for file in tmp_path.iterdir()] == ["c"]
+
+        # Check removal result
+        assert path.get_removed is not None
+        assert path.get_removed.files == 2
+
+    @pytest.mark.parametrize("resolved", [True, False])
+    def test_execute_background(self, resolved: bool, tmp_path: Pathlib, monkeypatch: MonkeyPatch):
+        """Test paths being staged in background mode of :class:`mac_cleanup.core_modules.Path`"""
+
+        from mac_cleanup.reclaimer import get_reclaimer
+        from mac_cleanup.scanner import ResolvedMatch, ResolvedTarget
+
+        # Simulate background mode with data directory in tmp_path
+        monkeypatch.setattr("mac_cleanup.parser.Args.background_delete", True)
+        monkeypatch.setenv("XDG_DATA_HOME", tmp_path.joinpath("data").as_posix())
+        get_reclaimer.cache_clear()
+
+        (target := tmp_path.joinpath("target")).mkdir()
+        target.joinpath("a").touch()
+
+        path = Path(target.as_posix())
+
+        if resolved:
+            path._set_resolved(ResolvedTarget(path=path.get_path, matches=(ResolvedMatch(path=target.as_posix()),)))
+
+        try:
+            path._execute()
+
+            # Check path was moved into staging
+            assert not target.exists()
+            assert path.get_removed is not None
+            assert path.get_removed.staged == 1
+
+            get_reclaimer().release()
+            get_reclaimer().reclaim()
+        finally:
+            get_reclaimer.cache_clear()
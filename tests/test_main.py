@@ -1,7 +1,7 @@
 """Test main script in mac_cleanup_py.main."""
 
 from pathlib import Path as Pathlib
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 
 import pytest
 from _pytest.capture import CaptureFixture
@@ -12,6 +12,7 @@ from mac_cleanup.config import Config
 from mac_cleanup.core import Unit
 from mac_cleanup.core_modules import BaseModule
 from mac_cleanup.main import EntryPoint
+from mac_cleanup.scanner import ScanResult
 
 
 class TestEntryPoint:
@@ -104,6 +105,155 @@ class TestEntryPoint:
         # Check correct size in stdout
         assert f"Removed - {size_multiplier / 2} GB" in captured_stdout
 
+    def test_cleanup_verbose(self, tmp_path: Pathlib, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+        """Test removed size of the paths in verbose cleanup in :class:`mac_cleanup.main.EntryPoint`"""
+
+        # Create dummy files
+        for name in ["a", "b"]:
+            tmp_path.joinpath(name).write_bytes(b"0" * 512)
+
+        # Simulate verbose
+        monkeypatch.setattr("mac_cleanup.parser.Args.verbose", True)
+
+        entry_point = EntryPoint()
+
+        # Simulate execution list in BaseCollector
+        monkeypatch.setattr(
+            entry_point.base_collector,
+            "_execute_list",
+            [Unit(message="test", modules=[Path(tmp_path.joinpath("*").as_posix()), Command("test")])],
+        )
+
+        entry_point.cleanup()
+
+        # Check removed size and number of files
+        output = capsys.readouterr().out
+
+        # Check removed size and number of files with policy stats
+        assert "1.0 KB (2 files)" in output
+        assert "Extended attributes:" in output
+        assert not any(tmp_path.iterdir())
+
+    def test_cleanup_parallel_units(self, tmp_path: Pathlib, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+        """Test units running at the same time in cleanup in :class:`mac_cleanup.main.EntryPoint`"""
+
+        # Create dummy files
+        for name in ["a", "b"]:
+            tmp_path.joinpath(name).write_bytes(b"0" * 512)
+
+        # Simulate verbose with parallel units
+        monkeypatch.setattr("mac_cleanup.parser.Args.verbose", True)
+        monkeypatch.setattr("mac_cleanup.parser.Args.parallel_units", True)
+
+        entry_point = EntryPoint()
+
+        # Simulate execution list in BaseCollector
+        monkeypatch.setattr(
+            entry_point.base_collector,
+            "_execute_list",
+            [
+                Unit(message="test_1", modules=[Path(tmp_path.joinpath("a").as_posix()), Command("test")]),
+                Unit(message="test_2", modules=[Path(tmp_path.joinpath("b").as_posix())]),
+            ],
+        )
+
+        entry_point.cleanup()
+
+        # Check removed size of both paths
+        assert capsys.readouterr().out.count("512.0 B (1 files)") == 2
+        assert not any(tmp_path.iterdir())
+
+    @pytest.mark.parametrize("parallel_units", [True, False])
+    def test_cleanup_stream(
+        self, parallel_units: bool, tmp_path: Pathlib, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch
+    ):
+        """Test units being executed while modules are being registered in :class:`mac_cleanup.main.EntryPoint`"""
+
+        from threading import Event
+
+        from mac_cleanup.core import ProxyCollector
+
+        # Create dummy files
+        for name in ["a", "b"]:
+            tmp_path.joinpath(name).write_bytes(b"0" * 512)
+
+        # Simulate verbose stream
+        monkeypatch.setattr("mac_cleanup.parser.Args.verbose", True)
+        monkeypatch.setattr("mac_cleanup.parser.Args.stream", True)
+        monkeypatch.setattr("mac_cleanup.parser.Args.parallel_units", parallel_units)
+
+        entry_point = EntryPoint()
+
+        # Simulate empty collector
+        monkeypatch.setattr(entry_point.base_collector, "_execute_list", list[Unit]())
+        monkeypatch.setattr(entry_point.base_collector, "_registering", None)
+
+        deleted = Event()
+
+        def dummy_module(name: str, event: Optional[Event] = None) -> Callable[[], None]:
+            def inner() -> None:
+                # Second module is registered after the first path is deleted
+                if event is not None:
+                    assert event.wait(timeout=5)
+
+                with ProxyCollector() as unit:
+                    unit.add(Path(tmp_path.joinpath(name).as_posix()))
+
+            return inner
+
+        # Notify once the first path is deleted
+        original_execute = EntryPoint._execute_modules
+
+        def dummy_execute(modules: Any) -> None:
+            original_execute(modules)
+            deleted.set()
+
+        monkeypatch.setattr(EntryPoint, "_execute_modules", staticmethod(dummy_execute))
+
+        entry_point.base_collector._register_all([dummy_module("a"), dummy_module("b", deleted)])  # noqa
+
+        entry_point.cleanup()
+
+        # Check removed size of both paths
+        assert capsys.readouterr().out.count("512.0 B (1 files)") == 2
+        assert not any(tmp_path.iterdir())
+
+    def test_cleanup_background(self, tmp_path: Pathlib, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+        """Test staged paths being reclaimed in background after cleanup in :class:`mac_cleanup.main.EntryPoint`"""
+
+        from mac_cleanup.reclaimer import get_reclaimer
+
+        # Simulate background mode with data directory in tmp_path
+        monkeypatch.setattr("mac_cleanup.parser.Args.background_delete", True)
+        monkeypatch.setenv("XDG_DATA_HOME", tmp_path.joinpath("data").as_posix())
+        get_reclaimer.cache_clear()
+
+        # Reclaim in place instead of detached process
+        def dummy_popen(*args: Any, **kwargs: Any) -> None:  # noqa
+            get_reclaimer().reclaim()
+
+        monkeypatch.setattr("subprocess.Popen", dummy_popen)
+
+        (target := tmp_path.joinpath("target")).mkdir()
+        target.joinpath("a").touch()
+
+        entry_point = EntryPoint()
+
+        # Simulate execution list in BaseCollector
+        monkeypatch.setattr(
+            entry_point.base_collector, "_execute_list", [Unit(message="test", modules=[Path(target.as_posix())])]
+        )
+
+        try:
+            entry_point.cleanup()
+        finally:
+            get_reclaimer.cache_clear()
+
+        # Check path was staged and reclaimed
+        assert "Staged - 1 paths" in capsys.readouterr().out
+        assert not target.exists()
+        assert not any(tmp_path.joinpath("data", "mac_cleanup_py").glob("staging*"))
+
     @pytest.mark.parametrize("cleanup_prompted", [True, False])
     @pytest.mark.parametrize("verbose", [True, False])
     def test_dry_run_prompt(
@@ -112,7 +262,9 @@ class TestEntryPoint:
         """Test dry_run with verbose and optional cleanup in :class:`mac_cleanup.main.EntryPoint`"""
 
         # Dummy _extract_paths returning [Pathlib("test") and 1 GB]
-        dummy_extract_paths: Callable[..., list[tuple[Pathlib, float]]] = lambda: [(Pathlib("test"), float(1024**3))]
+        dummy_extract_paths: Callable[..., list[tuple[Pathlib, ScanResult]]] = lambda: [
+            (Pathlib("test"), ScanResult(size=1024**3, allocated=1024**3 // 2))
+        ]
 
         # Dummy Config with empty init
         def dummy_config_init(cfg_self: Config, config_path_: Pathlib) -> None:  # noqa  # noqa
@@ -159,7 +311,7 @@ class TestEntryPoint:
 
         # Check title and body with estimated size
         assert "Dry run results" in captured_stdout
-        assert "Approx 1.0 GB will be cleaned" in captured_stdout
+        assert "Approx 1.0 GB will be cleaned (512.0 MB on disk)" in captured_stdout
 
         # Check verbose message
         if verbose:
@@ -173,11 +325,61 @@ class TestEntryPoint:
         if not cleanup_prompted:
             assert "Exiting..." in captured_stdout
 
+    def test_dry_run_incomplete(self, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+        """Test incomplete scans being listed in dry_run in :class:`mac_cleanup.main.EntryPoint`"""
+
+        # Dummy _extract_paths returning complete and incomplete paths
+        dummy_extract_paths: Callable[..., list[tuple[Pathlib, ScanResult]]] = lambda: [
+            (Pathlib("complete"), ScanResult(size=1024**3)),
+            (Pathlib("/test/[!a]*"), ScanResult(size=1024**3, incomplete=True)),
+        ]
+
+        # Dummy Config with empty init
+        def dummy_config_init(cfg_self: Config, config_path_: Pathlib) -> None:  # noqa  # noqa
+            return
+
+        # Dummy Config with empty call
+        def dummy_config_call(config_path_: Pathlib, configuration_prompted: bool) -> None:  # noqa  # noqa
+            return
+
+        # Simulate user declining cleanup
+        def dummy_get_input(*args: Any, **kwargs: Any) -> str:  # noqa
+            return "n"
+
+        monkeypatch.setattr("rich.prompt.PromptBase.get_input", dummy_get_input)
+
+        # Simulate Config with empty one
+        monkeypatch.setattr("mac_cleanup.config.Config.__init__", dummy_config_init)
+        monkeypatch.setattr("mac_cleanup.config.Config.__call__", dummy_config_call)
+
+        # Create EntryPoint and mock it
+        mock_entry_point = EntryPoint()
+        monkeypatch.setattr(EntryPoint, "__new__", lambda: mock_entry_point)
+
+        # Simulate _extract_paths with predefined result
+        monkeypatch.setattr(mock_entry_point.base_collector, "_extract_paths", dummy_extract_paths)
+
+        # Simulate dry run was prompted
+        monkeypatch.setattr("mac_cleanup.parser.Args.dry_run", True)
+
+        # Call entrypoint
+        main()
+
+        # Get stdout
+        captured_stdout = capsys.readouterr().out
+
+        # Check partial size is counted and incomplete path is listed
+        assert "Approx 2.0 GB will be cleaned" in captured_stdout
+        assert "Incomplete scans" in captured_stdout
+        assert "/test/[!a]*" in captured_stdout
+
     def test_dry_run_prompt_error(self, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
         """Test errors in dry_run in :class:`mac_cleanup.main.EntryPoint`"""
 
         # Dummy _extract_paths returning [Pathlib("test") and 1 GB]
-        dummy_extract_paths: Callable[..., list[tuple[Pathlib, float]]] = lambda: [(Pathlib("test"), float(1024**3))]
+        dummy_extract_paths: Callable[..., list[tuple[Pathlib, ScanResult]]] = lambda: [
+            (Pathlib("test"), ScanResult(size=1024**3, allocated=1024**3 // 2))
+        ]
 
         # Dummy Config with no init and empty call
         # Dummy Config with empty init
@@ -217,7 +419,7 @@ class TestEntryPoint:
 
         # Check title and body with estimated size
         assert "Dry run results" in captured_stdout
-        assert "Approx 1.0 GB will be cleaned" in captured_stdout
+        assert "Approx 1.0 GB will be cleaned (512.0 MB on disk)" in captured_stdout
 
         # Check error message and exit message
         assert "Do not enter symbols that can't be decoded to UTF-8" in captured_stdout
@@ -237,3 +439,104 @@ class TestEntryPoint:
             expected_path = "home/.mac_cleanup_py"
 
         assert str(EntryPoint().config_path) == expected_path
+
+    def test_parse_on_start(self, capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
+        """Test arguments being parsed on start of :class:`mac_cleanup.main.EntryPoint`"""
+
+        import sys
+
+        # Simulate help prompted
+        monkeypatch.setattr(sys, "argv", ["mac-cleanup", "--help"])
+
+        with pytest.raises(SystemExit):
+            EntryPoint().start()
+
+        assert "Python cleanup script for macOS" in capsys.readouterr().out
+
+    def test_max_commands(self, monkeypatch: MonkeyPatch):
+        """Test max number of commands being applied to the shared runner."""
+
+        import sys
+
+        from mac_cleanup.parser import args
+        from mac_cleanup.runner import CommandRunner
+
+        limits: list[int] = list()
+
+        # Dummy setter recording limits
+        def dummy_set_max_concurrent(_: CommandRunner, max_concurrent: int) -> None:
+            limits.append(max_concurrent)
+
+        monkeypatch.setattr(sys, "argv", ["mac-cleanup", "--max-commands", "2"])
+        # Parsed value is reset after the test
+        monkeypatch.setattr(args, "max_commands", None)
+        monkeypatch.setattr(CommandRunner, "set_max_concurrent", dummy_set_max_concurrent)
+
+        EntryPoint._parse_args()  # noqa
+
+        assert limits == [2]
+
+
+class TestColdStart:
+    # Dependencies, which are loaded only on the code paths using them (import time is in benchmarks)
+    HEAVY_MODULES: tuple[str, ...] = (
+        "beartype",
+        "inquirer",
+        "rich",
+        "rich.progress",
+        "toml",
+        "xattr",
+        "mac_cleanup.core",
+        "mac_cleanup.core_modules",
+        "mac_cleanup.runner",
+        "mac_cleanup.scanner",
+    )
+
+    @staticmethod
+    def run_python(code: str) -> str:
+        """Runs code in a new interpreter from the root of the repo :return: Last line of stdout."""
+
+        import sys
+        from subprocess import run
+
+        result = run(
+            [sys.executable, "-c", code], capture_output=True, check=True, cwd=Pathlib(__file__).parents[1], text=True
+        )
+
+        return result.stdout.splitlines()[-1]
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            # test import
+            None,
+            # test help
+            ["mac-cleanup", "--help"],
+            # test wrong argument
+            ["mac-cleanup", "--wrong"],
+        ],
+    )
+    def test_lazy_imports(self, argv: Optional[list[str]]):
+        """Test heavy dependencies aren't loaded on import and argument parsing of :mod:`mac_cleanup`"""
+
+        code = "import sys\nimport mac_cleanup\n"
+
+        if argv is not None:
+            code += f"sys.argv = {argv!r}\ntry:\n    mac_cleanup.main()\nexcept SystemExit:\n    pass\n"
+
+        code += f"print(','.join(name for name in {self.HEAVY_MODULES!r} if name in sys.modules))"
+
+        assert self.run_python(code) == ""
+
+    def test_lazy_attrs(self):
+        """Test public classes being loaded on the first access in :mod:`mac_cleanup`"""
+
+        import mac_cleanup
+        from mac_cleanup.core import ProxyCollector
+        from mac_cleanup.core_modules import Command as CommandModule
+
+        assert mac_cleanup.Collector is ProxyCollector
+        assert Command is CommandModule
+
+        with pytest.raises(AttributeError):
+            mac_cleanup.wrong  # noqa
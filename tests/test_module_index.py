@@ -0,0 +1,126 @@
+"""All tests for mac_cleanup_py.module_index."""
+
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup.module_index import ModuleIndex, get_module_index
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> ModuleIndex:
+    """Get index with cache in tmp_path."""
+
+    return ModuleIndex(tmp_path.joinpath("cache", "custom_modules.json"))
+
+
+@pytest.fixture
+def modules_dir(tmp_path: Path) -> Path:
+    """Create directory with files of custom modules."""
+
+    (nested_dir := tmp_path.joinpath("modules", "nested")).mkdir(parents=True)
+
+    nested_dir.parent.joinpath("a.py").write_text("def first():\n    pass\n\n\ndef second():\n    pass\n")
+    nested_dir.joinpath("b.py").write_text("def third():\n    pass\n")
+
+    # Not a module
+    nested_dir.joinpath("c.txt").write_text("def fourth():\n    pass\n")
+
+    return nested_dir.parent
+
+
+class TestModuleIndex:
+    @pytest.mark.parametrize(
+        ("source", "output"),
+        [
+            # test empty
+            ("", []),
+            # test functions and async functions
+            ("def a(): pass\nasync def b(): pass", ["a", "b"]),
+            # test functions in blocks
+            (
+                "import sys\n"
+                "if sys.platform:\n    def a(): pass\nelse:\n    def b(): pass\n"
+                "try:\n    def c(): pass\nexcept ImportError:\n    def d(): pass\nfinally:\n    def e(): pass\n"
+                "with open(__file__):\n    def f(): pass",
+                ["a", "b", "c", "d", "e", "f"],
+            ),
+            # test nested functions, methods, lambdas and duplicates
+            ("def a():\n    def b(): pass\nclass C:\n    def d(self): pass\ne = lambda: None\ndef a(): pass", ["a"]),
+            # test syntax error
+            ("def a(:", None),
+        ],
+    )
+    def test_scan_file(self, source: str, output: Optional[list[str]], tmp_path: Path):
+        """Test modules being found w/o executing the file in :meth:`mac_cleanup.module_index.ModuleIndex._scan_file`"""
+
+        # Broken files aren't left as modules in temp directory
+        (file_path := tmp_path.joinpath("modules.txt")).write_text(source)
+
+        assert ModuleIndex._scan_file(file_path) == output  # noqa
+
+    def test_build(self, index: ModuleIndex, modules_dir: Path, monkeypatch: MonkeyPatch):
+        """Test new and changed files being parsed in :meth:`mac_cleanup.module_index.ModuleIndex.build`"""
+
+        import os
+
+        scanned: list[str] = list()
+
+        scan_file = ModuleIndex._scan_file  # noqa
+
+        # Dummy scan counting parsed files
+        def dummy_scan_file(file_path: Path) -> Optional[list[str]]:
+            scanned.append(file_path.name)
+            return scan_file(file_path)
+
+        monkeypatch.setattr(ModuleIndex, "_scan_file", staticmethod(dummy_scan_file))
+
+        # Directory named as module isn't scanned
+        modules_dir.joinpath("d.py").mkdir()
+
+        expected = {
+            modules_dir.joinpath("a.py"): ["first", "second"],
+            modules_dir.joinpath("nested", "b.py"): ["third"],
+        }
+
+        assert index.build(modules_dir) == expected
+        assert sorted(scanned) == ["a.py", "b.py"]
+
+        # Check cache is used by the new index
+        assert ModuleIndex(index.cache_path).build(modules_dir) == expected
+        assert len(scanned) == 2
+
+        # Check changed and removed files
+        modules_dir.joinpath("a.py").write_text("def first():\n    pass\n")
+        os.utime(modules_dir.joinpath("a.py"), ns=(0, 0))
+        modules_dir.joinpath("nested", "b.py").unlink()
+
+        assert index.build(modules_dir) == {modules_dir.joinpath("a.py"): ["first"]}
+        assert scanned[2:] == ["a.py"]
+
+        from json import loads
+
+        assert list(loads(index.cache_path.read_text())) == [modules_dir.joinpath("a.py").as_posix()]
+
+    @pytest.mark.parametrize("cache", ["[", "[]", '{"a.py": []}'])
+    def test_build_broken_cache(self, cache: str, index: ModuleIndex, modules_dir: Path):
+        """Test broken cache being replaced in :meth:`mac_cleanup.module_index.ModuleIndex.build`"""
+
+        index.cache_path.parent.mkdir()
+        index.cache_path.write_text(cache.replace("a.py", modules_dir.joinpath("a.py").as_posix()))
+
+        assert index.build(modules_dir)[modules_dir.joinpath("a.py")] == ["first", "second"]
+
+    def test_get_module_index(self):
+        """Test index being shared in :func:`mac_cleanup.module_index.get_module_index`"""
+
+        from mac_cleanup.probe import get_probe
+        from mac_cleanup.reclaimer import get_data_dir
+
+        assert get_module_index() is get_module_index()
+        assert get_module_index().cache_path == get_probe().cache_path.with_name("custom_modules.json")
+
+        # Check index isn't removed with ~/Library/Caches
+        assert get_module_index().cache_path.is_relative_to(get_data_dir())
@@ -60,11 +60,22 @@ class TestParser:
         # Select actions name (short or long)
         action_index = 0 if is_short_name else 1
 
-        # Get action list
-        action_list = [action.option_strings[action_index] for action in get_parser_actions]
+        # Get action list (actions with values get a positive number)
+        action_list = [
+            arg
+            for action in get_parser_actions
+            for arg in [action.option_strings[action_index], *(["1"] if action.nargs is None else [])]
+        ]
 
         # Add actions to parser
         parser.parse_args(args=action_list, namespace=get_namespace)
 
         # Check all attrs are set
         assert all(getattr(get_namespace, attr) for attr in self.get_all_args_from_namespace(get_namespace))
+
+    @pytest.mark.parametrize("value", ["0", "-1", "test"])
+    def test_max_commands_invalid(self, value: str, get_namespace: Args):
+        """Test max number of commands being positive integer."""
+
+        with pytest.raises(SystemExit):
+            parser.parse_args(args=["--max-commands", value], namespace=get_namespace)
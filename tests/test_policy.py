@@ -0,0 +1,142 @@
+"""All tests for mac_cleanup_py.policy."""
+
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup.policy import Policy, get_policy
+
+
+class TestPolicy:
+    @pytest.mark.parametrize(
+        ("path", "output"),
+        [
+            # test SIP
+            ("/usr", False),
+            ("/usr/local/bin", False),
+            ("/Library/Caches", False),
+            # test component-wise match
+            ("/usrfoo", True),
+            ("/private/var/log", True),
+            # test user folders
+            ("~/Documents/file", False),
+            ("~/Documents2", True),
+            # test relative paths
+            ("usr/local", True),
+            # test additional paths
+            ("/protected/nested", False),
+            ("~/protected", False),
+            # test empty path and glob
+            (".", False),
+            ("/usr/*", True),
+        ],
+    )
+    def test_is_deletable(self, path: str, output: bool):
+        """Test protected roots in :meth:`mac_cleanup.policy.Policy.is_deletable`"""
+
+        policy = Policy("/protected")
+        policy.protect("~/protected")
+
+        # Expand user like modules do
+        path_posix = Path(path).expanduser().as_posix() if path.startswith("~") else path
+
+        assert policy.is_deletable(path_posix) is output
+
+    def test_rootless(self, monkeypatch: MonkeyPatch):
+        """Test SIP attributes being inherited and read once per directory in
+        :meth:`mac_cleanup.policy.Policy.is_deletable`
+        """
+
+        read: list[str] = list()
+
+        # Dummy SIP attribute of the directory
+        def dummy_has_rootless(path_posix: str) -> bool:
+            read.append(path_posix)
+            return path_posix == "/rootless"
+
+        monkeypatch.setattr("mac_cleanup.policy._has_rootless", dummy_has_rootless)
+
+        policy = Policy()
+
+        # Check contents of protected directory
+        assert not policy.is_deletable("/rootless/nested/a")
+        assert not policy.is_deletable("/rootless/nested/b")
+        assert not policy.is_deletable("/rootless")
+
+        # Check directories were read once (and children weren't read)
+        assert read == ["/", "/rootless"]
+
+        # Check paths outside of protected directory
+        assert policy.is_deletable("/other/a")
+        assert policy.is_deletable("/other/b")
+        assert read == ["/", "/rootless", "/other", "/other/a", "/other/b"]
+
+        # Check reads of directories aren't taken from saved ones
+        assert policy.get_checks == 5
+        assert policy.get_dir_reads == 3
+        assert policy.get_saved == 3
+
+    def test_get_policy(self):
+        """Test policy being shared in :func:`mac_cleanup.policy.get_policy`"""
+
+        assert get_policy() is get_policy()
+
+    def test_check_all(self, tmp_path: Path, monkeypatch: MonkeyPatch):
+        """Test batches of matches being read per directory once per inode in
+        :meth:`mac_cleanup.policy.Policy.check_all`
+        """
+
+        from threading import Lock
+
+        read: list[str] = list()
+        lock = Lock()
+
+        rootless_dir = tmp_path.joinpath("rootless")
+
+        # Dummy SIP attributes of the directory and of the file
+        def dummy_has_rootless(path_posix: str) -> bool:
+            with lock:
+                read.append(path_posix)
+            return path_posix in (rootless_dir.as_posix(), tmp_path.joinpath("a", "rootless").as_posix())
+
+        monkeypatch.setattr("mac_cleanup.policy._has_rootless", dummy_has_rootless)
+
+        # Create files in directories (enough of them to be read on the pool)
+        for name in ["a", "b", "rootless"]:
+            (dir_path := tmp_path.joinpath(name)).mkdir()
+
+            for index in range(20):
+                dir_path.joinpath(f"file_{index}").touch()
+
+        tmp_path.joinpath("a", "rootless").touch()
+
+        # Hardlink of the file in another directory
+        tmp_path.joinpath("b", "link").hardlink_to(tmp_path.joinpath("a", "file_0"))
+
+        matches = [(path_.as_posix(), path_.lstat()) for path_ in sorted(tmp_path.glob("*/*")) if not path_.is_dir()]
+
+        policy = Policy()
+
+        results = dict(zip((path_posix for path_posix, _ in matches), policy.check_all(matches), strict=True))
+
+        # Check results
+        assert not results[tmp_path.joinpath("a", "rootless").as_posix()]
+        assert not any(
+            result for path_posix, result in results.items() if path_posix.startswith(rootless_dir.as_posix())
+        )
+        assert sum(results.values()) == 41
+
+        # Check hardlinked file and contents of protected directory weren't read
+        assert tmp_path.joinpath("b", "link").as_posix() not in read
+        assert not [path_posix for path_posix in read if path_posix.startswith(rootless_dir.as_posix() + "/")]
+
+        # Check syscalls saved by inheritance and inodes
+        assert policy.get_checks == len(matches) == 62
+        assert policy.get_reads == len(read)
+        assert policy.get_dir_reads == len([path_posix for path_posix in read if Path(path_posix).is_dir()])
+        assert policy.get_saved == policy.get_checks - (policy.get_reads - policy.get_dir_reads)
+
+        # Check results are memoized
+        assert policy.check_all(matches) == list(results.values())
+        assert policy.get_reads == len(read)
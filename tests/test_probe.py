@@ -0,0 +1,151 @@
+"""All tests for mac_cleanup_py.probe."""
+
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup.probe import Probe, get_cache_dir, get_probe
+
+
+@pytest.fixture
+def probe(tmp_path: Path) -> Probe:
+    """Get probe with cache in tmp_path."""
+
+    return Probe(tmp_path.joinpath("cache", "probes.json"))
+
+
+@pytest.fixture
+def dummy_bin(tmp_path: Path, monkeypatch: MonkeyPatch) -> Path:
+    """Create directory with executable script and put it first in PATH."""
+
+    (bin_dir := tmp_path.joinpath("bin")).mkdir()
+
+    (script := bin_dir.joinpath("dummy")).write_text("#!/bin/sh\necho 'cache'\n")
+    script.chmod(0o755)
+
+    # Not executable file
+    bin_dir.joinpath("plain").write_text("")
+
+    monkeypatch.setenv("PATH", f"{bin_dir}:{tmp_path.joinpath('missing')}:{os.environ.get('PATH', '')}")
+
+    return script
+
+
+class TestProbe:
+    @pytest.mark.parametrize("data_home", ["~/data_home", None])
+    def test_cache_dir(self, data_home: Optional[str], monkeypatch: MonkeyPatch):
+        """Test cache directory outside of cleaned caches in :func:`mac_cleanup.probe.get_cache_dir`"""
+
+        if data_home is None:
+            monkeypatch.delenv("XDG_DATA_HOME", raising=False)
+            assert get_cache_dir() == Path.home().joinpath("Library", "Application Support", "mac_cleanup_py", "cache")
+        else:
+            monkeypatch.setenv("XDG_DATA_HOME", data_home)
+            assert get_cache_dir() == Path.home().joinpath("data_home", "mac_cleanup_py", "cache")
+
+    def test_which(self, probe: Probe, dummy_bin: Path, monkeypatch: MonkeyPatch):
+        """Test executables being resolved with index of PATH in :meth:`mac_cleanup.probe.Probe.which`"""
+
+        from shutil import which
+
+        assert probe.which("dummy") == dummy_bin.as_posix()
+        assert probe.which("sh") == which("sh")
+
+        # Check files w/o permissions, directories, and missing names
+        assert probe.which("plain") is None
+        assert probe.which("..") is None
+        assert probe.which("dummy_missing") is None
+
+        # Check paths aren't looked up
+        assert probe.which(dummy_bin.as_posix()) == dummy_bin.as_posix()
+
+        # Check index is rebuilt on PATH change
+        monkeypatch.setenv("PATH", "")
+        assert probe.which("dummy") is None
+
+    def test_exists(self, probe: Probe, tmp_path: Path):
+        """Test existence of paths being checked once in :meth:`mac_cleanup.probe.Probe.exists`"""
+
+        dummy_path = tmp_path.joinpath("dummy")
+
+        assert not probe.exists(dummy_path)
+
+        # Check result is memoized
+        dummy_path.touch()
+        assert not probe.exists(dummy_path)
+
+        assert probe.exists(tmp_path)
+
+    def test_output(self, probe: Probe, dummy_bin: Path, monkeypatch: MonkeyPatch):
+        """Test outputs of commands being cached in :meth:`mac_cleanup.probe.Probe.output`"""
+
+        import mac_cleanup.utils
+
+        calls: list[str] = list()
+
+        def dummy_cmd(command: str, **kwargs: Any) -> str:  # noqa
+            calls.append(command)
+            return "cache"
+
+        monkeypatch.setattr(mac_cleanup.utils, "cmd", dummy_cmd)
+
+        assert probe.output("dummy --cache") == "cache"
+        assert probe.output("dummy --cache") == "cache"
+        assert len(calls) == 1
+
+        # Check cache is persisted
+        assert Probe(probe.cache_path).output("dummy --cache") == "cache"
+        assert len(calls) == 1
+
+        # Check expired cache
+        assert probe.output("dummy --cache", ttl=0) == "cache"
+        assert len(calls) == 2
+
+        # Check changed executable
+        os.utime(dummy_bin, ns=(0, 0))
+        assert Probe(probe.cache_path).output("dummy --cache") == "cache"
+        assert len(calls) == 3
+
+        # Check changed environment
+        monkeypatch.setenv("DUMMY_CACHE", "1")
+        assert probe.output("dummy --cache", env=["DUMMY_CACHE"]) == "cache"
+        assert probe.output("dummy --cache", env=["DUMMY_CACHE"]) == "cache"
+        assert len(calls) == 4
+
+        monkeypatch.setenv("DUMMY_CACHE", "2")
+        assert probe.output("dummy --cache", env=["DUMMY_CACHE"]) == "cache"
+        assert len(calls) == 5
+
+        # Check missing executable
+        assert probe.output("dummy_missing --cache") == ""
+        assert len(calls) == 5
+
+    def test_output_broken_cache(self, probe: Probe, dummy_bin: Path):
+        """Test broken cache being replaced in :meth:`mac_cleanup.probe.Probe.output`"""
+
+        probe.cache_path.parent.mkdir()
+        probe.cache_path.write_text("[")
+
+        assert probe.output("dummy") == "cache"
+
+        from json import loads
+
+        assert loads(probe.cache_path.read_text())["dummy"]["output"] == "cache"
+
+    def test_output_not_writable(self, tmp_path: Path, dummy_bin: Path):
+        """Test output is returned if cache can't be written."""
+
+        # Parent of the cache isn't a directory
+        (not_dir := tmp_path.joinpath("not_dir")).touch()
+
+        assert Probe(not_dir.joinpath("probes.json")).output("dummy") == "cache"
+        assert not_dir.is_file()
+
+    def test_get_probe(self):
+        """Test probe being shared in :func:`mac_cleanup.probe.get_probe`"""
+
+        assert get_probe() is get_probe()
+        assert get_probe().cache_path == get_cache_dir().joinpath("probes.json")
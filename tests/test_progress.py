@@ -43,3 +43,58 @@ def test_wrap_iter(capsys: CaptureFixture[str], monkeypatch: MonkeyPatch):
 
     # Check description in output
     assert "test_wrap_iter" in captured
+
+
+def test_track():
+    """Test ProgressBar tasks tracked at the same time in shared progress bar."""
+
+    with ProgressBar.shared():
+        first = iter(ProgressBar.track([1, 2], description="test_track_1"))
+        second = iter(ProgressBar.track([3], description="test_track_2"))
+
+        # Check both tasks being shown
+        assert [next(first), next(second)] == [1, 3]
+        assert [task.description for task in ProgressBar.current_progress.tasks] == ["test_track_1", "test_track_2"]
+
+        # Check finished tasks being removed
+        assert list(first) == [2]
+        assert list(second) == []
+        assert not ProgressBar.current_progress.tasks
+
+
+def test_status():
+    """Test status being shown next to description of the current thread's task."""
+
+    from threading import Thread
+
+    # Check status w/o tasks being ignored
+    ProgressBar.status("ignored")
+
+    with ProgressBar.shared():
+        for _ in ProgressBar.track([1], description="test_status"):
+            # Check status of other threads being ignored
+            (thread := Thread(target=ProgressBar.status, args=("other",))).start()
+            thread.join()
+
+            ProgressBar.status("line [of] output" + "-" * 100)
+
+            description = ProgressBar.current_progress.tasks[0].description
+
+            assert description.startswith("test_status [dim]line \\[of] output-")
+            assert len(description) < 100
+
+
+def test_command_status():
+    """Test output of the command being shown in the task of the thread running it."""
+
+    from mac_cleanup.core_modules import Command
+
+    # Check sink w/o tasks
+    assert ProgressBar.get_sink is None
+
+    with ProgressBar.shared():
+        for _ in ProgressBar.track([1], description="test_command"):
+            # Output is streamed from the thread of the runner
+            Command("echo 'live output'")._execute()  # noqa
+
+            assert ProgressBar.current_progress.tasks[0].description == "test_command [dim]live output"
@@ -0,0 +1,154 @@
+"""All tests for mac_cleanup_py.reclaimer."""
+
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup.reclaimer import Journal, Reclaimer, get_data_dir, get_reclaimer
+from mac_cleanup.remover import RemoveResult
+
+
+@pytest.fixture
+def reclaimer(tmp_path: Path) -> Reclaimer:
+    """Get reclaimer with data directory on the volume of tmp_path."""
+
+    return Reclaimer(tmp_path.joinpath("data"))
+
+
+@pytest.fixture
+def dummy_targets(tmp_path: Path) -> list[Path]:
+    """Create directory with nested files and single file to be staged."""
+
+    (tree := tmp_path.joinpath("targets", "tree", "nested")).mkdir(parents=True)
+    tree.joinpath("file.bin").write_bytes(os.urandom(10))
+
+    (file := tmp_path.joinpath("targets", "file.bin")).write_bytes(os.urandom(20))
+
+    return [tree.parent, file]
+
+
+class TestReclaimer:
+    @pytest.mark.parametrize("data_home", ["~/data_home", None])
+    def test_data_dir(self, data_home: Optional[str], monkeypatch: MonkeyPatch):
+        """Test data directory in :func:`mac_cleanup.reclaimer.get_data_dir`"""
+
+        if data_home is None:
+            monkeypatch.delenv("XDG_DATA_HOME", raising=False)
+            assert get_data_dir() == Path.home().joinpath("Library", "Application Support", "mac_cleanup_py")
+        else:
+            monkeypatch.setenv("XDG_DATA_HOME", data_home)
+            assert get_data_dir() == Path.home().joinpath("data_home", "mac_cleanup_py")
+
+    def test_stage_and_reclaim(self, reclaimer: Reclaimer, dummy_targets: list[Path]):
+        """Test paths being moved into journaled staging and removed by reclaim."""
+
+        staging = reclaimer.journal.path.parent.joinpath("staging")
+
+        result = reclaimer.stage_matches(path.as_posix() for path in [*dummy_targets, dummy_targets[0]])
+
+        # Check paths were renamed w/o removing anything
+        assert result == RemoveResult(staged=2)
+        assert not any(path.exists() for path in dummy_targets)
+
+        # Check staging is journaled
+        with reclaimer.journal.locked() as roots:
+            assert roots == [staging.as_posix()]
+
+        # Check staged data of the running staging isn't reclaimed
+        assert not reclaimer.reclaim().errors
+        assert len(list(staging.glob("run-*/*"))) == 2
+
+        reclaimer.release()
+
+        reclaimer.reclaim()
+
+        # Check staging and journal are removed
+        assert not staging.exists()
+        assert not reclaimer.journal.path.exists()
+
+    def test_interrupted(self, reclaimer: Reclaimer, tmp_path: Path):
+        """Test reclaim resuming staging left by interrupted runs on other volumes."""
+
+        # Simulate partially removed staging of the killed run
+        (run_dir := tmp_path.joinpath("volume", ".mac_cleanup_py-staging", "run-test", "0", "nested")).mkdir(
+            parents=True
+        )
+        run_dir.joinpath("file.bin").touch()
+
+        # Simulate removed staging
+        with reclaimer.journal.locked() as roots:
+            roots.extend([run_dir.parents[2].as_posix(), tmp_path.joinpath("removed").as_posix()])
+
+        result = reclaimer.reclaim()
+
+        assert not result.errors
+        assert not run_dir.parents[2].exists()
+        assert not reclaimer.journal.path.exists()
+
+    def test_fallback(self, reclaimer: Reclaimer, dummy_targets: list[Path], monkeypatch: MonkeyPatch):
+        """Test paths being removed in place if they can't be renamed."""
+
+        # Dummy rename failing as on cross-device link
+        def dummy_rename(*args: Any, **kwargs: Any) -> None:  # noqa
+            raise OSError(18, "Cross-device link")
+
+        monkeypatch.setattr("os.rename", dummy_rename)
+
+        result = reclaimer.stage_matches(path.as_posix() for path in dummy_targets)
+
+        assert not any(path.exists() for path in dummy_targets)
+        assert result == RemoveResult(size=30, files=2)
+
+    def test_not_writable(self, reclaimer: Reclaimer, dummy_targets: list[Path], monkeypatch: MonkeyPatch):
+        """Test paths being removed in place if staging can't be created."""
+
+        # Dummy journal failing as on read-only volume
+        def dummy_locked(*args: Any, **kwargs: Any) -> None:  # noqa
+            raise PermissionError
+
+        monkeypatch.setattr(Journal, "locked", dummy_locked)
+
+        result = reclaimer.stage_matches(path.as_posix() for path in dummy_targets)
+
+        assert not any(path.exists() for path in dummy_targets)
+        assert result.files == 2
+        assert not result.staged
+
+    def test_spawn(self, reclaimer: Reclaimer, dummy_targets: list[Path], monkeypatch: MonkeyPatch):
+        """Test background process being started only with journaled staging."""
+
+        calls: list[list[str]] = list()
+
+        # Dummy Popen saving command
+        def dummy_popen(command: list[str], **kwargs: Any) -> None:
+            assert kwargs["start_new_session"]
+            calls.append(command)
+
+        monkeypatch.setattr("subprocess.Popen", dummy_popen)
+
+        # Check nothing is spawned w/o staging
+        assert not reclaimer.spawn()
+
+        reclaimer.stage(dummy_targets[1].as_posix(), RemoveResult())
+
+        assert reclaimer.spawn()
+        assert calls[0][1:] == ["-m", "mac_cleanup.reclaimer"]
+
+        # Check staging was released for the background process
+        assert not reclaimer.reclaim().errors
+        assert not reclaimer.journal.path.exists()
+
+    def test_get_reclaimer(self, tmp_path: Path, monkeypatch: MonkeyPatch):
+        """Test reclaimer of the user's data directory being shared."""
+
+        monkeypatch.setenv("XDG_DATA_HOME", tmp_path.as_posix())
+        get_reclaimer.cache_clear()
+
+        try:
+            assert get_reclaimer() is get_reclaimer()
+            assert get_reclaimer().journal.path == tmp_path.joinpath("mac_cleanup_py", "journal")
+        finally:
+            get_reclaimer.cache_clear()
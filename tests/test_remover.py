@@ -0,0 +1,177 @@
+"""All tests for mac_cleanup_py.remover."""
+
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup.remover import RemoveResult, remove, remove_matches
+
+
+@pytest.fixture
+def dummy_tree(tmp_path: Path) -> Path:
+    """Create tree with nested directories, files and symlink outside of it."""
+
+    (root := tmp_path.joinpath("root")).mkdir()
+
+    # Create nested dirs with files
+    (nested_dir := root.joinpath("a", "b", "c")).mkdir(parents=True)
+    root.joinpath("d").mkdir()
+
+    root.joinpath("root.bin").write_bytes(os.urandom(10))
+    root.joinpath("a", ".hidden").write_bytes(os.urandom(20))
+    nested_dir.joinpath("nested.bin").write_bytes(os.urandom(30))
+
+    # Create directory outside of the tree with symlink on it (shouldn't be followed)
+    (outside := tmp_path.joinpath("outside")).mkdir()
+    outside.joinpath("keep.bin").write_bytes(os.urandom(40))
+    root.joinpath("d", "link").symlink_to(outside, target_is_directory=True)
+
+    return root
+
+
+class TestRemove:
+    def test_tree(self, dummy_tree: Path):
+        """Test directory being removed with its contents w/o following symlinks."""
+
+        link_size = os.lstat(dummy_tree.joinpath("d", "link")).st_size
+
+        result = remove(dummy_tree)
+
+        assert not dummy_tree.exists()
+        assert dummy_tree.parent.joinpath("outside", "keep.bin").exists()
+
+        # Check files, symlink, and their sizes
+        assert result.files == 4
+        assert result.size == 60 + link_size
+        assert not result.errors
+
+    def test_glob(self, dummy_tree: Path):
+        """Test glob being expanded w/o matches failing predicate."""
+
+        result = remove(dummy_tree.joinpath("*"), predicate=lambda path: not path.endswith("d"))
+
+        assert sorted(path.name for path in dummy_tree.iterdir()) == ["d"]
+        assert result.files == 3
+
+    def test_file(self, dummy_tree: Path):
+        """Test single file and non-existent paths."""
+
+        assert remove(dummy_tree.joinpath("root.bin")) == RemoveResult(size=10, files=1)
+        assert remove(dummy_tree.joinpath("root.bin")) == RemoveResult()
+        assert remove_matches([dummy_tree.joinpath("test").as_posix()]) == RemoveResult()
+
+    def test_errors(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test errors being collected w/o stopping removal."""
+
+        from mac_cleanup import remover
+
+        original_unlink = remover.unlink
+
+        # Dummy unlink raising PermissionError on nested file
+        def dummy_unlink(path: Any, **kwargs: Any) -> None:
+            if path == "nested.bin":
+                raise PermissionError(1, "Operation not permitted")
+            original_unlink(path, **kwargs)
+
+        monkeypatch.setattr("mac_cleanup.remover.unlink", dummy_unlink)
+
+        result = remove(dummy_tree)
+
+        # Check everything else was removed
+        assert [path.name for path in dummy_tree.rglob("*")] == ["a", "b", "c", "nested.bin"]
+        assert result.files == 3
+
+        # Check errors of the file and its non-empty parents
+        assert result.errors[0] == f"{dummy_tree.joinpath('a', 'b', 'c', 'nested.bin')}: Operation not permitted"
+        assert len(result.errors) == 5
+
+
+class TestParallelRemover:
+    def test_tree(self, tmp_path: Path, monkeypatch: MonkeyPatch):
+        """Test tree being removed by multiple workers same as serially."""
+
+        from threading import get_ident
+        from time import sleep
+
+        from mac_cleanup import remover
+        from mac_cleanup.remover import ParallelRemover, remove_entry
+
+        # Create wide tree with big directories
+        for num in range(16):
+            (nested := tmp_path.joinpath("parallel", str(num), "nested")).mkdir(parents=True)
+
+            for file_num in range(10):
+                nested.joinpath(str(file_num)).write_bytes(os.urandom(num))
+
+        # Simulate small chunks of files
+        monkeypatch.setattr(ParallelRemover, "_CHUNK_SIZE", 3)
+
+        threads: set[int] = set()
+        original_unlink = remover.unlink
+
+        # Dummy slow unlink recording worker threads
+        def dummy_unlink(path: Any, **kwargs: Any) -> None:
+            threads.add(get_ident())
+            sleep(0.001)
+            original_unlink(path, **kwargs)
+
+        monkeypatch.setattr("mac_cleanup.remover.unlink", dummy_unlink)
+
+        result = ParallelRemover(max_workers=4).remove_tree(tmp_path.joinpath("parallel").as_posix())
+
+        assert not tmp_path.joinpath("parallel").exists()
+        assert result == RemoveResult(size=sum(range(16)) * 10, files=160)
+        assert len(threads) > 1
+
+        # Check parallel removal of the entry with default workers
+        tmp_path.joinpath("parallel", "nested").mkdir(parents=True)
+        tmp_path.joinpath("parallel", "nested", "file.bin").write_bytes(os.urandom(10))
+
+        result = RemoveResult()
+        remove_entry(tmp_path.joinpath("parallel").as_posix(), result, parallel=True)
+
+        assert not tmp_path.joinpath("parallel").exists()
+        assert result == RemoveResult(size=10, files=1)
+
+    def test_symlink_and_errors(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test symlinks not being followed and errors being collected."""
+
+        from mac_cleanup import remover
+        from mac_cleanup.remover import ParallelRemover
+
+        original_unlink = remover.unlink
+
+        # Dummy unlink raising PermissionError on nested file
+        def dummy_unlink(path: Any, **kwargs: Any) -> None:
+            if path == "nested.bin":
+                raise PermissionError(1, "Operation not permitted")
+            original_unlink(path, **kwargs)
+
+        monkeypatch.setattr("mac_cleanup.remover.unlink", dummy_unlink)
+
+        result = ParallelRemover(max_workers=4).remove_tree(dummy_tree.as_posix())
+
+        # Check symlink target is kept
+        assert dummy_tree.parent.joinpath("outside", "keep.bin").exists()
+
+        # Check everything else was removed
+        assert [path.name for path in dummy_tree.rglob("*")] == ["a", "b", "c", "nested.bin"]
+        assert result.files == 3
+        assert len(result.errors) == 5
+
+    def test_worker_error(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test unexpected errors in workers being raised."""
+
+        from mac_cleanup.remover import ParallelRemover
+
+        # Dummy unlink with unexpected error
+        def dummy_unlink(path: Any, **kwargs: Any) -> None:
+            raise ValueError("test")
+
+        monkeypatch.setattr("mac_cleanup.remover.unlink", dummy_unlink)
+
+        with pytest.raises(ValueError, match="test"):
+            ParallelRemover(max_workers=2).remove_tree(dummy_tree.as_posix())
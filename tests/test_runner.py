@@ -0,0 +1,218 @@
+"""All tests for mac_cleanup_py.runner."""
+
+import shutil
+from time import perf_counter, sleep
+from typing import Any, Optional
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup.runner import CommandResult, CommandRunner
+
+
+class TestCommandRunner:
+    @pytest.mark.parametrize(
+        ("command", "ignore_errors", "exit_code", "output"),
+        [
+            ("echo 'test'", True, 0, "test"),
+            ("echo 'test' >&2; exit 3", True, 3, ""),
+            ("echo 'test' >&2; exit 3", False, 3, "test"),
+        ],
+    )
+    def test_run(self, command: str, ignore_errors: bool, exit_code: int, output: str):
+        """Test exit code and output in :meth:`mac_cleanup.runner.CommandRunner.run`"""
+
+        result = CommandRunner().run(command, ignore_errors=ignore_errors)
+
+        assert result.command == command
+        assert result.exit_code == exit_code
+        assert result.output == output
+        assert result.duration > 0
+        assert not result.timed_out
+
+    def test_timeout(self):
+        """Test process group of the command being killed on timeout."""
+
+        start = perf_counter()
+
+        # Child process holds output pipe, so it must be killed too
+        result = CommandRunner().run("echo 'start'; sleep 10 & sleep 10", timeout=0.3)
+
+        assert perf_counter() - start < 5
+        assert result.timed_out
+        assert result.exit_code != 0
+        assert result.output == "start"
+
+    def test_truncated(self, monkeypatch: MonkeyPatch):
+        """Test output being kept in ring buffer of the last lines."""
+
+        monkeypatch.setattr(CommandRunner, "_MAX_OUTPUT", 6)
+
+        result = CommandRunner().run("printf 'a\\nb\\nccc\\n'")
+
+        assert result.output == "b\nccc"
+        assert result.truncated
+
+        # Check lines over stream limit being dropped
+        result = CommandRunner().run("echo 'test_output'; echo 'end'")
+
+        assert result.output == "end"
+        assert result.truncated
+
+    def test_sink(self):
+        """Test output lines being streamed into sink."""
+
+        lines: list[str] = list()
+
+        result = CommandRunner().run("echo 'a'; echo 'b' >&2", ignore_errors=False, sink=lines.append)
+
+        assert sorted(lines) == ["a", "b"]
+        assert result.output == "ab"
+
+    def test_loop(self):
+        """Test commands from different threads sharing long-lived event loop of the runner."""
+
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        loops: set[int] = set()
+        runner = CommandRunner()
+
+        def record_loop(line: str) -> None:  # noqa
+            loops.add(id(asyncio.get_running_loop()))
+
+        def run_echo(_: int) -> CommandResult:
+            return runner.run("echo 'test'", sink=record_loop)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(run_echo, range(4)))
+
+        assert all(result.output == "test" for result in results)
+        assert len(loops) == 1
+
+    def test_run_all(self):
+        """Test commands running at the same time on single event loop w/ limited concurrency."""
+
+        runner = CommandRunner(max_concurrent=2)
+
+        start = perf_counter()
+        results = runner.run_all([f"sleep 0.3; echo {index}" for index in range(4)])
+        elapsed = perf_counter() - start
+
+        # Check results order and two batches of commands
+        assert [result.output for result in results] == ["0", "1", "2", "3"]
+        assert 0.6 <= elapsed < 1.2
+
+    @pytest.mark.parametrize(
+        ("command", "argv"),
+        [
+            # test simple commands with quotes
+            ("brew cleanup -s", ["brew", "cleanup", "-s"]),
+            ("killall 'Google Drive File Stream'", ["killall", "Google Drive File Stream"]),
+            ("""conan remove "*" -c""", ["conan", "remove", "*", "-c"]),
+            (
+                "osascript -e 'tell application 'Simulator' to quit'",
+                ["osascript", "-e", "tell application Simulator to quit"],
+            ),
+            # test commands needing shell
+            ("brew update && brew upgrade", None),
+            ("pnpm store prune &>/dev/null", None),
+            ("ps aux | grep '[T]elegram'", None),
+            ('echo "$HOME"', None),
+            ("ls ~/*.hprof", None),
+            ("echo 'unterminated", None),
+            ("", None),
+        ],
+    )
+    def test_split_command(self, command: str, argv: Optional[list[str]]):
+        """Test simple commands being split w/o shell in :func:`mac_cleanup.runner._split_command`"""
+
+        from mac_cleanup.runner import _split_command  # noqa
+
+        assert _split_command(command) == argv
+
+    @pytest.mark.parametrize(
+        ("command", "shell"), [(["sh", "-c", "echo $0"], False), ("sh -c 'echo $0'", False), ("echo $0", True)]
+    )
+    def test_shell_free(self, command: str | list[str], shell: bool):
+        """Test simple commands and arguments being executed w/o shell."""
+
+        result = CommandRunner().run(command)
+
+        # Check name of the script is "sh" only if it's started by the command
+        assert result.output == ("/bin/sh" if shell else "sh")
+        assert result.exit_code == 0
+
+    def test_assignment(self):
+        """Test variable assignments being executed with shell."""
+
+        assert CommandRunner().run("test=1 printenv test").output == "1"
+
+    def test_type(self, monkeypatch: MonkeyPatch):
+        """Test probes with "type" being resolved w/o shell."""
+
+        # Simulate shell being unavailable
+        async def dummy_exec(*args: Any, **kwargs: Any) -> None:  # noqa
+            raise AssertionError
+
+        runner = CommandRunner()
+
+        assert runner.run("type 'sh'").output == f"sh is {shutil.which('sh')}"
+
+        result = runner.run("type sh missing_executable", ignore_errors=False)
+
+        assert result.exit_code == 1
+        assert result.output == f"sh is {shutil.which('sh')}\nmissing_executable: not found"
+
+        monkeypatch.setattr("asyncio.create_subprocess_exec", dummy_exec)
+
+        assert runner.run("type missing_executable").output == ""
+
+        # Check builtins need shell
+        with pytest.raises(AssertionError):
+            runner.run("type cd")
+
+    def test_set_max_concurrent(self):
+        """Test limit of the runner being changed for the later commands."""
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        runner = CommandRunner(max_concurrent=2)
+        runner.set_max_concurrent(1)
+
+        assert runner.max_concurrent == 1
+
+        start = perf_counter()
+
+        # Check commands wait for the only slot
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert all(result.exit_code == 0 for result in executor.map(runner.run, ["sleep 0.2"] * 2))
+
+        assert perf_counter() - start >= 0.4
+
+    def test_type_slots(self):
+        """Test probes with "type" not waiting for a free slot of the runner."""
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        runner = CommandRunner(max_concurrent=1)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Occupy the only slot
+            busy = executor.submit(runner.run, "sleep 1")
+            sleep(0.2)
+
+            start = perf_counter()
+
+            assert runner.run("type 'sh'").exit_code == 0
+            assert perf_counter() - start < 0.5
+
+            assert busy.result().exit_code == 0
+
+    def test_missing(self):
+        """Test missing executable being reported as in shell."""
+
+        result = CommandRunner().run(["missing_executable"], ignore_errors=False)
+
+        assert result.exit_code == 127
+        assert result.output == "missing_executable: No such file or directory"
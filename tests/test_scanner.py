@@ -0,0 +1,646 @@
+"""All tests for mac_cleanup_py.scanner."""
+
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup.scanner import InodeSet, get_size
+
+
+@pytest.fixture
+def dummy_tree(tmp_path: Path) -> Path:
+    """Create small tree with nested directories, hidden files and symlink."""
+
+    # Create nested dirs
+    (nested_dir := tmp_path.joinpath("a", "b", "c")).mkdir(parents=True)
+    tmp_path.joinpath("d").mkdir()
+
+    # Create files with different sizes
+    tmp_path.joinpath("root.bin").write_bytes(os.urandom(10))
+    tmp_path.joinpath("a", ".hidden").write_bytes(os.urandom(20))
+    nested_dir.joinpath("nested.bin").write_bytes(os.urandom(30))
+    tmp_path.joinpath("d", "d.bin").write_bytes(os.urandom(40))
+
+    # Create symlink on directory (shouldn't be followed)
+    tmp_path.joinpath("link").symlink_to(nested_dir, target_is_directory=True)
+
+    return tmp_path
+
+
+def walk_size(path: Path) -> int:
+    """Count size of directory contents with :func:`os.walk`"""
+
+    total = 0
+
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            total += os.lstat(os.path.join(root, name)).st_size
+
+    return total
+
+
+class TestGetSize:
+    def test_directory(self, dummy_tree: Path):
+        """Test directory contents being counted w/o following symlinks."""
+
+        assert get_size(dummy_tree).size == walk_size(dummy_tree)
+
+    def test_file(self, dummy_tree: Path):
+        """Test size of a single file."""
+
+        assert get_size(dummy_tree.joinpath("root.bin")).size == 10
+
+    def test_symlink(self, dummy_tree: Path):
+        """Test symlink being counted as link itself."""
+
+        link = dummy_tree.joinpath("link")
+
+        assert get_size(link).size == os.lstat(link).st_size
+
+    @pytest.mark.parametrize(("pattern", "names"), [("*", ["a", "d", "root.bin", "link"]), ("[!ar]*", ["d", "link"])])
+    def test_glob(self, pattern: str, names: list[str], dummy_tree: Path):
+        """Test every glob match being counted with its contents."""
+
+        expected = sum(
+            os.lstat(match := dummy_tree.joinpath(name)).st_size + (walk_size(match) if not match.is_symlink() else 0)
+            for name in names
+        )
+
+        assert get_size(dummy_tree.joinpath(pattern)).size == expected
+
+    def test_non_existent(self, tmp_path: Path):
+        """Test non-existent paths and globs."""
+
+        assert get_size(tmp_path.joinpath("test")).size == 0
+        assert get_size(tmp_path.joinpath("test", "*")).size == 0
+
+    def test_unreadable_directory(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test directories raising errors on listing being skipped."""
+
+        from mac_cleanup import scanner
+
+        original_scandir = scanner.scandir
+
+        # Dummy scandir raising PermissionError on nested directory
+        def dummy_scandir(path: Any) -> Any:
+            if str(path).endswith("b"):
+                raise PermissionError
+            return original_scandir(path)
+
+        monkeypatch.setattr("mac_cleanup.scanner.scandir", dummy_scandir)
+
+        # Nested dir and its contents are not counted
+        skipped_size = walk_size(dummy_tree.joinpath("a", "b"))
+
+        assert get_size(dummy_tree).size == walk_size(dummy_tree) - skipped_size
+
+    def test_hardlinks(self, dummy_tree: Path):
+        """Test hardlinked files being counted once with specified inode set."""
+
+        dummy_tree.joinpath("d", "hardlink.bin").hardlink_to(dummy_tree.joinpath("root.bin"))
+
+        inodes = InodeSet()
+
+        # Check hardlink is counted twice without inode set
+        assert get_size(dummy_tree).size == walk_size(dummy_tree)
+
+        # Check hardlink is counted once
+        assert get_size(dummy_tree, inodes=inodes).size == walk_size(dummy_tree) - 10
+
+        # Check inodes are shared between different paths
+        assert get_size(dummy_tree.joinpath("root.bin"), inodes=inodes).size == 0
+
+    def test_allocated(self, dummy_tree: Path):
+        """Test allocated size being counted from blocks."""
+
+        # Sparse file
+        with dummy_tree.joinpath("sparse.bin").open("wb") as f:
+            f.truncate(1024**2)
+
+        sparse_result = get_size(dummy_tree.joinpath("sparse.bin"))
+
+        assert sparse_result.size == 1024**2
+        assert sparse_result.allocated < sparse_result.size
+
+        assert get_size(dummy_tree).allocated == sum(
+            os.lstat(os.path.join(root, name)).st_blocks * 512
+            for root, dirs, files in os.walk(dummy_tree)
+            for name in dirs + files
+        )
+
+
+class TestResolve:
+    def test_resolve(self, dummy_tree: Path):
+        """Test glob being resolved into matches with their sizes."""
+
+        from mac_cleanup.scanner import resolve
+
+        resolved = resolve(dummy_tree.joinpath("*"), predicate=lambda path: not path.endswith(".bin"))
+
+        # Check matches w/o filtered ones
+        assert sorted(match.path for match in resolved.matches) == [
+            dummy_tree.joinpath(name).as_posix() for name in ["a", "d", "link"]
+        ]
+
+        # Check total size
+        assert resolved.result.size == sum(match.size for match in resolved.matches) > 0
+
+    def test_resolve_path(self, dummy_tree: Path):
+        """Test non-glob path being resolved into itself."""
+
+        from mac_cleanup.scanner import resolve
+
+        # Check existing path
+        resolved = resolve(dummy_tree)
+        assert [match.path for match in resolved.matches] == [dummy_tree.as_posix()]
+        assert resolved.result.size == walk_size(dummy_tree)
+
+        # Check filtered and non-existent paths
+        assert not resolve(dummy_tree, predicate=lambda path: False).matches
+        assert not resolve(dummy_tree.joinpath("test")).matches
+
+
+class TestCompiledGlob:
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            "*",
+            ".*",
+            "*/*",
+            "a/.hid*",
+            "[!ar]*",
+            "[ad]/*",
+            "*/b/*/nested.bin",
+            "*/*.bin",
+            "link/*",
+            "**",
+            "**/*.bin",
+            "a/**/c",
+            "test/*",
+            "root.bin/*",
+        ],
+    )
+    def test_expand(self, pattern: str, dummy_tree: Path):
+        """Test expansion being same as :meth:`pathlib.Path.glob`"""
+
+        from mac_cleanup.scanner import _compile_glob  # noqa
+
+        compiled_glob = _compile_glob(dummy_tree.joinpath(pattern).as_posix())
+
+        assert compiled_glob is not None
+
+        matches = [match_posix for match_posix, _ in compiled_glob.expand()]
+
+        assert sorted(matches) == sorted(match.as_posix() for match in dummy_tree.glob(pattern))
+
+        # Check stats are taken w/o following symlinks
+        assert all(stat_ == os.lstat(match_posix) for match_posix, stat_ in compiled_glob.expand())
+
+    def test_compile(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test glob being split by segments and paths w/o globs not being compiled."""
+
+        from mac_cleanup.scanner import _compile_glob  # noqa
+
+        assert _compile_glob(dummy_tree.as_posix()) is None
+
+        # Check prefix of the glob segment isn't listed as a directory
+        compiled_glob = _compile_glob(dummy_tree.joinpath("a", ".hid*").as_posix())
+
+        assert compiled_glob is not None
+        assert compiled_glob.root == dummy_tree.joinpath("a").as_posix()
+
+        # Check root and relative paths
+        root_glob = _compile_glob("/*")
+        assert root_glob is not None
+        assert root_glob.root == "/"
+
+        monkeypatch.chdir(dummy_tree)
+
+        relative_glob = _compile_glob("*.bin")
+        assert relative_glob is not None
+        assert [match_posix for match_posix, _ in relative_glob.expand()] == ["root.bin"]
+
+
+class TestTraversalPlan:
+    def test_expand(self, dummy_tree: Path):
+        """Test planned paths being expanded same as separately."""
+
+        from mac_cleanup.scanner import TraversalPlan, _expand  # noqa
+
+        paths = [
+            dummy_tree.joinpath(name)
+            for name in ["*", "[!ar]*", "a", "a/.hidden", "a/*/c", "*/b", "root.bin", "test", "test/*", "link/*"]
+        ]
+
+        planned = TraversalPlan(paths).expand()
+
+        assert planned.keys() == set(paths)
+
+        for path in paths:
+            assert sorted(planned[path]) == sorted(_expand(path, predicate=None, deadline=None))
+
+    def test_unplanned(self, dummy_tree: Path):
+        """Test relative paths, root, and recursive globs not being planned."""
+
+        from mac_cleanup.scanner import TraversalPlan
+
+        paths = [Path("a/*"), Path("/"), dummy_tree.joinpath("**", "*.bin"), dummy_tree]
+
+        assert TraversalPlan(paths).paths == [dummy_tree]
+
+    def test_shared_parent(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test shared parent directory being listed once."""
+
+        from mac_cleanup import scanner
+
+        listed: list[str] = list()
+        original_scandir = scanner.scandir
+
+        # Dummy scandir recording listed directories
+        def dummy_scandir(path: Any) -> Any:
+            listed.append(path)
+            return original_scandir(path)
+
+        monkeypatch.setattr("mac_cleanup.scanner.scandir", dummy_scandir)
+
+        paths = [dummy_tree.joinpath(name) for name in ["*.bin", "[ad]", "a", "d/*", "l*"]]
+
+        scanner.TraversalPlan(paths).expand()
+
+        assert listed.count(dummy_tree.as_posix()) == 1
+
+    def test_mixed_case(self, tmp_path: Path, monkeypatch: MonkeyPatch):
+        """Test literal names being found on case-insensitive volumes next to glob siblings."""
+
+        from os import lstat, stat_result
+
+        from mac_cleanup import scanner
+
+        tmp_path.joinpath("GPUCache").mkdir()
+        tmp_path.joinpath("a_logs.txt").touch()
+
+        # Dummy lstat emulating case-insensitive volume
+        def dummy_lstat(path_posix: str) -> Optional[stat_result]:
+            parent, _, name = path_posix.rpartition("/")
+
+            for entry in Path(parent).iterdir():
+                if entry.name.lower() == name.lower():
+                    return lstat(entry)
+
+            return None
+
+        monkeypatch.setattr("mac_cleanup.scanner._lstat", dummy_lstat)
+
+        literals = [tmp_path.joinpath(name) for name in ["gpucache", "GPUCache"]]
+        glob = tmp_path.joinpath("*logs*.txt")
+
+        planned = scanner.TraversalPlan([*literals, glob]).expand()
+
+        # Check literals are found as written and glob is still matched by listing
+        for path in literals:
+            assert [match[0] for match in planned[path]] == [path.as_posix()]
+
+        assert [match[0] for match in planned[glob]] == [tmp_path.joinpath("a_logs.txt").as_posix()]
+
+    def test_scan(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test scanner using planned matches."""
+
+        from mac_cleanup import scanner
+
+        paths = [dummy_tree.joinpath(name) for name in ["[!a]*", "a"]]
+        plan = scanner.TraversalPlan(paths)
+
+        expected = {path: scanner.resolve(path) for path in paths}
+
+        # Check planned globs aren't expanded again
+        monkeypatch.setattr("mac_cleanup.scanner._compile_glob", None)
+
+        for scanner_class in (scanner.Scanner, scanner.ProcessScanner):
+            results = dict(scanner_class(max_workers=2).scan(paths, plan=plan))
+
+            for path in paths:
+                assert sorted(results[path].matches) == sorted(expected[path].matches)
+
+
+class TestInodeSet:
+    def test_add(self, monkeypatch: MonkeyPatch):
+        """Test inodes being added once per device through buffer flushes."""
+
+        # Simulate small buffer
+        monkeypatch.setattr(InodeSet, "_BUFFER_SIZE", 4)
+
+        inodes = InodeSet()
+
+        # Check new inodes
+        assert all(inodes.add(device, inode) for device in range(2) for inode in range(100, 0, -1))
+        assert len(inodes) == 200
+
+        # Check seen inodes
+        assert not any(inodes.add(device, inode) for device in range(2) for inode in range(1, 101))
+        assert len(inodes) == 200
+
+        # Check other device
+        assert inodes.add(2, 1)
+
+
+class TestCollapseTargets:
+    @pytest.mark.parametrize(
+        ("paths", "expected"),
+        [
+            # test no overlap
+            (["/a/b", "/a/c", "/d"], ["/a/b", "/a/c", "/d"]),
+            # test duplicates
+            (["/a/b", "/a/b", "/c"], ["/a/b", "/c"]),
+            # test nested directory
+            (["/a/b/c", "/a/b"], ["/a/b"]),
+            # test nested in glob
+            (["/a/yarn", "/a/*", "/a/pod/cache"], ["/a/*"]),
+            # test glob nested in glob
+            (["/a/*/*/*", "/a/*"], ["/a/*"]),
+            (["/a/[!b]*", "/a/*"], ["/a/*"]),
+            # test glob with char class
+            (["/a/[0-9]*/c", "/a/1x/c/d", "/a/x1/c"], ["/a/[0-9]*/c", "/a/x1/c"]),
+            # test partially overlapping globs
+            (["/a/*/c", "/a/b/*"], ["/a/*/c", "/a/b/*"]),
+            # test relative and empty paths
+            (["", "a", "a/b"], ["", "a"]),
+        ],
+    )
+    def test_collapse_targets(self, paths: list[str], expected: list[str]):
+        """Test duplicate and nested paths being removed in original order."""
+
+        from mac_cleanup.scanner import collapse_targets
+
+        assert collapse_targets(map(Path, paths)) == list(map(Path, expected))
+
+
+class TestDeadline:
+    def test_resolve_deadline(self, dummy_tree: Path):
+        """Test resolve returning partial result on deadline."""
+
+        from time import monotonic
+
+        from mac_cleanup.scanner import resolve
+
+        # Check glob w/o matches counted
+        resolved = resolve(dummy_tree.joinpath("*"), deadline=monotonic() - 1)
+        assert resolved.incomplete
+        assert not resolved.matches
+
+        # Check directory is counted partially
+        resolved = resolve(dummy_tree, deadline=monotonic() - 1)
+        assert resolved.incomplete
+        assert resolved.result.incomplete
+        assert [match.path for match in resolved.matches] == [dummy_tree.as_posix()]
+        assert resolved.result.size == 0
+
+        # Check complete scan
+        assert not resolve(dummy_tree, deadline=monotonic() + 60).incomplete
+
+    def test_scanner_stuck(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test scanner taking partial results of stuck scans after total budget."""
+
+        from shutil import copytree
+        from threading import Event
+
+        from mac_cleanup import scanner
+
+        # Simulate other path with the same contents
+        copytree(dummy_tree.joinpath("a"), dummy_tree.joinpath("e"))
+
+        release = Event()
+        original_scandir = scanner.scandir
+
+        # Dummy scandir blocking on nested directory
+        def dummy_scandir(path: Any) -> Any:
+            if str(path).endswith("b"):
+                release.wait()
+            return original_scandir(path)
+
+        monkeypatch.setattr("mac_cleanup.scanner.scandir", dummy_scandir)
+
+        scanner_ = scanner.Scanner(max_in_flight_per_worker=1, total_budget=0.5, grace_period=0.1, max_workers=2)
+
+        # Simulate pending path behind stuck ones
+        paths = [dummy_tree.joinpath("a"), dummy_tree.joinpath("e"), dummy_tree.joinpath("d")]
+
+        try:
+            results = list(scanner_.scan(paths))
+        finally:
+            release.set()
+
+        # Check stuck paths return partial results
+        partial_size = (
+            os.lstat(dummy_tree.joinpath("a", ".hidden")).st_size + os.lstat(dummy_tree.joinpath("a", "b")).st_size
+        )
+
+        assert len(results) == len(paths)
+        assert all(resolved.incomplete and resolved.result.size == partial_size for _, resolved in results[:-1])
+
+        # Check pending path wasn't counted
+        assert results[-1][1].incomplete
+        assert results[-1][1].result.size == 0
+
+    def test_scanner_target_stuck(self, dummy_tree: Path, monkeypatch: MonkeyPatch):
+        """Test scanner abandoning only scans stuck after their own budget."""
+
+        from threading import Event
+        from time import monotonic
+
+        from mac_cleanup import scanner
+
+        release = Event()
+        original_scandir = scanner.scandir
+
+        # Dummy scandir blocking on nested directory
+        def dummy_scandir(path: Any) -> Any:
+            if str(path).endswith("b"):
+                release.wait()
+            return original_scandir(path)
+
+        monkeypatch.setattr("mac_cleanup.scanner.scandir", dummy_scandir)
+
+        scanner_ = scanner.Scanner(
+            max_in_flight_per_worker=1, target_budget=0.2, total_budget=60, grace_period=0.1, max_workers=2
+        )
+
+        paths = [dummy_tree.joinpath("a"), dummy_tree.joinpath("d")]
+
+        start = monotonic()
+
+        try:
+            results = dict(scanner_.scan(paths))
+        finally:
+            release.set()
+
+        # Check stuck path doesn't wait for the total budget
+        assert monotonic() - start < 5
+
+        assert results[paths[0]].incomplete
+        assert results[paths[0]].result.size == (
+            os.lstat(dummy_tree.joinpath("a", ".hidden")).st_size + os.lstat(dummy_tree.joinpath("a", "b")).st_size
+        )
+
+        # Check other path isn't abandoned
+        assert not results[paths[1]].incomplete
+        assert results[paths[1]].result.size == walk_size(dummy_tree.joinpath("d"))
+
+
+class TestScanner:
+    @pytest.mark.parametrize("scanner_name", ["Scanner", "ProcessScanner"])
+    def test_scan(self, scanner_name: str, dummy_tree: Path):
+        """Test paths being resolved same as with single-threaded resolve."""
+
+        from mac_cleanup import scanner
+        from mac_cleanup.scanner import resolve
+
+        paths = [dummy_tree.joinpath(name) for name in ["[!al]*", "a", "root.bin", "test", "link"]]
+
+        # Dummy predicate filtering out files
+        def predicate(path: str) -> bool:
+            return not path.endswith(".bin")
+
+        scanner_ = getattr(scanner, scanner_name)(predicate=predicate, max_workers=2)
+
+        results = dict(scanner_.scan(paths))
+
+        assert results.keys() == set(paths)
+
+        for path in paths:
+            expected = resolve(path, predicate=lambda path_: not path_.endswith(".bin"))
+
+            assert not results[path].incomplete
+            assert sorted(results[path].matches) == sorted(expected.matches)
+
+    @pytest.mark.parametrize("scanner_name", ["Scanner", "ProcessScanner"])
+    @pytest.mark.parametrize(
+        ("names", "counted"),
+        [
+            # test partially overlapping paths
+            (["a", "*/b"], ["a/.hidden", "a/b"]),
+            (["*/b", "a"], ["a/.hidden", "a/b"]),
+            # test same match with and w/o entry of directory itself
+            (["a/b", "a/*"], ["a/.hidden", "a/b"]),
+            (["a/*", "a/b"], ["a/.hidden", "a/b"]),
+            # test match nested in match of other path
+            (["[ad]", "a/b/c/nested.bin"], ["a", "d"]),
+        ],
+    )
+    def test_overlapping(self, names: list[str], counted: list[str], scanner_name: str, dummy_tree: Path):
+        """Test entries reached by multiple paths being counted once."""
+
+        from mac_cleanup import scanner
+
+        # Simulate hardlink inside overlapping paths
+        dummy_tree.joinpath("a", "b", "link.bin").hardlink_to(dummy_tree.joinpath("a", "b", "c", "nested.bin"))
+
+        inodes: set[tuple[int, int]] = set()
+        expected = 0
+
+        # Count every entry of the counted paths once
+        for path in map(dummy_tree.joinpath, counted):
+            for entry in [path, *path.rglob("*")]:
+                if ((stat_ := os.lstat(entry)).st_dev, stat_.st_ino) not in inodes:
+                    inodes.add((stat_.st_dev, stat_.st_ino))
+                    expected += stat_.st_size
+
+        paths = [dummy_tree.joinpath(name) for name in names]
+
+        for max_workers in (1, 2):
+            results = dict(getattr(scanner, scanner_name)(max_workers=max_workers).scan(paths))
+
+            assert sum(resolved.result.size for resolved in results.values()) == expected
+
+            # Check overlapping matches are kept for removal
+            assert all(resolved.matches for resolved in results.values())
+
+    def test_work_stealing(self, tmp_path: Path, monkeypatch: MonkeyPatch):
+        """Test one big path being walked by multiple workers."""
+
+        from threading import get_ident
+        from time import sleep
+
+        from mac_cleanup import scanner
+
+        # Create wide tree
+        for num in range(32):
+            tmp_path.joinpath(str(num), "nested").mkdir(parents=True)
+            tmp_path.joinpath(str(num), "nested", "file.bin").write_bytes(os.urandom(num))
+
+        threads: set[int] = set()
+        original_scandir = scanner.scandir
+
+        # Dummy slow scandir recording worker threads
+        def dummy_scandir(path: Any) -> Any:
+            threads.add(get_ident())
+            sleep(0.01)
+            return original_scandir(path)
+
+        monkeypatch.setattr("mac_cleanup.scanner.scandir", dummy_scandir)
+
+        results = list(scanner.Scanner(max_workers=4).scan([tmp_path]))
+
+        # Check whole tree was counted
+        assert results[0][1].result.size == walk_size(tmp_path)
+
+        # Check subtrees were stolen by other workers
+        assert len(threads) > 1
+
+    def test_process_shards(self, tmp_path: Path):
+        """Test directories being split into shards with hardlinks counted once."""
+
+        from mac_cleanup.scanner import ProcessScanner
+
+        # Create tree deeper than split depth with hardlinks in different shards
+        for num in range(8):
+            (nested := tmp_path.joinpath(str(num), "a", "b", "c")).mkdir(parents=True)
+            nested.joinpath("file.bin").write_bytes(os.urandom(num + 1))
+
+        tmp_path.joinpath("0", "a", "b", "c", "link.bin").hardlink_to(tmp_path.joinpath("7", "a", "b", "c", "file.bin"))
+
+        paths = [tmp_path, tmp_path.joinpath("7", "a", "b", "c", "file.bin")]
+        resolved = dict(ProcessScanner(max_workers=2).scan(paths))
+
+        # Check hardlinked file is counted once across shards and paths
+        assert sum(target.result.size for target in resolved.values()) == walk_size(tmp_path) - 8
+        assert not any(target.incomplete for target in resolved.values())
+
+    def test_process_deadline(self, dummy_tree: Path):
+        """Test shards returning partial results on deadline."""
+
+        from mac_cleanup.scanner import ProcessScanner
+
+        resolved = dict(ProcessScanner(target_budget=0, max_workers=1).scan([dummy_tree]))
+
+        assert resolved[dummy_tree].incomplete
+
+
+def test_filter_policy(tmp_path: Path, monkeypatch: MonkeyPatch):
+    """Test matches being checked by policy in batches in :func:`mac_cleanup.scanner._filter`"""
+
+    from mac_cleanup.policy import Policy
+    from mac_cleanup.scanner import _filter  # noqa
+
+    batches: list[int] = list()
+
+    def dummy_check_all(self: Policy, matches: list[tuple[str, os.stat_result]]) -> list[bool]:  # noqa
+        batches.append(len(matches))
+        return [not path_posix.endswith("_protected") for path_posix, _ in matches]
+
+    monkeypatch.setattr(Policy, "check_all", dummy_check_all)
+
+    for name in ["a", "b_protected", "c"]:
+        tmp_path.joinpath(name).touch()
+
+    matches = [(path_.as_posix(), path_.lstat(), False) for path_ in sorted(tmp_path.iterdir())]
+
+    # Check matches are checked at once and kept in order
+    assert [path_posix for path_posix, _, _ in _filter(Policy(), matches)] == [matches[0][0], matches[2][0]]
+    assert batches == [3]
+
+    # Check other predicates are called per match
+    assert len(list(_filter(lambda path_posix: True, matches))) == 3
+    assert batches == [3]
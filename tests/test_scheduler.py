@@ -0,0 +1,179 @@
+"""All tests for mac_cleanup_py.scheduler."""
+
+from threading import Lock
+from time import sleep
+from typing import Iterator
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from mac_cleanup import args
+from mac_cleanup.core import Unit
+from mac_cleanup.core_modules import BaseModule, Command
+from mac_cleanup.scheduler import Scheduler
+
+
+class _Recorder:
+    """Executes units and records their order with max number of units running at the same time."""
+
+    def __init__(self):
+        self.started: list[str] = list()
+        self.finished: list[str] = list()
+        self.running: set[str] = set()
+        self.overlaps: list[set[str]] = list()
+        self.lock = Lock()
+
+    def __call__(self, unit: Unit) -> None:
+        with self.lock:
+            self.started.append(unit.message)
+            self.running.add(unit.message)
+            self.overlaps.append(set(self.running))
+
+        sleep(0.05)
+
+        with self.lock:
+            self.running.remove(unit.message)
+            self.finished.append(unit.message)
+
+
+def get_unit(message: str, *modules: BaseModule) -> Unit:
+    """Get unit with specified modules or a single command."""
+
+    return Unit(message=message, modules=list(modules) or [Command("test")])
+
+
+class TestScheduler:
+    def test_concurrent(self):
+        """Test independent units running at the same time on bounded pool."""
+
+        recorder = _Recorder()
+
+        Scheduler([get_unit(str(index)) for index in range(5)], max_workers=2).run(recorder)
+
+        assert recorder.started == ["0", "1", "2", "3", "4"]
+        assert max(len(overlap) for overlap in recorder.overlaps) == 2
+
+    def test_exclusive(self, monkeypatch: MonkeyPatch):
+        """Test units running alone and units sharing resources."""
+
+        # Prompts are skipped with force flag
+        monkeypatch.setattr(args, "force", False)
+
+        recorder = _Recorder()
+
+        units = [
+            get_unit("brew_1", Command("test").exclusive("brew")),
+            get_unit("brew_2", Command("test").exclusive("brew", "other")),
+            get_unit("free"),
+            get_unit("alone", Command("test"), Command("test").exclusive()),
+            get_unit("prompt", Command("test").with_prompt()),
+            get_unit("last"),
+        ]
+
+        Scheduler(units).run(recorder)
+
+        # Check units sharing resources and units running alone don't overlap
+        for overlap in recorder.overlaps:
+            assert not {"brew_1", "brew_2"} <= overlap
+            assert len(overlap) == 1 or not overlap & {"alone", "prompt"}
+
+        # Check units running alone aren't overtaken
+        assert recorder.started.index("last") > recorder.started.index("prompt") > recorder.started.index("alone")
+
+    def test_after(self):
+        """Test units waiting for units of the modules they depend on."""
+
+        recorder = _Recorder()
+
+        first = Command("first")
+        second = Command("second").after(first, Command("not added"))
+
+        Scheduler([get_unit("second", second), get_unit("first", first), get_unit("free")]).run(recorder)
+
+        assert recorder.finished.index("first") < recorder.started.index("second")
+        assert recorder.started[:2] == ["first", "free"]
+
+    def test_alone_after(self):
+        """Test unit running alone not blocking later units it depends on."""
+
+        recorder = _Recorder()
+
+        first = Command("first")
+
+        units = [get_unit("alone", Command("alone").exclusive().after(first)), get_unit("first", first)]
+
+        Scheduler(units).run(recorder)
+
+        assert recorder.started == ["first", "alone"]
+
+    def test_cycle(self):
+        """Test units with cyclic dependencies."""
+
+        first, second = Command("first"), Command("second")
+        first.after(second)
+        second.after(first)
+
+        with pytest.raises(ValueError, match="cyclic"):
+            Scheduler([get_unit("first", first), get_unit("second", second)]).run(lambda unit: None)
+
+    def test_error(self):
+        """Test error of the unit being raised after running units w/o starting new ones."""
+
+        recorder = _Recorder()
+
+        def dummy_execute(unit: Unit) -> None:
+            if unit.message == "error":
+                raise KeyError(unit.message)
+
+            recorder(unit)
+
+        units = [get_unit("running"), get_unit("error"), get_unit("blocked", Command("test").exclusive())]
+
+        with pytest.raises(KeyError, match="error"):
+            Scheduler(units).run(dummy_execute)
+
+        assert recorder.finished == ["running"]
+
+    def test_stream(self):
+        """Test units being started before the rest of the stream is available."""
+
+        from threading import Event
+
+        recorder = _Recorder()
+        first_started = Event()
+
+        def dummy_execute(unit: Unit) -> None:
+            first_started.set()
+            recorder(unit)
+
+        def dummy_stream() -> Iterator[Unit]:
+            first = Command("first")
+
+            yield get_unit("first", first)
+
+            # The rest of units waits for the first one to start
+            assert first_started.wait(timeout=5)
+
+            yield get_unit("second", Command("second").after(first))
+            yield get_unit("free")
+
+        Scheduler(dummy_stream()).run(dummy_execute)
+
+        assert recorder.started[0] == "first"
+        assert recorder.finished.index("first") < recorder.started.index("second")
+        assert sorted(recorder.finished) == ["first", "free", "second"]
+
+    def test_stream_error(self):
+        """Test error of the stream being raised after running units."""
+
+        recorder = _Recorder()
+
+        def dummy_stream() -> Iterator[Unit]:
+            yield get_unit("running")
+
+            raise KeyError("stream")
+
+        with pytest.raises(KeyError, match="stream"):
+            Scheduler(dummy_stream()).run(recorder)
+
+        assert recorder.finished == ["running"]
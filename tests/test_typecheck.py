@@ -0,0 +1,88 @@
+"""All tests for mac_cleanup_py.typecheck."""
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from beartype.roar import BeartypeCallHintParamViolation
+
+from mac_cleanup.typecheck import TYPECHECK_ENV, is_typecheck_enabled, typechecked
+
+
+def dummy_helper(size: int) -> int:
+    """Dummy helper to be decorated."""
+
+    return size
+
+
+@pytest.mark.parametrize(
+    ("env_value", "output"),
+    [
+        # test default
+        (None, True),
+        # test enabled
+        ("1", True),
+        ("yes", True),
+        # test disabled
+        ("0", False),
+        ("false", False),
+        (" Off ", False),
+        ("NO", False),
+    ],
+)
+def test_is_typecheck_enabled(env_value: str | None, output: bool, monkeypatch: MonkeyPatch):
+    """Test environment switch in :func:`mac_cleanup.typecheck.is_typecheck_enabled`"""
+
+    if env_value is None:
+        monkeypatch.delenv(TYPECHECK_ENV, raising=False)
+    else:
+        monkeypatch.setenv(TYPECHECK_ENV, env_value)
+
+    assert is_typecheck_enabled() is output
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_typechecked(enabled: bool, monkeypatch: MonkeyPatch):
+    """Test functions being wrapped only with enabled checking in :func:`mac_cleanup.typecheck.typechecked`"""
+
+    monkeypatch.setenv(TYPECHECK_ENV, "1" if enabled else "0")
+
+    decorated = typechecked(dummy_helper)
+
+    assert decorated(1) == 1
+
+    # Check function is returned as is w/o checking
+    if not enabled:
+        assert decorated is dummy_helper
+        assert decorated("1") == "1"  # pyright: ignore [reportArgumentType]
+        return
+
+    with pytest.raises(BeartypeCallHintParamViolation):
+        decorated("1")  # pyright: ignore [reportArgumentType]
+
+
+def test_typecheck_disabled_on_import():
+    """Test helpers and modules being left unwrapped if checking is disabled before import."""
+
+    import sys
+    from os import environ
+    from pathlib import Path
+    from subprocess import run
+
+    # Message of wrong type is set w/o checking
+    code = (
+        "import sys\n"
+        "from mac_cleanup import Collector\n"
+        "with Collector() as collector:\n"
+        "    collector.message(1)\n"
+        "    print(repr(collector.get_temp_message), 'beartype' in sys.modules)"
+    )
+
+    result = run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parents[1],
+        env={**environ, TYPECHECK_ENV: "0"},
+        text=True,
+    )
+
+    assert result.stdout.split() == ["1", "False"]
@@ -35,6 +35,14 @@ def test_cmd(command: str | int, ignore_errors: bool, output: str):
     assert cmd(command=command, ignore_errors=ignore_errors) == output
 
 
+def test_cmd_timeout():
+    """Test command being killed on timeout in :meth:`mac_cleanup.utils.cmd`"""
+
+    from mac_cleanup.utils import cmd
+
+    assert cmd("echo 'test'; sleep 10", timeout=1) == "test"
+
+
 @pytest.mark.parametrize(
     ("str_path", "output"),
     [
@@ -82,6 +90,7 @@ def test_expanduser(str_path: str | int, output: Optional[str]):
         (Path("~/Documents"), False, False),
         # test Glob in Path
         (Path("*"), True, True),
+        (Path("/aboba/g[12]"), True, True),
         # test non-existing Path
         (Path("/aboba"), False, True),
         # test beartype
@@ -101,6 +110,22 @@ def test_check_exists(path: Path | str | int, output: bool, expand_path: bool):
     assert check_exists(path=path, expand_user=expand_path) is output
 
 
+def test_check_exists_cached(tmp_path: Path):
+    """Test memoized checks in :meth:`mac_cleanup.utils.check_exists`"""
+
+    from mac_cleanup.utils import check_exists
+
+    dummy_path = tmp_path.joinpath("dummy")
+
+    assert not check_exists(dummy_path)
+
+    dummy_path.touch()
+
+    # Check result of the previous check is used only if cached
+    assert not check_exists(dummy_path)
+    assert check_exists(dummy_path, cached=False)
+
+
 @pytest.mark.parametrize(
     ("path", "output"),
     [